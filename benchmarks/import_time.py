@@ -0,0 +1,209 @@
+"""
+Measures how long the CLI and the bot take to import, using python -X importtime in fresh interpreters, and checks
+that importing them does not load modules that only some code paths need.
+
+    python -m benchmarks.import_time                 # run and compare against benchmarks/import_baseline.json
+    python -m benchmarks.import_time --save-baseline # run and store the results as the new baseline
+
+The run exits with status 1 if an import regressed past the allowed tolerance or loaded a deferred module.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+BASELINE_FILEPATH = os.path.join(BENCHMARKS_DIRECTORY, "import_baseline.json")
+RESULTS_FILEPATH = os.path.join(BENCHMARKS_DIRECTORY, "import_latest.json")
+
+# Modules that must not be loaded by importing each module, because only some code paths use them
+DEFERRED_MODULES = {
+    "place_order": (
+        "requests",
+        "yaml",
+        "smtplib",
+        "email.message",
+        "dateutil",
+        "dotenv",
+        "asyncio",
+        "aiohttp",
+        "numpy",
+    ),
+    "src.coinbase.coinbase_bot": ("yaml", "smtplib", "dateutil.parser", "dotenv", "asyncio", "aiohttp", "numpy"),
+}
+
+# Allowed slowdown relative to the baseline, as a fraction, and in seconds; small imports are noisy
+TIME_TOLERANCE = 0.5
+ABSOLUTE_TOLERANCE = 0.01
+
+
+def parse_importtime(output):
+    """
+    Parses the report that python -X importtime writes to stderr. Modules are reported after their imports, with
+    each level of nesting indented by two more spaces.
+
+    :param output: The stderr of the interpreter
+    :return: List of (module, depth, cumulative seconds) in report order
+    """
+
+    entries = []
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative) / 1e6))
+
+    return entries
+
+
+def get_import_tree(entries, module):
+    """
+    Finds a module's import and everything it imported.
+
+    :param entries: List returned by parse_importtime()
+    :param module: Name of the module imported by the interpreter
+    :return: Tuple of the cumulative seconds and the list of modules loaded
+    """
+
+    for index, (name, depth, cumulative) in enumerate(entries):
+        if name != module:
+            continue
+
+        modules = [name]
+
+        for child_name, child_depth, _ in reversed(entries[:index]):
+            if child_depth <= depth:
+                break
+
+            modules.append(child_name)
+
+        return cumulative, modules
+
+    raise RuntimeError(f"ERROR: {module} was not imported")
+
+
+def measure_import(module, rounds=5):
+    """
+    Imports a module in fresh interpreters. One warm-up import is run first so bytecode is cached.
+
+    :param module: Name of the module to import
+    :param rounds: Number of measured imports
+    :return: Dict with the median "import_time" in seconds, the number of "modules" loaded and the "deferred"
+        modules that were loaded although they should not be
+    """
+
+    import_times = []
+
+    for round_number in range(rounds + 1):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_DIRECTORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_time, modules = get_import_tree(parse_importtime(process.stderr), module)
+
+        if round_number > 0:
+            import_times.append(import_time)
+
+    deferred = [
+        deferred
+        for deferred in DEFERRED_MODULES.get(module, ())
+        if any(name == deferred or name.startswith(deferred + ".") for name in modules)
+    ]
+
+    return {"import_time": median(import_times), "modules": len(modules), "deferred": deferred}
+
+
+def find_regressions(results, baseline, time_tolerance=TIME_TOLERANCE):
+    """
+    Compares results against a baseline. Deferred modules must never be loaded; import times may grow by
+    time_tolerance, or by ABSOLUTE_TOLERANCE seconds, whichever is more.
+
+    :param results: Dict of module to measure_import() results
+    :param baseline: Dict in the same format
+    :param time_tolerance: Allowed slowdown as a fraction, e.g. 0.5 for 50%
+    :return: List of regression messages; empty if there are none
+    """
+
+    regressions = []
+
+    for module, result in results.items():
+        if result["deferred"]:
+            regressions.append(f"{module}: loads {', '.join(result['deferred'])} at import")
+
+        expected = baseline.get(module)
+
+        if expected is None:
+            continue
+
+        limit = max(expected["import_time"] * (1 + time_tolerance), expected["import_time"] + ABSOLUTE_TOLERANCE)
+
+        if result["import_time"] > limit:
+            regressions.append(
+                f"{module}: import_time {result['import_time'] * 1000:.1f}ms exceeds "
+                f"{limit * 1000:.1f}ms (baseline {expected['import_time'] * 1000:.1f}ms)"
+            )
+
+    return regressions
+
+
+def print_results(results):
+    for module, result in results.items():
+        print(f"{module:<28} {result['import_time'] * 1000:7.1f} ms | {result['modules']:4} modules")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark how long the CLI and the bot take to import")
+    parser.add_argument("--modules", help="Modules to import", nargs="+", default=list(DEFERRED_MODULES))
+    parser.add_argument("--rounds", help="Measured imports per module", type=int, default=5)
+    parser.add_argument("--baseline", help="Path of the baseline results", default=BASELINE_FILEPATH)
+    parser.add_argument("--output", help="Path to write the results to", default=RESULTS_FILEPATH)
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline?", action="store_true")
+    parser.add_argument("--tolerance", help="Allowed slowdown as a fraction", type=float, default=TIME_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {module: measure_import(module, rounds=args.rounds) for module in args.modules}
+    print_results(results)
+
+    with open(args.output, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+        print(f"SUCCESS: Saved baseline to {args.baseline}")
+        return 0
+
+    baseline = {}
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    else:
+        print(f"WARNING: No baseline at {args.baseline}; run with --save-baseline to create one")
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+
+    for regression in regressions:
+        print(f"ERROR: Regression: {regression}")
+
+    if regressions:
+        return 1
+
+    print("SUCCESS: No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
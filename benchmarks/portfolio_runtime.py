@@ -0,0 +1,199 @@
+"""
+Benchmarks how the cost of a PortfolioRuntime grows with its number of portfolios, against a MockCoinbaseExchange
+running in a separate process. Every portfolio runs one deposit and purchase cycle on the runtime's scheduler.
+
+    python -m benchmarks.portfolio_runtime
+    python -m benchmarks.portfolio_runtime --portfolios 1 10 100 1000
+
+The run exits with status 1 if the runtime's threads grow with the number of portfolios, or if the memory or CPU
+time per portfolio of the largest run exceeds that of the smallest one past the allowed tolerance, i.e. if the
+cost of N portfolios grows faster than linearly.
+"""
+
+import argparse
+import io
+import sys
+import threading
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from time import monotonic, perf_counter, process_time, sleep
+
+from benchmarks.purchase_cycle import UNLIMITED_RATE, ExchangeProcess
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth
+from src.coinbase.portfolio_runtime import PortfolioRuntime
+from src.coinbase.rate_limit import RateLimiter, TokenBucket
+
+PORTFOLIO_COUNTS = [1, 10, 100]
+
+# Allowed growth of the memory and CPU time per portfolio relative to the smallest run, as a fraction
+COST_TOLERANCE = 0.5
+
+# Seconds to wait for every portfolio's cycles to run
+CYCLE_TIMEOUT = 300
+
+
+def build_runtime(exchange, portfolio_count):
+    """
+    Builds a runtime with portfolio_count portfolios that each buy $1 of BTC daily, and whose cycles are due now.
+
+    :param exchange: ExchangeProcess to connect to
+    :param portfolio_count: int
+    :return: PortfolioRuntime
+    """
+
+    runtime = PortfolioRuntime(api_url=exchange.url, max_workers=1)
+    auth = CoinbaseExchangeAuth(**exchange.credentials)
+
+    # Every portfolio uses the exchange's one API key, so lift its limit to time only the runtime's overhead
+    runtime.public_bucket = TokenBucket(UNLIMITED_RATE, UNLIMITED_RATE)
+    runtime.rate_limiters[auth.api_key] = RateLimiter(
+        public=runtime.public_bucket, private=TokenBucket(UNLIMITED_RATE, UNLIMITED_RATE)
+    )
+
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    now = datetime.now()
+
+    for index in range(portfolio_count):
+        bot = runtime.add_portfolio(
+            f"portfolio-{index}",
+            auth,
+            "daily",
+            start.strftime("%Y-%m-%d"),
+            start.strftime("%I:%M %p"),
+            {"BTC": 1.0},
+        )
+        bot.next_deposit_date = now
+        bot.next_purchase_date = now
+
+        # Never send email from a benchmark
+        bot.coinbase.notifier.credentials.email_address = None
+
+    return runtime
+
+
+def benchmark_portfolios(portfolio_count):
+    """
+    Measures a runtime with a number of portfolios.
+
+    :param portfolio_count: Number of portfolios
+    :return: Dict with the "memory" in bytes allocated to build the runtime, the number of "threads" it runs on,
+        and the "wall_time" and "cpu_time" in seconds of one cycle of every portfolio
+    """
+
+    # A cash balance that covers every portfolio, so no cycle deposits
+    with ExchangeProcess(usd_balance=portfolio_count * 10.0) as exchange:
+        # Built once first, so that one-off allocations such as compiled regexes are not counted
+        build_runtime(exchange, 1).session.close()
+
+        threads = threading.active_count()
+        tracemalloc.start()
+        runtime = build_runtime(exchange, portfolio_count)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        wall_start = perf_counter()
+        cpu_start = process_time()
+        deadline = monotonic() + CYCLE_TIMEOUT
+
+        bots = list(runtime.bots.values())
+        done = 0
+
+        with redirect_stdout(io.StringIO()):
+            t = threading.Thread(target=runtime.activate)
+            t.start()
+
+            # Bots are checked in the order their cycles run, so waiting costs no more than the cycles themselves
+            while done < len(bots) and monotonic() < deadline:
+                sleep(0.01)
+                now = datetime.now()
+
+                while done < len(bots) and bots[done].next_purchase_date > now:
+                    done += 1
+
+            # Counted while the scheduler is running, and with the connections the cycles opened
+            runtime_threads = threading.active_count() - threads
+            runtime.deactivate()
+            t.join()
+
+        wall_time = perf_counter() - wall_start
+        cpu_time = process_time() - cpu_start
+        runtime.session.close()
+
+    if done < len(bots):
+        raise RuntimeError(f"ERROR: {portfolio_count} portfolios did not finish their cycles in {CYCLE_TIMEOUT}s")
+
+    return {"memory": memory, "threads": runtime_threads, "wall_time": wall_time, "cpu_time": cpu_time}
+
+
+def find_regressions(results, cost_tolerance=COST_TOLERANCE):
+    """
+    Checks that the runtime's cost grows at most linearly with its portfolios: the threads must not grow at all,
+    and the memory and CPU time per portfolio may grow by cost_tolerance from the smallest to the largest run.
+
+    :param results: Dict of portfolio count (as a string) to benchmark_portfolios() results
+    :param cost_tolerance: Allowed growth as a fraction, e.g. 0.5 for 50%
+    :return: List of regression messages; empty if there are none
+    """
+
+    counts = sorted(results, key=int)
+    smallest, largest = counts[0], counts[-1]
+    regressions = []
+
+    if results[largest]["threads"] > results[smallest]["threads"]:
+        regressions.append(
+            f"{largest} portfolios run on {results[largest]['threads']} threads, "
+            f"{smallest} portfolios on {results[smallest]['threads']}"
+        )
+
+    for metric in ("memory", "cpu_time"):
+        limit = results[smallest][metric] / int(smallest) * (1 + cost_tolerance)
+        per_portfolio = results[largest][metric] / int(largest)
+
+        if per_portfolio > limit:
+            regressions.append(
+                f"{largest} portfolios: {metric} per portfolio {per_portfolio:.6g} exceeds {limit:.6g} "
+                f"({smallest} portfolios: {results[smallest][metric] / int(smallest):.6g})"
+            )
+
+    return regressions
+
+
+def print_results(results):
+    for portfolio_count, result in results.items():
+        count = int(portfolio_count)
+        print(
+            f"{count:>5} portfolios: memory {result['memory'] / 1024:9.1f} KiB "
+            f"({result['memory'] / count / 1024:7.1f} KiB each) | threads {result['threads']:3} | "
+            f"wall {result['wall_time'] * 1000:9.1f} ms | cpu {result['cpu_time'] * 1000:9.1f} ms "
+            f"({result['cpu_time'] / count * 1000:6.2f} ms each)"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark how PortfolioRuntime scales with its portfolios")
+    parser.add_argument(
+        "--portfolios", help="Portfolio counts to benchmark", type=int, nargs="+", default=PORTFOLIO_COUNTS
+    )
+    parser.add_argument(
+        "--tolerance", help="Allowed growth per portfolio as a fraction", type=float, default=COST_TOLERANCE
+    )
+    args = parser.parse_args(argv)
+
+    results = {str(count): benchmark_portfolios(count) for count in args.portfolios}
+
+    print_results(results)
+    regressions = find_regressions(results, args.tolerance)
+
+    for regression in regressions:
+        print(f"ERROR: Regression: {regression}")
+
+    if regressions:
+        return 1
+
+    print("SUCCESS: The runtime's cost grows at most linearly with its portfolios")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
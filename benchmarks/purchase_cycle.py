@@ -0,0 +1,320 @@
+"""
+Benchmarks one deposit and purchase cycle of CoinbaseBot against a MockCoinbaseExchange running in a separate
+process, for a growing number of products.
+
+    python -m benchmarks.purchase_cycle                 # run and compare against benchmarks/baseline.json
+    python -m benchmarks.purchase_cycle --save-baseline # run and store the results as the new baseline
+
+The run exits with status 1 if any result regressed past the allowed tolerance.
+"""
+
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import string
+import sys
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from itertools import product as cartesian_product
+from statistics import median
+from time import perf_counter, process_time
+
+from src.coinbase.coinbase_bot import CoinbaseBot, CoinbaseExchangeAuth
+from src.coinbase.rate_limit import RateLimiter, TokenBucket
+from src.coinbase.session import DEFAULT_POOL_SIZE, create_session
+from testing.mock_exchange import DEFAULT_CURRENCIES, MockCoinbaseExchange
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILEPATH = os.path.join(BENCHMARKS_DIRECTORY, "baseline.json")
+RESULTS_FILEPATH = os.path.join(BENCHMARKS_DIRECTORY, "latest.json")
+
+PRODUCT_COUNTS = [1, 10, 100, 1000]
+
+# Allowed slowdown of wall and CPU time relative to the baseline, as a fraction
+TIME_TOLERANCE = 0.5
+
+# Requests per second high enough that the rate limiter never makes the bot wait, so only its overhead is timed
+UNLIMITED_RATE = 1e9
+
+
+def generate_products(count):
+    """
+    Returns count distinct currency symbols, starting with real ones.
+
+    :param count: int
+    :return: List of str
+    """
+
+    symbols = [symbol for symbol in DEFAULT_CURRENCIES if symbol != "USD"]
+
+    for letters in cartesian_product(string.ascii_uppercase, repeat=3):
+        if len(symbols) >= count:
+            break
+
+        symbol = "".join(letters)
+
+        if symbol not in symbols:
+            symbols.append(symbol)
+
+    return symbols[:count]
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile.
+
+    :param values: Non-empty list of numbers
+    :param percent: Percentile between 0 and 100
+    :return: The percentile value
+    """
+
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+
+    return ordered[rank - 1]
+
+
+def normalize_endpoint(method, path_url):
+    """
+    Groups requests by endpoint, replacing IDs in the path with a placeholder.
+
+    :param method: HTTP method as a string
+    :param path_url: Request path including the query string
+    :return: str such as "GET orders/{id}"
+    """
+
+    segments = path_url.split("?")[0].strip("/").split("/")
+
+    if segments[0] == "orders" and len(segments) == 2:
+        segments[1] = "{id}"
+
+    return f"{method} {'/'.join(segments)}"
+
+
+class RequestRecorder:
+    """requests response hook that records the latency of every response by endpoint."""
+
+    def __init__(self):
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, response, **kwargs):
+        endpoint = normalize_endpoint(response.request.method, response.request.path_url)
+
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(response.elapsed.total_seconds())
+
+        return response
+
+    def reset(self):
+        with self._lock:
+            self.latencies = {}
+
+
+def serve_exchange(connection, exchange_kwargs):
+    exchange = MockCoinbaseExchange(**exchange_kwargs)
+    connection.send((exchange.url, exchange.credentials))
+    exchange.serve_forever()
+
+
+class ExchangeProcess:
+    """Runs a MockCoinbaseExchange in a child process, so its CPU time is not counted as the bot's."""
+
+    def __init__(self, **exchange_kwargs):
+        self.exchange_kwargs = exchange_kwargs
+        self.url = None
+        self.credentials = None
+        self._process = None
+
+    def __enter__(self):
+        parent_connection, child_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=serve_exchange, args=(child_connection, self.exchange_kwargs))
+        self._process.daemon = True
+        self._process.start()
+        self.url, self.credentials = parent_connection.recv()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._process.terminate()
+        self._process.join()
+
+
+def benchmark_cycle(product_count, rounds=3, max_workers=8):
+    """
+    Times deposit and purchase cycles for a number of products. One warm-up cycle is run first.
+
+    :param product_count: Number of products in the orders
+    :param rounds: Number of measured cycles
+    :param max_workers: Number of orders placed concurrently
+    :return: Dict with the median "wall_time" and "cpu_time" in seconds, "requests" per cycle, and
+        per-endpoint "count", "p50_ms" and "p99_ms"
+    """
+
+    products = generate_products(product_count)
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+
+    # An empty cash balance makes every cycle deposit before it buys
+    with ExchangeProcess(usd_balance=0, currencies=["USD"] + products) as exchange:
+        recorder = RequestRecorder()
+        session = create_session(pool_size=max(DEFAULT_POOL_SIZE, max_workers))
+        session.hooks["response"].append(recorder)
+
+        bot = CoinbaseBot(
+            api_url=exchange.url,
+            auth=CoinbaseExchangeAuth(**exchange.credentials),
+            frequency="daily",
+            start_date=start.strftime("%Y-%m-%d"),
+            start_time=start.strftime("%I:%M %p"),
+            session=session,
+            max_workers=max_workers,
+            rate_limiter=RateLimiter(
+                public=TokenBucket(UNLIMITED_RATE, UNLIMITED_RATE), private=TokenBucket(UNLIMITED_RATE, UNLIMITED_RATE)
+            ),
+        )
+        bot.set_orders(**{product: 1.0 for product in products})
+
+        # Never send email from a benchmark
+        bot.coinbase.notifier.credentials.email_address = None
+
+        wall_times = []
+        cpu_times = []
+        latencies = {}
+
+        for round_number in range(rounds + 1):
+            recorder.reset()
+            wall_start = perf_counter()
+            cpu_start = process_time()
+
+            with redirect_stdout(io.StringIO()):
+                bot.run_deposit_cycle()
+                bot.run_purchase_cycle()
+
+            # The first cycle warms up connections and the metadata cache
+            if round_number == 0:
+                continue
+
+            wall_times.append(perf_counter() - wall_start)
+            cpu_times.append(process_time() - cpu_start)
+
+            for endpoint, values in recorder.latencies.items():
+                latencies.setdefault(endpoint, []).extend(values)
+
+        session.close()
+
+    return {
+        "wall_time": median(wall_times),
+        "cpu_time": median(cpu_times),
+        "requests": sum(len(values) for values in latencies.values()) // rounds,
+        "endpoints": {
+            endpoint: {
+                "count": len(values) // rounds,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+            for endpoint, values in sorted(latencies.items())
+        },
+    }
+
+
+def find_regressions(results, baseline, time_tolerance=TIME_TOLERANCE):
+    """
+    Compares results against a baseline. Request counts must not grow at all; times may grow by time_tolerance.
+
+    :param results: Dict of product count (as a string) to benchmark_cycle() results
+    :param baseline: Dict in the same format
+    :param time_tolerance: Allowed slowdown as a fraction, e.g. 0.5 for 50%
+    :return: List of regression messages; empty if there are none
+    """
+
+    regressions = []
+
+    for product_count, result in results.items():
+        expected = baseline.get(product_count)
+
+        if expected is None:
+            continue
+
+        if result["requests"] > expected["requests"]:
+            regressions.append(
+                f"{product_count} products: {result['requests']} requests per cycle, "
+                f"baseline is {expected['requests']}"
+            )
+
+        for metric in ("wall_time", "cpu_time"):
+            limit = expected[metric] * (1 + time_tolerance)
+
+            if result[metric] > limit:
+                regressions.append(
+                    f"{product_count} products: {metric} {result[metric]:.3f}s exceeds "
+                    f"{limit:.3f}s (baseline {expected[metric]:.3f}s)"
+                )
+
+    return regressions
+
+
+def print_results(results):
+    for product_count, result in results.items():
+        print(
+            f"{product_count:>5} products: wall {result['wall_time'] * 1000:9.1f} ms | "
+            f"cpu {result['cpu_time'] * 1000:9.1f} ms | {result['requests']:5} requests"
+        )
+
+        for endpoint, stats in result["endpoints"].items():
+            print(
+                f"        {endpoint:<32} {stats['count']:5}x  "
+                f"p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CoinbaseBot purchase cycles against a mock exchange")
+    parser.add_argument("--products", help="Product counts to benchmark", type=int, nargs="+", default=PRODUCT_COUNTS)
+    parser.add_argument("--rounds", help="Measured cycles per product count", type=int, default=3)
+    parser.add_argument("--max-workers", help="Number of orders to place concurrently", type=int, default=8)
+    parser.add_argument("--baseline", help="Path of the baseline results", default=BASELINE_FILEPATH)
+    parser.add_argument("--output", help="Path to write the results to", default=RESULTS_FILEPATH)
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline?", action="store_true")
+    parser.add_argument("--tolerance", help="Allowed slowdown as a fraction", type=float, default=TIME_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {
+        str(product_count): benchmark_cycle(product_count, rounds=args.rounds, max_workers=args.max_workers)
+        for product_count in args.products
+    }
+
+    print_results(results)
+
+    with open(args.output, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+        print(f"SUCCESS: Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"WARNING: No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r") as baseline_file:
+        regressions = find_regressions(results, json.load(baseline_file), args.tolerance)
+
+    for regression in regressions:
+        print(f"ERROR: Regression: {regression}")
+
+    if regressions:
+        return 1
+
+    print("SUCCESS: No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
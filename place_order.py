@@ -1,23 +1,94 @@
 from src.args.command_line_args import get_command_line_args
-from src.coinbase.coinbase_bot import COINBASE_API_URL, CoinbaseBot, CoinbaseExchangeAuth
-from src.coinbase.utilities import CoinbaseProCredentials
-from src.orders.command_line_input_collector import CommandLineInputCollector
-from src.orders.yaml_input_collector import YAMLInputCollector
+
+# Everything else is imported by the code path that needs it, so that --help and failed input validation return
+# without loading requests, yaml, smtplib and the rest. benchmarks/import_time.py guards this.
+
+
+def add_schedules(bot, schedules):
+    """
+    Replaces the bot's first schedule with the first one collected from the YAML file and adds every other one.
+    Every schedule is built by CoinbaseBot.create_schedule(), which converts the amounts, as typed, to floats.
+    """
+
+    if not schedules:
+        return
+
+    bot.schedules[0] = bot.create_schedule(**schedules[0])
+
+    for schedule in schedules[1:]:
+        bot.add_schedule(**schedule)
+
+
+def run_portfolios(cli_args):
+    """Runs every portfolio in the --portfolios file from one process."""
+
+    from src.coinbase.coinbase_bot import COINBASE_API_URL, CoinbaseExchangeAuth
+    from src.coinbase.portfolio_runtime import PortfolioRuntime
+    from src.orders.portfolio_input_collector import PortfoliosYAMLCollector
+
+    portfolios = PortfoliosYAMLCollector(cli_args["portfolios"])
+    portfolios.collect_inputs()
+
+    runtime = PortfolioRuntime(api_url=COINBASE_API_URL, max_workers=cli_args["max_workers"])
+
+    for portfolio in portfolios.portfolios:
+        bot = runtime.add_portfolio(
+            portfolio.name,
+            auth=CoinbaseExchangeAuth(**vars(portfolio.credentials)),
+            frequency=portfolio.frequency,
+            start_date=portfolio.start_date,
+            start_time=portfolio.start_time,
+            orders=portfolio.orders,
+            email_digest=cli_args["email_digest"],
+        )
+        add_schedules(bot, portfolio.schedules)
+
+    try:
+        runtime.activate()
+
+    except Exception as e:
+        print(f"There was an error running your portfolios: {str(e)}")
 
 
 def main():
     cli_args = get_command_line_args()
 
+    from src.orders import utilities
+
+    utilities.currency_catalog.offline = cli_args["offline"]
+
+    if cli_args["metrics_port"] is not None:
+        from src.coinbase.metrics import MetricsServer
+
+        MetricsServer(cli_args["metrics_port"], cli_args["metrics_host"]).start()
+
+    if cli_args["trace"] is not None:
+        from src.coinbase.tracing import tracer
+
+        tracer.enable(cli_args["trace"], cli_args["trace_format"])
+
+    if cli_args["portfolios"]:
+        run_portfolios(cli_args)
+        return
+
     # User chose to input orders via yaml file
     if cli_args["yaml"]:
-        user_inputs = YAMLInputCollector()
+        from src.orders.yaml_input_collector import YAML_FILEPATH, YAMLInputCollector
+
+        user_inputs = YAMLInputCollector(cli_args["orders"] or YAML_FILEPATH)
 
     # Default to inputting orders via the command line
     else:
+        from src.orders.command_line_input_collector import CommandLineInputCollector
+
         user_inputs = CommandLineInputCollector()
 
     user_inputs.collect_inputs()
 
+    from src.coinbase.coinbase_bot import COINBASE_API_URL, CoinbaseBot, CoinbaseExchangeAuth
+    from src.coinbase.ledger import FillsLedger
+    from src.coinbase.utilities import CoinbaseProCredentials
+
     coinbase_credentials = CoinbaseProCredentials()
     coinbase = CoinbaseBot(
         api_url=COINBASE_API_URL,
@@ -25,9 +96,14 @@ def main():
         frequency=user_inputs.frequency,
         start_date=user_inputs.start_date,
         start_time=user_inputs.start_time,
+        orders=user_inputs.orders,
+        max_workers=cli_args["max_workers"],
+        ledger=FillsLedger(cli_args["ledger"]) if cli_args["ledger"] else None,
+        email_digest=cli_args["email_digest"],
+        outbox_path=cli_args["outbox"],
     )
 
-    coinbase.set_orders(**user_inputs.orders)
+    add_schedules(coinbase, user_inputs.schedules)
 
     try:
         print(coinbase.orders)
@@ -4,6 +4,21 @@ parser = argparse.ArgumentParser(description="Method of collecting user order")
 group = parser.add_mutually_exclusive_group()
 group.add_argument("--cli", help="Place orders via command line input?", action="store_true")
 group.add_argument("--yaml", help="Place orders via YAML file?", action="store_true")
+group.add_argument("--portfolios", help="Run every portfolio defined in this YAML file", default=None)
+parser.add_argument("--orders", help="Path of the YAML, JSON or CSV orders file read with --yaml", default=None)
+parser.add_argument("--max-workers", help="Number of orders to place concurrently", type=int, default=1)
+parser.add_argument("--ledger", help="Path of a SQLite ledger to record orders and deposits in", default=None)
+parser.add_argument(
+    "--outbox", help="Send email confirmations in the background, keeping unsent ones in this file", default=None
+)
+parser.add_argument("--email-digest", help="Email one summary per purchase cycle?", action="store_true")
+parser.add_argument("--metrics-port", help="Serve Prometheus metrics on this port", type=int, default=None)
+parser.add_argument("--metrics-host", help="Address to serve Prometheus metrics on", default="127.0.0.1")
+parser.add_argument("--trace", help="Path of a file to write cycle traces to", default=None)
+parser.add_argument("--trace-format", help="Format of the trace file", choices=("jsonl", "chrome"), default="jsonl")
+parser.add_argument(
+    "--offline", help="Validate crypto symbols against the saved currency catalog?", action="store_true"
+)
 
 
 def get_command_line_args(verbose=False):
@@ -0,0 +1,709 @@
+import asyncio
+import json
+from datetime import datetime
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+
+import aiohttp
+from yarl import URL
+
+from src.coinbase.coinbase_bot import CoinbaseBot
+from src.coinbase.fills import FILLS_PAGE_LIMIT, FillsQuery
+from src.coinbase.metrics import USD_DEPLOYED, instrumented
+from src.coinbase.protocol import ORDER_POLL_TIMEOUT, CoinbaseProProtocol
+from src.coinbase.scheduler import MAX_SLEEP_SECONDS, ScheduledEvent
+from src.coinbase.session import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, normalize_timeout
+from src.coinbase.tracing import trace, traced
+
+
+class ConnectionStats:
+    """Counts the connections an aiohttp session opens and the requests they carry, like PooledHTTPAdapter."""
+
+    def __init__(self):
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_opened += 1
+
+    async def _on_request_end(self, session, context, params):
+        self.requests_sent += 1
+
+    def get_connection_stats(self):
+        """
+        Returns connection reuse statistics.
+
+        :return: Dict with the number of connections opened, requests sent and requests sent over a reused
+            connection
+        """
+
+        return {
+            "connections_opened": self.connections_opened,
+            "requests_sent": self.requests_sent,
+            "reused_requests": self.requests_sent - self.connections_opened,
+        }
+
+
+def create_async_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, keep_alive=True, connection_stats=None):
+    """
+    Creates an aiohttp.ClientSession backed by a shared connection pool. Must be called from a running event loop.
+
+    :param pool_size: Maximum number of open connections
+    :param timeout: Seconds for both the connect and read timeouts, or a tuple of (connect timeout, read timeout)
+    :param keep_alive: False to close every connection after its response
+    :param connection_stats: Optional ConnectionStats to count the session's connections and requests
+    :return: aiohttp.ClientSession
+    """
+
+    if not isinstance(pool_size, int):
+        raise TypeError("ERROR: pool_size must be of type int")
+
+    if pool_size <= 0:
+        raise ValueError("ERROR: pool_size must be a positive number")
+
+    connect_timeout, read_timeout = normalize_timeout(timeout)
+    connector = aiohttp.TCPConnector(limit=pool_size, force_close=not keep_alive)
+
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+        trace_configs=[] if connection_stats is None else [connection_stats.trace_config],
+    )
+
+
+class AsyncResponse:
+    """The parts of an aiohttp response the handler needs, read before the connection is released."""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@traced
+@instrumented
+class AsyncCoinbaseProHandler(CoinbaseProProtocol):
+    """
+    asyncio counterpart of CoinbaseProHandler. Runs the operations of CoinbaseProProtocol over an aiohttp session,
+    awaiting each call they yield.
+    """
+
+    connection_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+    def __init__(
+        self,
+        api_url,
+        auth,
+        session=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        ledger=None,
+        rate_limiter=None,
+        retry_policy=None,
+    ):
+        super().__init__(
+            api_url,
+            auth,
+            timeout=timeout,
+            cache=cache,
+            ledger=ledger,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+        )
+        self.session = session
+        self.pool_size = pool_size
+        self.connection_stats = ConnectionStats()
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes the handler's session unless it was passed in by the caller."""
+
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _run(self, operation):
+        """
+        Runs an operation, awaiting each call it yields and sending back the result or throwing back the error.
+
+        :param operation: Generator returned by one of the CoinbaseProProtocol operations
+        :return: The operation's return value
+        """
+
+        result, error = None, None
+
+        while True:
+            try:
+                step = operation.send(result) if error is None else operation.throw(error)
+
+            except StopIteration as stop:
+                return stop.value
+
+            try:
+                result, error = await getattr(self, step.method)(*step.args, **step.kwargs), None
+
+            except Exception as e:
+                result, error = None, e
+
+    async def _acquire(self, endpoint):
+        return await self.rate_limiter.acquire_async(endpoint)
+
+    async def _transmit(self, method, endpoint, params=None, data=None):
+        if self.session is None:
+            self.session = create_async_session(self.pool_size, self.timeout, connection_stats=self.connection_stats)
+
+        query = "?" + urlencode(params) if params else ""
+        path_url = urlsplit(self.api_url).path + endpoint + query
+
+        # The URL is signed as-is, so stop aiohttp from re-quoting it
+        url = URL(self.api_url + endpoint + query, encoded=True)
+
+        # Signatures are timestamped, so every attempt is signed again
+        headers = self.auth.get_auth_headers(method, path_url, data)
+
+        async with self.session.request(method, url, data=data, headers=headers) as response:
+            return AsyncResponse(response.status, await response.read(), response.headers)
+
+    async def _sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    async def _request(self, method, endpoint, params=None, data=None, retry=None):
+        """
+        Sends an authenticated request, retrying connection errors, timeouts and server errors with backoff.
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to api_url
+        :param params: Optional dict of query parameters
+        :param data: Optional request body as a string
+        :param retry: True to retry failures; defaults to True for GET requests only
+        :return: AsyncResponse
+        """
+
+        return await self._run(self._request_operation(method, endpoint, params, data, retry))
+
+    def get_connection_stats(self):
+        """
+        Returns connection reuse statistics for the session the handler created. Requests over a session passed in
+        by the caller are not counted.
+
+        :return: Dict of connection and request counts; see ConnectionStats.get_connection_stats()
+        """
+
+        return self.connection_stats.get_connection_stats()
+
+    async def get_payment_method(self):
+        """
+        Retrieves the user's bank from Coinbase Pro profile. The result is cached.
+
+        :return: The user's bank ID as a string
+        """
+
+        return await self._run(self._get_or_fetch("payment_method", self._fetch_payment_method))
+
+    async def get_usd_wallet_id(self):
+        """
+        Retrieves the ID of the user's USD wallet. The result is cached.
+
+        :return: The wallet ID as a string
+        """
+
+        return await self._run(self._get_or_fetch("usd_wallet_id", self._fetch_usd_wallet_id))
+
+    async def get_profile(self):
+        """
+        Retrieves the user's default Coinbase Pro profile. The result is cached.
+
+        :return: The profile as a dict
+        """
+
+        return await self._run(self._get_or_fetch("profile", self._fetch_profile))
+
+    async def deposit_from_bank(self, amount):
+        """
+        Deposits USD from user's bank account into their USD Wallet on Coinbase Pro.
+
+        :param amount: The amount of USD to deposit
+        :return: True if deposit is successful
+        """
+
+        return await self._run(self._deposit_from_bank(amount))
+
+    async def get_balance_snapshot(self):
+        """
+        Retrieves the balances of all of the user's Coinbase wallets in one request.
+
+        :return: BalanceSnapshot indexed by currency
+        """
+
+        return await self._run(self._get_balance_snapshot())
+
+    async def are_sufficient_funds_available(self, amount):
+        """
+        Checks if the user has enough USD to place a market order.
+
+        :param amount: The amount of USD to make a purchase with
+        :return: True if user has enough USD for the order; False otherwise
+        """
+
+        return await self._run(self._are_sufficient_funds_available(amount))
+
+    async def place_market_order(self, product, amount, client_oid=None):
+        """
+        Places a market order for specified product with a specified amount of USD.
+
+        With a client_oid, an order whose response is lost or answered with a server error is looked up by its
+        client_oid and is only sent again if the exchange never received it, so a retry cannot buy twice.
+
+        :param product: The cryptocurrency to purchase as a string
+        :param amount: The amount of USD to make a purchase with
+        :param client_oid: Optional UUID string identifying the order; see make_client_oid()
+        :return: The order ID if the market order is successfully executed
+        """
+
+        return await self._run(self._place_market_order(product, amount, client_oid))
+
+    async def submit_market_order(self, market_order):
+        """
+        Sends a market order, retrying it with backoff if it has a client_oid and the exchange did not receive it.
+
+        :param market_order: Dict returned by build_market_order()
+        :return: The order ID
+        """
+
+        return await self._run(self._submit_market_order(market_order))
+
+    async def find_order_by_client_oid(self, client_oid):
+        """
+        Looks up an order by the client_oid it was placed with.
+
+        :param client_oid: UUID string
+        :return: The order as a dict, or None if the exchange has no such order
+        """
+
+        return await self._run(self._find_order_by_client_oid(client_oid))
+
+    async def get_order(self, order_id):
+        """
+        Retrieves the current state of an order.
+
+        :param order_id: The order ID returned by place_market_order()
+        :return: The order as a dict
+        """
+
+        return await self._run(self._get_order(order_id))
+
+    async def wait_for_order(self, order_id, timeout=ORDER_POLL_TIMEOUT):
+        """
+        Polls an order with exponential backoff until it is done or the timeout passes.
+
+        :param order_id: The order ID returned by place_market_order()
+        :param timeout: Maximum number of seconds to wait
+        :return: The last retrieved state of the order as a dict
+        """
+
+        return await self._run(self._wait_for_order(order_id, timeout))
+
+    async def get_transaction_details(self, product, start_date, order_id=None):
+        """
+        Retrieves the JSON response of the transaction details.
+
+        :param product: The cryptocurrency to get transaction details of as a string
+        :param start_date: String in "yyyy-mm-dd" format
+        :param order_id: Optional order ID; if given, the details are summed over all fills of that order
+        :return: Extracted details from the retrieved JSON as a dict
+        """
+
+        return await self._run(self._get_transaction_details(product, start_date, order_id))
+
+    async def iter_fills(
+        self, product=None, order_id=None, start_date=None, end_date=None, before=None, limit=FILLS_PAGE_LIMIT
+    ):
+        """
+        Lazily yields every fill matching the filters, one page at a time; see CoinbaseProHandler.iter_fills().
+
+        :param product: Optional cryptocurrency to filter by as a string
+        :param order_id: Optional order ID to filter by
+        :param start_date: Optional string in "yyyy-mm-dd" format
+        :param end_date: Optional string in "yyyy-mm-dd" format
+        :param before: Optional cursor (trade ID); if given, walks towards newer fills than the cursor
+        :param limit: Number of fills requested per page
+        :return: Async generator of Fill records
+        """
+
+        query = FillsQuery(product, order_id, start_date, end_date, before, limit)
+
+        while not query.done:
+            for fill in query.read_page(await self._request("GET", "fills", params=query.parameters)):
+                yield fill
+
+    async def get_candles(self, product, start, end, granularity):
+        """
+        Retrieves historic candles of a product. The exchange returns at most 300 candles per request.
+
+        :param product: The cryptocurrency as a string
+        :param start: Seconds since the epoch of the first candle
+        :param end: Seconds since the epoch of the last candle
+        :param granularity: Candle size in seconds
+        :return: List of [time, low, high, open, close, volume], newest first
+        """
+
+        return await self._run(self._get_candles(product, start, end, granularity))
+
+    async def send_email_confirmation(self, transaction_details):
+        """
+        Sends user a confirmation email with the details of the transaction. SMTP runs in a worker thread.
+
+        :param transaction_details: Dict containing transaction details
+        :return: True if the email is sent successfully; False otherwise
+        """
+
+        return await asyncio.to_thread(self.notifier.send_email_confirmation, transaction_details)
+
+    async def send_email_confirmations(self, transaction_details_list, digest=False, on_sent=None):
+        """
+        Sends the confirmations of a whole purchase cycle over a single SMTP session, in a worker thread.
+
+        :param transaction_details_list: List of dicts containing transaction details
+        :param digest: If True, combines every transaction into one email
+        :param on_sent: Optional callable given the index of each email as soon as it is sent
+        :return: Number of emails sent
+        """
+
+        return await asyncio.to_thread(
+            self.notifier.send_email_confirmations, transaction_details_list, digest=digest, on_sent=on_sent
+        )
+
+
+class AsyncCoinbaseBot(CoinbaseBot):
+    """
+    asyncio counterpart of CoinbaseBot. activate() awaits the next deadline instead of blocking a thread, so a
+    single event loop can drive many bots, optionally sharing one aiohttp session.
+    """
+
+    handler_class = AsyncCoinbaseProHandler
+
+    def __init__(
+        self,
+        api_url,
+        auth,
+        frequency,
+        start_date,
+        start_time,
+        orders={},
+        session=None,
+        max_workers=1,
+        ledger=None,
+        email_digest=False,
+        outbox_path=None,
+        name=None,
+        rate_limiter=None,
+    ):
+        # Cycles run on the event loop, so unlike CoinbaseBot there is no scheduler thread
+        self._setup(
+            api_url,
+            auth,
+            frequency,
+            start_date,
+            start_time,
+            orders,
+            session,
+            max_workers,
+            ledger,
+            email_digest,
+            outbox_path,
+            name,
+            rate_limiter,
+        )
+        self._stop_event = None
+        self._loop = None
+
+    @trace("deposit_cycle")
+    async def run_deposit_cycle(self, schedule=None):
+        """
+        Deposits the sum of a schedule's orders and moves on to its next deposit date.
+
+        :param schedule: PurchaseSchedule to run; defaults to the first schedule
+        :return: None
+        """
+
+        schedule = self.start_cycle("deposit", schedule)
+        deposit_amount = sum(schedule.orders.values())
+        print(f"Depositing ${deposit_amount:.2f} into Coinbase Pro account. . .")
+
+        # deposit_from_bank() not supported in sandbox mode
+        if "sandbox" in self.coinbase.api_url:
+            print("WARNING: deposit_from_bank() is not supported in sandbox mode")
+
+        elif (await self.coinbase.get_balance_snapshot()).covers(deposit_amount):
+            print(f"Cash balance already covers ${deposit_amount:.2f}; skipping deposit.")
+
+        else:
+            await self.coinbase.deposit_from_bank(deposit_amount)
+
+        schedule.update_deposit_date()
+
+    @trace("place_order")
+    async def place_order(self, product, amount, schedule=None):
+        """
+        Places a single market order. Confirmations are emailed once the whole cycle has been placed.
+
+        With an outbox, transaction details are retrieved by the outbox's worker rather than here.
+
+        :param product: The cryptocurrency to purchase as a string
+        :param amount: The amount of USD to make a purchase with
+        :param schedule: PurchaseSchedule the order belongs to; defaults to the first schedule
+        :return: Dict with the "order_id" and the "transaction_details", which are None if not retrieved
+        """
+
+        print(f"Placing order for ${amount:.2f} of {product}. . .")
+
+        order_id = await self.coinbase.place_market_order(
+            product, amount, client_oid=self.get_client_oid(product, schedule)
+        )
+        USD_DEPLOYED.inc(amount, product=product)
+
+        if self.outbox is not None:
+            return {"order_id": order_id, "transaction_details": None}
+
+        # The order is placed once it has an id, so failing to look up its details does not fail the order
+        try:
+            purchase_date = self.get_purchase_date(schedule)
+            transaction_details = await self.coinbase.get_transaction_details(product, purchase_date, order_id=order_id)
+            return {"order_id": order_id, "transaction_details": transaction_details}
+
+        except Exception as e:
+            return self.skip_transaction_details(product, order_id, e)
+
+    async def get_balance_snapshot(self):
+        """
+        Retrieves the balances used to plan a cycle's orders.
+
+        :return: BalanceSnapshot, or None in sandbox mode where coinbase-accounts is not supported
+        """
+
+        if "sandbox" in self.coinbase.api_url:
+            print("WARNING: are_sufficient_funds_available() not supported in sandbox mode")
+            return None
+
+        return await self.coinbase.get_balance_snapshot()
+
+    @trace("place_orders")
+    async def place_orders(self, schedule=None):
+        """
+        Places every order of a schedule, by default the first, concurrently, with at most max_workers in flight.
+
+        Balances are fetched once per cycle and each order reserves its amount before it is started. Orders the
+        remaining cash balance does not cover are skipped and logged, and the rest of the cycle is still placed.
+
+        :param schedule: PurchaseSchedule to place the orders of
+        :return: Dict of product to {"order_id": str or None, "transaction_details": dict or None,
+            "error": Exception or None}
+        """
+
+        schedule = schedule or self.schedules[0]
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def place_order(product, amount):
+            async with semaphore:
+                return await self.place_order(product, amount, schedule)
+
+        planned, results = self.plan_orders(schedule, await self.get_balance_snapshot())
+        outcomes = await asyncio.gather(
+            *(place_order(product, amount) for product, amount in planned.items()), return_exceptions=True
+        )
+
+        for product, outcome in zip(planned, outcomes):
+            if isinstance(outcome, Exception):
+                results[product] = self.fail_order(product, outcome)
+
+            else:
+                results[product] = {**outcome, "error": None}
+
+        return {product: results[product] for product in schedule.orders}
+
+    async def send_email_confirmations(self, results):
+        """
+        Emails the confirmations of a purchase cycle over one SMTP session, or as one digest if email_digest is set.
+
+        :param results: Dict returned by place_orders()
+        :return: Number of emails sent
+        """
+
+        transaction_details_list = self.collect_transaction_details(results)
+
+        if not transaction_details_list:
+            return 0
+
+        sent = await self.coinbase.send_email_confirmations(transaction_details_list, digest=self.email_digest)
+
+        if sent:
+            print("Email confirmation sent!")
+
+        return sent
+
+    def deliver_email_confirmations(self, notification):
+        """
+        Retrieves the transaction details of a queued notification and emails them. Called by the outbox's worker
+        thread, which hands the work to the running event loop.
+
+        :param notification: Dict with the "orders" of a cycle and whether to send a "digest"
+        :return: Number of emails sent
+        """
+
+        future = asyncio.run_coroutine_threadsafe(self.deliver_email_confirmations_async(notification), self._loop)
+
+        return future.result()
+
+    @trace("deliver_email_confirmations")
+    async def deliver_email_confirmations_async(self, notification):
+        """
+        Coroutine behind deliver_email_confirmations().
+
+        :param notification: Dict with the "orders" of a cycle and whether to send a "digest"
+        :return: Number of emails sent
+        """
+
+        orders = self.get_unsent_orders(notification)
+
+        if not orders:
+            return 0
+
+        transaction_details_list = [
+            await self.coinbase.get_transaction_details(
+                order["product"], order["start_date"], order_id=order["order_id"]
+            )
+            for order in orders
+        ]
+
+        sent = await self.coinbase.send_email_confirmations(
+            transaction_details_list, digest=notification["digest"], on_sent=self.record_sent(notification, orders)
+        )
+        self.check_sent(notification, orders, sent)
+        print("Email confirmation sent!")
+
+        return sent
+
+    @trace("purchase_cycle")
+    async def run_purchase_cycle(self, schedule=None):
+        """
+        Places a market order for every product of a schedule and moves on to its next purchase date.
+
+        :param schedule: PurchaseSchedule to run; defaults to the first schedule
+        :return: None
+        """
+
+        schedule = self.start_cycle("purchase", schedule)
+        results = await self.place_orders(schedule)
+
+        if self.outbox is not None:
+            self.queue_email_confirmations(results, schedule)
+
+        else:
+            await self.send_email_confirmations(results)
+
+        # Update to the next purchase date.
+        schedule.update_purchase_date()
+        self.finish_purchase_cycle(schedule, results)
+
+    def get_next_cycle(self):
+        """
+        Finds the earliest pending cycle across every schedule. A schedule's deposit comes before its purchase.
+
+        :return: Tuple of (deadline, cycle coroutine function, PurchaseSchedule)
+        """
+
+        cycles = []
+
+        for schedule in self.schedules:
+            cycles.append((schedule.next_deposit_date, self.run_deposit_cycle, schedule))
+            cycles.append((schedule.next_purchase_date, self.run_purchase_cycle, schedule))
+
+        return min(cycles, key=lambda cycle: cycle[0])
+
+    def get_next_event(self):
+        """
+        Wraps the next cycle in a ScheduledEvent named like CoinbaseBot's, so the inherited error handling applies.
+
+        :return: ScheduledEvent whose action is the cycle coroutine function, bound to its schedule
+        """
+
+        next_deadline, run_cycle, schedule = self.get_next_cycle()
+        event = "deposit" if run_cycle == self.run_deposit_cycle else "purchase"
+
+        return ScheduledEvent(next_deadline, self.get_event_name(event, schedule), partial(run_cycle, schedule))
+
+    # activate() reads the next deadline of every schedule from the schedules themselves, so there is no
+    # scheduler to arm and the cycles inherited from CoinbaseBot only need these to be no-ops
+    def schedule_deposit(self, schedule):
+        """Does nothing; the event loop picks up a schedule's next deposit date by itself."""
+
+    def schedule_purchase(self, schedule):
+        """Does nothing; the event loop picks up a schedule's next purchase date by itself."""
+
+    def schedule_next_cycle(self):
+        """Does nothing; the event loop picks up every schedule's next dates by itself."""
+
+    async def activate(self):
+        """
+        Activates the coinbase bot and performs transactions based on the dates and conditions. The deadlines of
+        every schedule are merged into one timeline.
+
+        :return: None
+        """
+
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+        if self.outbox is not None:
+            self.outbox.start()
+
+        for schedule in self.schedules:
+            print(f"Next deposit date: {schedule.next_deposit_date}")
+            print(f"Next purchasing date: {schedule.next_purchase_date}")
+
+        try:
+            while not self._stop_event.is_set():
+                now = datetime.now()
+                event = self.get_next_event()
+
+                if event.when <= now:
+                    try:
+                        await event.action()
+
+                    except Exception as e:
+                        self.handle_cycle_error(event, e)
+
+                    continue
+
+                timeout = min((event.when - now).total_seconds(), MAX_SLEEP_SECONDS)
+
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+        finally:
+            # The worker may be waiting on this loop, so stop it from another thread
+            if self.outbox is not None:
+                await asyncio.to_thread(self.outbox.stop)
+
+            await self.coinbase.close()
+
+    def deactivate(self):
+        """Stops a running activate() coroutine."""
+
+        if self._stop_event is not None:
+            self._stop_event.set()
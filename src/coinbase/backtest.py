@@ -0,0 +1,313 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.coinbase.frequency import FREQUENCY_TO_DAYS
+
+# Column order of the rows returned by the products/<product>/candles endpoint
+CANDLE_COLUMNS = ("time", "low", "high", "open", "close", "volume")
+
+# Taker fee charged on market orders, as a fraction of the filled volume
+DEFAULT_FEE_RATE = 0.005
+
+
+def to_timestamp(date):
+    """
+    Converts a datetime to seconds since the epoch. Naive datetimes are read as UTC, like candle times.
+
+    :param date: datetime
+    :return: int
+    """
+
+    if not isinstance(date, datetime):
+        raise TypeError("ERROR: date must be of type datetime")
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return int(date.timestamp())
+
+
+def get_purchase_times(start_date, frequency, end_date):
+    """
+    Returns the purchase times of a schedule, stepping from start_date the same way CoinbaseBot does.
+
+    :param start_date: datetime of the first purchase
+    :param frequency: One of the keys of FREQUENCY_TO_DAYS
+    :param end_date: datetime after which no purchases are made
+    :return: int64 array of seconds since the epoch
+    """
+
+    if frequency not in FREQUENCY_TO_DAYS:
+        raise ValueError(f"ERROR: frequency must be one of {', '.join(FREQUENCY_TO_DAYS)}")
+
+    time_delta = FREQUENCY_TO_DAYS[frequency]
+    start = to_timestamp(start_date)
+    end = to_timestamp(end_date)
+
+    if isinstance(time_delta, timedelta):
+        return np.arange(start, end + 1, int(time_delta.total_seconds()), dtype=np.int64)
+
+    # Months differ in length, so these are stepped one at a time; even decades are only a few hundred steps
+    times = []
+    date = start_date
+
+    while to_timestamp(date) <= end:
+        times.append(to_timestamp(date))
+        date += time_delta
+
+    return np.array(times, dtype=np.int64)
+
+
+class Candles:
+    """OHLC candles of one product as NumPy arrays, sorted by their start time in seconds since the epoch."""
+
+    def __init__(self, times, opens, closes):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.opens = np.asarray(opens, dtype=np.float64)
+        self.closes = np.asarray(closes, dtype=np.float64)
+
+        if not len(self.times):
+            raise ValueError("ERROR: candles cannot be empty")
+
+        if not self.times.shape == self.opens.shape == self.closes.shape:
+            raise ValueError("ERROR: times, opens and closes must have the same length")
+
+        if np.any(np.diff(self.times) <= 0):
+            raise ValueError("ERROR: candle times must be strictly increasing")
+
+        if np.any(self.opens <= 0) or np.any(self.closes <= 0):
+            raise ValueError("ERROR: candle prices must be positive")
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds Candles from rows as returned by the candles endpoint, which come newest first.
+
+        :param rows: Iterable of [time, low, high, open, close, volume]
+        :return: Candles
+        """
+
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+        data = data[np.argsort(data[:, 0], kind="stable")]
+
+        return cls(
+            data[:, CANDLE_COLUMNS.index("time")],
+            data[:, CANDLE_COLUMNS.index("open")],
+            data[:, CANDLE_COLUMNS.index("close")],
+        )
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Loads Candles from a JSON file holding a list of candle rows.
+
+        :param filepath: Path of the file
+        :return: Candles
+        """
+
+        with open(filepath) as candles_file:
+            return cls.from_rows(json.load(candles_file))
+
+    def get_purchase_indices(self, purchase_times):
+        """
+        Finds the candle each purchase fills in: the last candle that starts at or before the purchase time.
+
+        :param purchase_times: int64 array of seconds since the epoch
+        :return: int64 array of candle indices; purchases before the first candle are left out
+        """
+
+        indices = np.searchsorted(self.times, purchase_times, side="right") - 1
+
+        return indices[indices >= 0]
+
+
+class BacktestResult:
+    """
+    Curves of one product's simulated purchases, with one value per candle: USD invested including fees, fees,
+    units accumulated and their value at the candle's close.
+    """
+
+    def __init__(self, product, times, invested, fees, units, value):
+        self.product = product
+        self.times = times
+        self.invested = invested
+        self.fees = fees
+        self.units = units
+        self.value = value
+
+    @property
+    def pnl(self):
+        """Profit or loss curve: value minus USD invested."""
+
+        return self.value - self.invested
+
+    @property
+    def average_cost(self):
+        """Curve of the USD paid per unit, including fees. NaN until the first purchase."""
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.units > 0, self.invested / self.units, np.nan)
+
+    def get_summary(self):
+        """
+        Returns the totals at the last candle.
+
+        :return: Dict with the "invested", "fees", "units", "value", "pnl" and "average_cost"
+        """
+
+        return {
+            "invested": float(self.invested[-1]),
+            "fees": float(self.fees[-1]),
+            "units": float(self.units[-1]),
+            "value": float(self.value[-1]),
+            "pnl": float(self.pnl[-1]),
+            "average_cost": float(self.average_cost[-1]),
+        }
+
+
+class Backtest:
+    """
+    Replays dollar-cost averaging schedules over historical candles.
+
+    Market orders fill at the open of the candle containing the purchase time. As on Coinbase Pro, an order's
+    funds cover both the filled volume and the fee, so each dollar buys 1 / (1 + fee_rate) dollars of crypto.
+    """
+
+    def __init__(self, candles, fee_rate=DEFAULT_FEE_RATE):
+        """
+        :param candles: Dict of product to Candles
+        :param fee_rate: Fee as a fraction of the filled volume
+        """
+
+        if not isinstance(fee_rate, (int, float)):
+            raise TypeError("ERROR: fee_rate must be of type int or float")
+
+        if fee_rate < 0:
+            raise ValueError("ERROR: fee_rate cannot be negative")
+
+        self.candles = candles
+        self.fee_rate = fee_rate
+
+    def get_candles(self, product):
+        """Returns the Candles of a product, raising a ValueError if there are none."""
+
+        if product not in self.candles:
+            raise ValueError(f"ERROR: No candles for {product}")
+
+        return self.candles[product]
+
+    def get_end_date(self, product, end_date=None):
+        """
+        Returns the end of a schedule over the product's candles. Candles cannot price purchases after the last
+        one, so an end_date past it is truncated there with a warning, rather than buying at its stale open.
+
+        :param product: The cryptocurrency as a string
+        :param end_date: datetime after which no purchases are made; defaults to the last candle
+        :return: datetime
+        """
+
+        last_date = datetime.fromtimestamp(int(self.get_candles(product).times[-1]), timezone.utc).replace(tzinfo=None)
+
+        if end_date is None:
+            return last_date
+
+        if to_timestamp(end_date) > to_timestamp(last_date):
+            print(
+                f"WARNING: Candles of {product} end at {last_date} UTC, before {end_date}. "
+                f"Purchases after {last_date} are left out of the backtest"
+            )
+            return last_date
+
+        return end_date
+
+    def run(self, orders, frequency, start_date, end_date=None):
+        """
+        Simulates one schedule of orders.
+
+        :param orders: Dict of product to the USD amount bought every cycle
+        :param frequency: One of the keys of FREQUENCY_TO_DAYS
+        :param start_date: datetime of the first purchase
+        :param end_date: datetime after which no purchases are made; defaults to, and is truncated at, the last
+            candle
+        :return: Dict of product to BacktestResult
+        """
+
+        results = {}
+
+        for product, amount in orders.items():
+            candles = self.get_candles(product)
+            purchase_times = get_purchase_times(start_date, frequency, self.get_end_date(product, end_date))
+            indices = candles.get_purchase_indices(purchase_times)
+
+            # Dollars spent and units bought in each candle, summed up to every candle
+            spent = np.bincount(indices, minlength=len(candles)) * float(amount)
+            bought = np.bincount(
+                indices, weights=float(amount) / (1 + self.fee_rate) / candles.opens[indices], minlength=len(candles)
+            )
+            invested = np.cumsum(spent)
+            units = np.cumsum(bought)
+
+            results[product] = BacktestResult(
+                product=product,
+                times=candles.times,
+                invested=invested,
+                fees=invested * (self.fee_rate / (1 + self.fee_rate)),
+                units=units,
+                value=units * candles.closes,
+            )
+
+        return results
+
+    def sweep(self, product, frequencies, amounts, start_dates, end_date=None):
+        """
+        Simulates every combination of frequency, amount and start date for one product and returns the totals
+        at the end. Units are proportional to the amount, so each schedule is replayed once for a dollar and
+        scaled to every amount by broadcasting.
+
+        :param product: The cryptocurrency as a string
+        :param frequencies: List of keys of FREQUENCY_TO_DAYS
+        :param amounts: List of USD amounts bought every cycle
+        :param start_dates: List of datetimes of the first purchase
+        :param end_date: datetime after which no purchases are made; defaults to, and is truncated at, the last
+            candle
+        :return: Dict of equally long arrays, one entry per combination: "frequency", "start_date", "amount",
+            "invested", "fees", "units", "value", "pnl" and "average_cost"
+        """
+
+        candles = self.get_candles(product)
+        end_date = self.get_end_date(product, end_date)
+        amounts = np.asarray(amounts, dtype=np.float64)
+
+        schedules = [(frequency, start_date) for frequency in frequencies for start_date in start_dates]
+        purchases = np.empty(len(schedules))
+        units_per_dollar = np.empty(len(schedules))
+
+        for i, (frequency, start_date) in enumerate(schedules):
+            indices = candles.get_purchase_indices(get_purchase_times(start_date, frequency, end_date))
+            purchases[i] = len(indices)
+            units_per_dollar[i] = np.sum(1 / candles.opens[indices]) / (1 + self.fee_rate)
+
+        # Rows are schedules and columns are amounts
+        invested = purchases[:, None] * amounts[None, :]
+        units = units_per_dollar[:, None] * amounts[None, :]
+        value = units * candles.closes[-1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_cost = np.where(units > 0, invested / units, np.nan)
+
+        return {
+            "frequency": np.repeat([frequency for frequency, _ in schedules], len(amounts)),
+            "start_date": np.repeat([start_date for _, start_date in schedules], len(amounts)),
+            "amount": np.tile(amounts, len(schedules)),
+            "invested": invested.ravel(),
+            "fees": invested.ravel() * (self.fee_rate / (1 + self.fee_rate)),
+            "units": units.ravel(),
+            "value": value.ravel(),
+            "pnl": (value - invested).ravel(),
+            "average_cost": average_cost.ravel(),
+        }
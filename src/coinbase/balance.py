@@ -0,0 +1,99 @@
+import threading
+
+# Name of the wallet USD is held in; other USD wallets are not used for deposits or orders
+USD_WALLET_NAME = "Cash (USD)"
+
+
+def is_usd_wallet(wallet):
+    """
+    Checks if a wallet returned by coinbase-accounts is the user's USD cash wallet.
+
+    :param wallet: Dict of the wallet's "name", "currency" and "balance"
+    :return: True if it is the USD wallet; False otherwise
+    """
+
+    return wallet["name"] == USD_WALLET_NAME and wallet["currency"] == "USD"
+
+
+class BalanceSnapshot:
+    """
+    Balances of the user's Coinbase wallets at one point in time, indexed by currency.
+
+    Orders reserve funds against the snapshot as they are planned, so a whole purchase cycle can be checked
+    against a single coinbase-accounts request.
+    """
+
+    def __init__(self, wallets):
+        self._balances = {}
+        self._reserved = {}
+        self._lock = threading.Lock()
+
+        for wallet in wallets:
+            # USD is taken from the same wallet as the USD wallet ID; other currencies keep their first wallet
+            if wallet["currency"] == "USD" and not is_usd_wallet(wallet):
+                continue
+
+            self._balances.setdefault(wallet["currency"], float(wallet["balance"]))
+
+    def get_balance(self, currency="USD"):
+        """
+        Returns the balance of a currency when the snapshot was taken.
+
+        :param currency: Currency code as a string
+        :return: float
+        """
+
+        return self._balances.get(currency, 0.0)
+
+    def get_available(self, currency="USD"):
+        """
+        Returns the balance of a currency that has not been reserved yet.
+
+        :param currency: Currency code as a string
+        :return: float
+        """
+
+        with self._lock:
+            return self.get_balance(currency) - self._reserved.get(currency, 0.0)
+
+    def covers(self, amount, currency="USD"):
+        """
+        Checks if the unreserved balance covers an amount.
+
+        :param amount: The amount to check
+        :param currency: Currency code as a string
+        :return: True if the amount is available; False otherwise
+        """
+
+        if not isinstance(amount, (int, float)):
+            raise TypeError("ERROR: amount must be of type int or float")
+
+        if amount <= 0:
+            raise ValueError("ERROR: amount must be a positive number")
+
+        return self.get_available(currency) >= amount
+
+    def reserve(self, amount, currency="USD"):
+        """
+        Reserves an amount for an order if enough of the balance is still unreserved.
+
+        :param amount: The amount to reserve
+        :param currency: Currency code as a string
+        :return: True if the amount was reserved; False if funds are insufficient
+        """
+
+        if not isinstance(amount, (int, float)):
+            raise TypeError("ERROR: amount must be of type int or float")
+
+        if amount <= 0:
+            raise ValueError("ERROR: amount must be a positive number")
+
+        with self._lock:
+            reserved = self._reserved.get(currency, 0.0)
+
+            if self.get_balance(currency) - reserved < amount:
+                return False
+
+            self._reserved[currency] = reserved + amount
+
+        return True
@@ -0,0 +1,132 @@
+import os
+import threading
+from time import time
+
+from src.coinbase.utilities import atomic_write_json, read_json
+
+ONE_DAY_SECONDS = 24 * 60 * 60
+
+# Seconds each cached lookup stays fresh. Account metadata rarely changes, so a day is plenty.
+DEFAULT_TTLS = {
+    "payment_method": ONE_DAY_SECONDS,
+    "usd_wallet_id": ONE_DAY_SECONDS,
+    "profile": ONE_DAY_SECONDS,
+}
+DEFAULT_TTL = 60 * 60
+
+
+class MetadataCache:
+    """
+    Key-value cache with a per-key time to live, used for account metadata that rarely changes.
+
+    If a path is given, entries are persisted there as JSON so they survive restarts.
+    """
+
+    def __init__(self, ttls=None, default_ttl=DEFAULT_TTL, path=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, key):
+        """
+        Returns the cached value for key.
+
+        :param key: str
+        :return: The value, or None if the key is missing or expired
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time():
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """
+        Caches a value.
+
+        :param key: str
+        :param value: Any JSON-serializable value
+        :param ttl: Seconds until the value expires; defaults to the key's configured TTL
+        :return: None
+        """
+
+        if ttl is None:
+            ttl = self.ttls.get(key, self.default_ttl)
+
+        with self._lock:
+            self._entries[key] = (time() + ttl, value)
+
+        if self.path is not None:
+            self.save()
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Returns the cached value for key, calling fetch() and caching its result on a miss.
+
+        :param key: str
+        :param fetch: Callable taking no arguments
+        :return: The cached or fetched value
+        """
+
+        value = self.get(key)
+
+        if value is None:
+            value = fetch()
+            self.set(key, value)
+
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drops a cached value.
+
+        :param key: The key to drop; None drops every key
+        :return: None
+        """
+
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+        if self.path is not None:
+            self.save()
+
+    def get_stats(self):
+        """Returns the hit and miss counters as a dict."""
+
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def save(self):
+        """Writes unexpired entries to self.path."""
+
+        now = time()
+
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+
+        atomic_write_json(self.path, entries)
+
+    def load(self):
+        """Reads entries from self.path, skipping any that have expired."""
+
+        entries = read_json(self.path, default={})
+
+        now = time()
+
+        with self._lock:
+            self._entries = {key: tuple(entry) for key, entry in entries.items() if entry[0] > now}
@@ -0,0 +1,220 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+import numpy as np
+
+from src.coinbase.backtest import CANDLE_COLUMNS, Candles
+from src.coinbase.utilities import atomic_write_json, read_json
+
+CANDLES_DIRECTORY = os.getcwd() + "/candles"
+
+# Candle sizes in seconds accepted by the candles endpoint, and the most candles it returns per request
+CANDLE_GRANULARITIES = (60, 300, 900, 3600, 21600, 86400)
+MAX_CANDLES_PER_REQUEST = 300
+
+DEFAULT_MAX_WORKERS = 4
+
+# One fixed-size record per candle, so a file of them can be memory-mapped as an array
+CANDLE_DTYPE = np.dtype([("time", "<i8")] + [(column, "<f8") for column in CANDLE_COLUMNS[1:]])
+
+
+class CandleStore:
+    """
+    Local copy of historic candles, kept as one append-only file of CANDLE_DTYPE records per product and
+    granularity, sorted by time. The time column is the index: a range query is a binary search and a zero-copy
+    slice of the memory-mapped file.
+
+    The range already fetched is recorded next to each file, so quiet periods without candles are not fetched
+    again. Missing ranges are fetched in chunks of up to MAX_CANDLES_PER_REQUEST candles, in parallel.
+    """
+
+    def __init__(self, directory=CANDLES_DIRECTORY, coinbase=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        :param directory: Directory the candle files are kept in; created when the first candles are stored
+        :param coinbase: CoinbaseProHandler to fetch missing candles with; without one the store is read-only
+        :param max_workers: Number of chunks fetched at once
+        """
+
+        self.directory = directory
+        self.coinbase = coinbase
+        self.max_workers = max_workers
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def check_granularity(granularity):
+        """Raises a ValueError unless the candles endpoint supports the granularity."""
+
+        if granularity not in CANDLE_GRANULARITIES:
+            raise ValueError(f"ERROR: granularity must be one of {', '.join(map(str, CANDLE_GRANULARITIES))}")
+
+    def get_filepath(self, product, granularity):
+        """Returns the path of the candle file of a product and granularity."""
+
+        return os.path.join(self.directory, f"{product}-{granularity}.candles")
+
+    def get_coverage(self, product, granularity):
+        """
+        Returns the range of candle times that has been fetched.
+
+        :return: Tuple of the first and last time in seconds since the epoch, or None if nothing was fetched
+        """
+
+        coverage = read_json(self.get_filepath(product, granularity) + ".json")
+
+        if coverage is None:
+            return None
+
+        return coverage["start"], coverage["end"]
+
+    def read(self, product, granularity, start=None, end=None):
+        """
+        Returns the stored candles in a range without copying them.
+
+        :param product: The cryptocurrency as a string
+        :param granularity: Candle size in seconds
+        :param start: Optional seconds since the epoch of the first candle
+        :param end: Optional seconds since the epoch of the last candle
+        :return: Read-only array of CANDLE_DTYPE records
+        """
+
+        filepath = self.get_filepath(product, granularity)
+
+        # Mapped under the lock so that a half-written append is never seen
+        with self._get_lock(product, granularity):
+            if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+                return np.empty(0, dtype=CANDLE_DTYPE)
+
+            candles = np.memmap(filepath, dtype=CANDLE_DTYPE, mode="r")
+
+        times = candles["time"]
+        first = 0 if start is None else np.searchsorted(times, start, side="left")
+        last = len(candles) if end is None else np.searchsorted(times, end, side="right")
+
+        return candles[first:last]
+
+    def get_missing_ranges(self, product, granularity, start, end):
+        """
+        Returns the parts of a range that have not been fetched. Only the ends of the stored range can be missing.
+
+        :return: List of (start, end) tuples aligned to the granularity
+        """
+
+        coverage = self.get_coverage(product, granularity)
+
+        if coverage is None:
+            ranges = [(start, end)]
+
+        else:
+            ranges = [(start, min(end, coverage[0] - granularity)), (max(start, coverage[1] + granularity), end)]
+
+        return [(range_start, range_end) for range_start, range_end in ranges if range_start <= range_end]
+
+    def fetch(self, product, granularity, start, end):
+        """
+        Fetches the candles of a range from the exchange in parallel chunks.
+
+        :return: Array of CANDLE_DTYPE records sorted by time
+        """
+
+        if self.coinbase is None:
+            raise RuntimeError("ERROR: No Coinbase Pro handler to fetch candles with")
+
+        step = MAX_CANDLES_PER_REQUEST * granularity
+        chunks = [
+            (chunk_start, min(chunk_start + step - granularity, end)) for chunk_start in range(start, end + 1, step)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = list(
+                executor.map(lambda chunk: self.coinbase.get_candles(product, chunk[0], chunk[1], granularity), chunks)
+            )
+
+        rows = [tuple(row) for page in pages for row in page if start <= row[0] <= end]
+        candles = np.array(rows, dtype=CANDLE_DTYPE)
+        _, first_indices = np.unique(candles["time"], return_index=True)
+
+        return candles[first_indices]
+
+    def update(self, product, granularity, start, end):
+        """
+        Fetches the candles of a range that are not stored yet. Candles after the range already stored are
+        appended; candles before it are merged in by rewriting the file. Candles that have not closed yet are
+        left for a later update.
+
+        :param product: The cryptocurrency as a string
+        :param granularity: Candle size in seconds
+        :param start: Seconds since the epoch of the first candle
+        :param end: Seconds since the epoch of the last candle
+        :return: Number of candles added
+        """
+
+        self.check_granularity(granularity)
+
+        start = start - start % granularity
+        end = min(end - end % granularity, int(time()) // granularity * granularity - granularity)
+
+        with self._get_lock(product, granularity):
+            added = 0
+
+            for missing_start, missing_end in self.get_missing_ranges(product, granularity, start, end):
+                candles = self.fetch(product, granularity, missing_start, missing_end)
+                coverage = self.get_coverage(product, granularity)
+                os.makedirs(self.directory, exist_ok=True)
+
+                if coverage is not None and missing_end < coverage[0]:
+                    self._prepend(product, granularity, candles)
+                    coverage = (missing_start, coverage[1])
+
+                else:
+                    self._append(product, granularity, candles)
+                    coverage = (coverage or (missing_start,))[0], missing_end
+
+                self._save_coverage(product, granularity, coverage)
+                added += len(candles)
+
+        return added
+
+    def get_candles(self, product, granularity, start, end):
+        """
+        Updates a range and returns it as Candles for a Backtest.
+
+        :param product: The cryptocurrency as a string
+        :param granularity: Candle size in seconds
+        :param start: Seconds since the epoch of the first candle
+        :param end: Seconds since the epoch of the last candle
+        :return: Candles
+        """
+
+        if self.coinbase is not None:
+            self.update(product, granularity, start, end)
+
+        candles = self.read(product, granularity, start, end)
+
+        return Candles(candles["time"], candles["open"], candles["close"])
+
+    def _get_lock(self, product, granularity):
+        with self._lock:
+            return self._locks.setdefault((product, granularity), threading.Lock())
+
+    def _append(self, product, granularity, candles):
+        with open(self.get_filepath(product, granularity), "ab") as candle_file:
+            candle_file.write(candles.tobytes())
+
+    def _prepend(self, product, granularity, candles):
+        # Readers keep their mapping of the old file, which is replaced rather than written over
+        filepath = self.get_filepath(product, granularity)
+        stored = np.fromfile(filepath, dtype=CANDLE_DTYPE)
+
+        with open(filepath + ".tmp", "wb") as candle_file:
+            candle_file.write(candles.tobytes())
+            candle_file.write(stored.tobytes())
+
+        os.replace(filepath + ".tmp", filepath)
+
+    def _save_coverage(self, product, granularity, coverage):
+        atomic_write_json(
+            self.get_filepath(product, granularity) + ".json", {"start": int(coverage[0]), "end": int(coverage[1])}
+        )
@@ -1,17 +1,25 @@
 import base64
+import contextvars
 import hashlib
 import hmac
-import json
-import smtplib
-from datetime import datetime, timedelta
-from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
 from time import sleep, time
 
 import requests
 from requests.auth import AuthBase
 
+from src.coinbase.fills import FILLS_PAGE_LIMIT, FillsQuery
 from src.coinbase.frequency import FREQUENCY_TO_DAYS
-from src.coinbase.utilities import EmailCredentials
+from src.coinbase.metrics import ERRORS, SCHEDULER_LAG, USD_DEPLOYED, instrumented
+from src.coinbase.outbox import NotificationOutbox
+from src.coinbase.protocol import ORDER_POLL_TIMEOUT, CoinbaseProProtocol
+from src.coinbase.purchase_schedule import PurchaseSchedule
+from src.coinbase.retry import make_client_oid
+from src.coinbase.scheduler import DeadlineScheduler
+from src.coinbase.session import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, create_session
+from src.coinbase.tracing import trace, traced, tracer
 
 COINBASE_API_URL = "https://api.pro.coinbase.com/"
 
@@ -23,48 +31,151 @@ class CoinbaseExchangeAuth(AuthBase):
         self.secret_key = secret_key
         self.passphrase = passphrase
 
-    def __call__(self, request):
+    @trace("sign")
+    def get_auth_headers(self, method, path_url, body=None):
+        """
+        Signs a request and returns the Coinbase authentication headers.
+
+        :param method: HTTP method as a string
+        :param path_url: Request path including the query string
+        :param body: Request body as a string, if any
+        :return: Dict of headers
+        """
+
         timestamp = str(time())
-        message = timestamp + request.method + request.path_url + (request.body or "")
+        message = timestamp + method + path_url + (body or "")
         hmac_key = base64.b64decode(self.secret_key)
         signature = hmac.new(hmac_key, message.encode(), hashlib.sha256)
         signature_b64 = base64.b64encode(signature.digest()).decode()
 
-        request.headers.update(
-            {
-                "CB-ACCESS-SIGN": signature_b64,
-                "CB-ACCESS-TIMESTAMP": timestamp,
-                "CB-ACCESS-KEY": self.api_key,
-                "CB-ACCESS-PASSPHRASE": self.passphrase,
-                "Content-Type": "application/json",
-            }
-        )
+        return {
+            "CB-ACCESS-SIGN": signature_b64,
+            "CB-ACCESS-TIMESTAMP": timestamp,
+            "CB-ACCESS-KEY": self.api_key,
+            "CB-ACCESS-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json",
+        }
+
+    def __call__(self, request):
+        request.headers.update(self.get_auth_headers(request.method, request.path_url, request.body))
 
         return request
 
 
 # Create custom handler for placing orders
-class CoinbaseProHandler:
-    def __init__(self, api_url, auth):
-        self.api_url = api_url
-        self.auth = auth
-        self.email = EmailCredentials()
+@traced
+@instrumented
+class CoinbaseProHandler(CoinbaseProProtocol):
+    """Runs the operations of CoinbaseProProtocol over a pooled requests.Session, blocking the calling thread."""
+
+    connection_errors = (requests.ConnectionError, requests.Timeout)
+
+    def __init__(
+        self,
+        api_url,
+        auth,
+        session=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        ledger=None,
+        rate_limiter=None,
+        retry_policy=None,
+    ):
+        super().__init__(
+            api_url,
+            auth,
+            timeout=timeout,
+            cache=cache,
+            ledger=ledger,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+        )
+        self.session = session or create_session(pool_size)
+
+    def _run(self, operation):
+        """
+        Runs an operation, making each call it yields and sending back the result or throwing back the error.
+
+        :param operation: Generator returned by one of the CoinbaseProProtocol operations
+        :return: The operation's return value
+        """
+
+        result, error = None, None
+
+        while True:
+            try:
+                step = operation.send(result) if error is None else operation.throw(error)
+
+            except StopIteration as stop:
+                return stop.value
+
+            try:
+                result, error = getattr(self, step.method)(*step.args, **step.kwargs), None
+
+            except Exception as e:
+                result, error = None, e
+
+    def _acquire(self, endpoint):
+        return self.rate_limiter.acquire(endpoint)
+
+    def _transmit(self, method, endpoint, params=None, data=None):
+        return self.session.request(
+            method, self.api_url + endpoint, params=params, data=data, auth=self.auth, timeout=self.timeout
+        )
+
+    def _sleep(self, seconds):
+        sleep(seconds)
+
+    def _request(self, method, endpoint, params=None, data=None, retry=None):
+        """
+        Sends an authenticated request, retrying connection errors, timeouts and server errors with backoff.
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to api_url
+        :param params: Optional dict of query parameters
+        :param data: Optional request body as a string
+        :param retry: True to retry failures; defaults to True for GET requests only
+        :return: requests.Response
+        """
+
+        return self._run(self._request_operation(method, endpoint, params, data, retry))
+
+    def get_connection_stats(self):
+        """
+        Returns connection reuse statistics for the handler's session.
+
+        :return: Dict of connection and request counts; see PooledHTTPAdapter.get_connection_stats()
+        """
+
+        return self.session.get_adapter(self.api_url).get_connection_stats()
 
     def get_payment_method(self):
         """
-        Retrieves the user's bank from Coinbase Pro profile.
+        Retrieves the user's bank from Coinbase Pro profile. The result is cached.
 
         :return: The user's bank ID as a string
         """
 
-        response = requests.get(self.api_url + "payment-methods", auth=self.auth)
+        return self._run(self._get_or_fetch("payment_method", self._fetch_payment_method))
 
-        if response.status_code != 200:
-            raise RuntimeError(f"ERROR: Could not find payment method: {response.content}")
+    def get_usd_wallet_id(self):
+        """
+        Retrieves the ID of the user's USD wallet. The result is cached.
+
+        :return: The wallet ID as a string
+        """
 
-        print("SUCCESS: Retrieved payment method")
+        return self._run(self._get_or_fetch("usd_wallet_id", self._fetch_usd_wallet_id))
 
-        return response.json()[0]["id"]
+    def get_profile(self):
+        """
+        Retrieves the user's default Coinbase Pro profile. The result is cached.
+
+        :return: The profile as a dict
+        """
+
+        return self._run(self._get_or_fetch("profile", self._fetch_profile))
 
     def deposit_from_bank(self, amount):
         """
@@ -74,29 +185,16 @@ class CoinbaseProHandler:
         :return: True if deposit is successful
         """
 
-        if not isinstance(amount, (int, float)):
-            raise TypeError("ERROR: amount must be of type int or float")
+        return self._run(self._deposit_from_bank(amount))
 
-        if amount <= 0:
-            raise ValueError("ERROR: amount must be a positive number")
-
-        deposit_request = {
-            "amount": amount,
-            "currency": "USD",
-            "payment_method_id": self.get_payment_method(),
-        }
-
-        response = requests.post(
-            self.api_url + "deposits/payment-method",
-            data=json.dumps(deposit_request),
-            auth=self.auth,
-        )
+    def get_balance_snapshot(self):
+        """
+        Retrieves the balances of all of the user's Coinbase wallets in one request.
 
-        if response.status_code != 200:
-            raise RuntimeError(f"ERROR: Could not make deposit to Coinbase Pro account: {response.content}")
+        :return: BalanceSnapshot indexed by currency
+        """
 
-        print(f"SUCCESS: Deposited ${amount:.2f} to Coinbase Pro account.")
-        return True
+        return self._run(self._get_balance_snapshot())
 
     def are_sufficient_funds_available(self, amount):
         """
@@ -106,118 +204,125 @@ class CoinbaseProHandler:
         :return: True if user has enough USD for the order; False otherwise
         """
 
-        if not isinstance(amount, (int, float)):
-            raise TypeError("ERROR: amount must be of type int or float")
+        return self._run(self._are_sufficient_funds_available(amount))
 
-        if amount <= 0:
-            raise ValueError("ERROR: amount must be a positive number")
-
-        response = requests.get(self.api_url + "coinbase-accounts", auth=self.auth)
-
-        if response.status_code != 200:
-            raise RuntimeError(f"ERROR: are_sufficient_funds_available() reported a failure")
-
-        coinbase_wallets = response.json()
+    def place_market_order(self, product, amount, client_oid=None):
+        """
+        Places a market order for specified product with a specified amount of USD.
 
-        available_balance = 0.0
+        With a client_oid, an order whose response is lost or answered with a server error is looked up by its
+        client_oid and is only sent again if the exchange never received it, so a retry cannot buy twice.
 
-        for wallet in coinbase_wallets:
-            if wallet["name"] == "Cash (USD)" and wallet["currency"] == "USD":
-                available_balance = float(wallet["balance"])
-                break
+        :param product: The cryptocurrency to purchase as a string
+        :param amount: The amount of USD to make a purchase with
+        :param client_oid: Optional UUID string identifying the order; see make_client_oid()
+        :return: The order ID if the market order is successfully executed
+        """
 
-        return available_balance >= amount
+        return self._run(self._place_market_order(product, amount, client_oid))
 
-    def place_market_order(self, product, amount):
+    def submit_market_order(self, market_order):
         """
-        Places a market order for specified product with a specified amount of USD.
+        Sends a market order, retrying it with backoff if it has a client_oid and the exchange did not receive it.
 
-        :param product: The cryptocurrency to purchase as a string
-        :param amount: The amount of USD to make a purchase with
-        :return: True if the market order is successfully executed
+        :param market_order: Dict returned by build_market_order()
+        :return: The order ID
         """
 
-        if not isinstance(product, str):
-            raise TypeError("ERROR: product must be of type str")
+        return self._run(self._submit_market_order(market_order))
 
-        if not isinstance(amount, (int, float)):
-            raise TypeError("ERROR: amount must be of type int or float")
+    def find_order_by_client_oid(self, client_oid):
+        """
+        Looks up an order by the client_oid it was placed with.
 
-        if not product:
-            raise ValueError("ERROR: product cannot be null")
+        :param client_oid: UUID string
+        :return: The order as a dict, or None if the exchange has no such order
+        """
 
-        if amount <= 0:
-            raise ValueError("ERROR: amount must be a positive number")
+        return self._run(self._find_order_by_client_oid(client_oid))
 
-        market_order = {
-            "type": "market",
-            "side": "buy",
-            "product_id": product + "-USD",
-            "funds": amount,
-        }
+    def get_order(self, order_id):
+        """
+        Retrieves the current state of an order.
 
-        response = requests.post(self.api_url + "orders", data=json.dumps(market_order), auth=self.auth)
+        :param order_id: The order ID returned by place_market_order()
+        :return: The order as a dict
+        """
 
-        if response.status_code != 200:
-            raise RuntimeError(f"Could not place market order: {response.content}")
+        return self._run(self._get_order(order_id))
 
-        print(f"SUCCESS: Made a market order for ${amount:.2f} of {product}")
+    def wait_for_order(self, order_id, timeout=ORDER_POLL_TIMEOUT):
+        """
+        Polls an order with exponential backoff until it is done or the timeout passes.
 
-        # Sleep for 15 seconds to ensure Coinbase API updates
-        sleep(15)
+        :param order_id: The order ID returned by place_market_order()
+        :param timeout: Maximum number of seconds to wait
+        :return: The last retrieved state of the order as a dict
+        """
 
-        return True
+        return self._run(self._wait_for_order(order_id, timeout))
 
-    def get_transaction_details(self, product, start_date):
+    def get_transaction_details(self, product, start_date, order_id=None):
         """
         Retrieves the JSON response of the transaction details.
 
         :param product: The cryptocurrency to get transaction details of as a string
         :param start_date: String in "yyyy-mm-dd" format
+        :param order_id: Optional order ID; if given, the details are summed over all fills of that order
         :return: Extracted details from the retrieved JSON as a dict
         """
 
-        if not isinstance(product, str):
-            raise TypeError("ERROR: product must be of type str")
+        return self._run(self._get_transaction_details(product, start_date, order_id))
 
-        if not isinstance(start_date, str):
-            raise TypeError("ERROR: start_date must be of type str")
-
-        if not product:
-            raise ValueError("ERROR: product cannot be null")
+    def iter_fills(
+        self, product=None, order_id=None, start_date=None, end_date=None, before=None, limit=FILLS_PAGE_LIMIT
+    ):
+        """
+        Lazily yields every fill matching the filters, following the CB-AFTER (older) or CB-BEFORE (newer)
+        pagination cursors.
+
+        Only one page is held in memory and the next page is requested only once the caller has consumed the
+        current one, so arbitrarily long histories can be walked in constant memory.
+
+        :param product: Optional cryptocurrency to filter by as a string
+        :param order_id: Optional order ID to filter by
+        :param start_date: Optional string in "yyyy-mm-dd" format
+        :param end_date: Optional string in "yyyy-mm-dd" format
+        :param before: Optional cursor (trade ID); if given, walks towards newer fills than the cursor
+        :param limit: Number of fills requested per page
+        :return: Generator of Fill records
+        """
 
-        if not start_date:
-            raise ValueError("ERROR: start_date cannot be null")
+        query = FillsQuery(product, order_id, start_date, end_date, before, limit)
 
-        # Raises a ValueError if start_date is not in the right format
-        datetime.strptime(start_date, "%Y-%m-%d")
+        while not query.done:
+            yield from query.read_page(self._request("GET", "fills", params=query.parameters))
 
-        fill_parameters = {"product_id": product + "-USD", "start_date": start_date}
+    def sync_fills(self, product):
+        """
+        Stores fills for a product that are newer than the ledger's cursor.
 
-        response = requests.get(self.api_url + "fills", params=fill_parameters, auth=self.auth)
+        :param product: The cryptocurrency to sync as a string
+        :return: Number of new fills stored
+        """
 
-        if response.status_code != 200:
-            raise RuntimeError("ERROR: Could not find transaction details")
+        if self.ledger is None:
+            raise RuntimeError("ERROR: No ledger configured")
 
-        # Parse the JSON response
-        transaction = response.json()[0]
+        return self.ledger.sync_fills(self, product)
 
-        coinbase_fee = round(float(transaction["fee"]), 2)
-        amount_invested = round(float(transaction["usd_volume"]), 2)
-        purchase_price = round(float(transaction["price"]), 2)
-        purchase_amount = transaction["size"]
+    def get_candles(self, product, start, end, granularity):
+        """
+        Retrieves historic candles of a product. The exchange returns at most 300 candles per request.
 
-        parsed_transaction = {
-            "product": product,
-            "start_date": start_date,
-            "coinbase_fee": "%.2f" % coinbase_fee,
-            "amount_invested": "%.2f" % amount_invested,
-            "purchase_price": "%.2f" % purchase_price,
-            "purchase_amount": purchase_amount,
-            "total_amount": "%.2f" % (coinbase_fee + amount_invested),
-        }
+        :param product: The cryptocurrency as a string
+        :param start: Seconds since the epoch of the first candle
+        :param end: Seconds since the epoch of the last candle
+        :param granularity: Candle size in seconds
+        :return: List of [time, low, high, open, close, volume], newest first
+        """
 
-        return parsed_transaction
+        return self._run(self._get_candles(product, start, end, granularity))
 
     def send_email_confirmation(self, transaction_details):
         """
@@ -227,55 +332,193 @@ class CoinbaseProHandler:
         :return: True if the email is sent successfully; False otherwise
         """
 
-        if not isinstance(transaction_details, dict):
-            raise TypeError("ERROR: transaction_details must be of type dict")
+        return self.notifier.send_email_confirmation(transaction_details)
+
+    def send_email_confirmations(self, transaction_details_list, digest=False, on_sent=None):
+        """
+        Sends the confirmations of a whole purchase cycle over a single SMTP session.
+
+        :param transaction_details_list: List of dicts containing transaction details
+        :param digest: If True, combines every transaction into one email
+        :param on_sent: Optional callable given the index of each email as soon as it is sent
+        :return: Number of emails sent
+        """
 
-        if not transaction_details:
-            raise ValueError("ERROR: transaction_details cannot be null")
+        return self.notifier.send_email_confirmations(transaction_details_list, digest=digest, on_sent=on_sent)
 
-        product = transaction_details["product"]
-        start_date = transaction_details["start_date"]
-        coinbase_fee = transaction_details["coinbase_fee"]
-        amount_invested = transaction_details["amount_invested"]
-        purchase_price = transaction_details["purchase_price"]
-        purchase_amount = transaction_details["purchase_amount"]
-        total_amount = transaction_details["total_amount"]
 
-        msg = EmailMessage()
-        msg["Subject"] = f"Your Purchase of ${total_amount} of {product} Was Successful!"
-        msg["From"] = self.email.email_address
-        msg["To"] = self.email.email_address
+class CoinbaseBot:
+    handler_class = CoinbaseProHandler
+
+    def __init__(
+        self,
+        api_url,
+        auth,
+        frequency,
+        start_date,
+        start_time,
+        orders={},
+        scheduler=None,
+        session=None,
+        max_workers=1,
+        ledger=None,
+        email_digest=False,
+        outbox_path=None,
+        name=None,
+        rate_limiter=None,
+    ):
+        self._setup(
+            api_url,
+            auth,
+            frequency,
+            start_date,
+            start_time,
+            orders,
+            session,
+            max_workers,
+            ledger,
+            email_digest,
+            outbox_path,
+            name,
+            rate_limiter,
+        )
+        self.scheduler = DeadlineScheduler(error_handler=self.handle_cycle_error) if scheduler is None else scheduler
+
+    def _setup(
+        self,
+        api_url,
+        auth,
+        frequency,
+        start_date,
+        start_time,
+        orders,
+        session,
+        max_workers,
+        ledger,
+        email_digest,
+        outbox_path,
+        name,
+        rate_limiter,
+    ):
+        """Sets up everything but the scheduler, which only CoinbaseBot runs its cycles on."""
+
+        if not isinstance(max_workers, int):
+            raise TypeError("ERROR: max_workers must be of type int")
+
+        if max_workers <= 0:
+            raise ValueError("ERROR: max_workers must be a positive number")
+
+        self.coinbase = self.handler_class(
+            api_url,
+            auth,
+            session=session,
+            pool_size=max(DEFAULT_POOL_SIZE, max_workers),
+            ledger=ledger,
+            rate_limiter=rate_limiter,
+        )
+        self.max_workers = max_workers
+        self.name = name
+        self.email_digest = email_digest
+        self.outbox = None if outbox_path is None else NotificationOutbox(self.deliver_email_confirmations, outbox_path)
+        self.schedules = [self.create_schedule(frequency, start_date, start_time, orders)]
+
+    # The first schedule's state is exposed directly for bots that only have one schedule
+    @property
+    def time_delta(self):
+        return self.schedules[0].time_delta
+
+    @time_delta.setter
+    def time_delta(self, time_delta):
+        self.schedules[0].time_delta = time_delta
+
+    @property
+    def next_deposit_date(self):
+        return self.schedules[0].next_deposit_date
+
+    @next_deposit_date.setter
+    def next_deposit_date(self, next_deposit_date):
+        self.schedules[0].next_deposit_date = next_deposit_date
+
+    @property
+    def next_purchase_date(self):
+        return self.schedules[0].next_purchase_date
+
+    @next_purchase_date.setter
+    def next_purchase_date(self, next_purchase_date):
+        self.schedules[0].next_purchase_date = next_purchase_date
+
+    @property
+    def orders(self):
+        return self.schedules[0].orders
+
+    @orders.setter
+    def orders(self, orders):
+        self.schedules[0].orders = orders
+
+    def add_schedule(self, frequency, start_date, start_time, orders, name=None):
+        """
+        Adds another cadence of purchases to the bot. Every schedule's deadlines share the bot's scheduler.
+
+        :param frequency: Valid values are "daily", "weekly", "biweekly", "monthly"
+        :param start_date: The date string in format YYYY-MM-DD
+        :param start_time: The time string in format HH:MM XM
+        :param orders: Dict of product to USD amount; amounts may be numbers or numeric strings
+        :param name: Optional unique name of the schedule; defaults to "schedule-<n>"
+        :return: The new PurchaseSchedule
+        """
 
-        content = f"Hello,\n\n You successfully placed your order! Please see below details:\n\n \
-            Amount Purchased: {purchase_amount} {product}\n \
-            Purchase Price: ${purchase_price}\n \
-            Total Amount: ${total_amount}\n \
-            Amount Invested: ${amount_invested}\n \
-            Coinbase Fees: ${coinbase_fee}\n \
-            Date: {start_date}"
+        if not isinstance(orders, dict):
+            raise TypeError("ERROR: orders must be of type dict")
 
-        msg.set_content(content)
+        if not orders:
+            raise ValueError("ERROR: orders cannot be null")
 
-        try:
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-                smtp.login(self.email.email_address, self.email.password)
-                smtp.send_message(msg)
-                return True
+        name = name or f"schedule-{len(self.schedules) + 1}"
 
-        # It's okay if email doesn't work
-        except smtplib.SMTPAuthenticationError:
-            print("WARNING: Email credentials are not valid")
+        if name in [schedule.name for schedule in self.schedules]:
+            raise ValueError(f"ERROR: Schedule {name} already exists")
 
-        return False
+        schedule = self.create_schedule(frequency, start_date, start_time, orders, name=name)
+        self.schedules.append(schedule)
 
+        return schedule
 
-class CoinbaseBot:
-    def __init__(self, api_url, auth, frequency, start_date, start_time, orders={}):
-        self.coinbase = CoinbaseProHandler(api_url, auth)
-        self.time_delta = FREQUENCY_TO_DAYS[frequency]
-        self.next_purchase_date = self.parse_to_datetime(start_date, start_time)
-        self.next_deposit_date = self.next_purchase_date + timedelta(minutes=-1)
-        self.orders = orders
+    def create_schedule(self, frequency, start_date, start_time, orders, name=None):
+        """
+        Builds a PurchaseSchedule. The bot's first schedule and every added one are built here.
+
+        :param frequency: Valid values are "daily", "weekly", "biweekly", "monthly"
+        :param start_date: The date string in format YYYY-MM-DD
+        :param start_time: The time string in format HH:MM XM
+        :param orders: Dict of product to USD amount; amounts may be numbers or numeric strings
+        :param name: Optional name of the schedule
+        :return: PurchaseSchedule
+        """
+
+        if not isinstance(frequency, str):
+            raise TypeError("ERROR: frequency must be of type str")
+
+        if frequency not in FREQUENCY_TO_DAYS:
+            raise ValueError("ERROR: invalid value for frequency")
+
+        return PurchaseSchedule(
+            FREQUENCY_TO_DAYS[frequency],
+            self.parse_to_datetime(start_date, start_time),
+            self.parse_orders(orders),
+            name=name,
+        )
+
+    @staticmethod
+    def parse_orders(orders):
+        """
+        Converts the USD amounts of orders to floats. Collected orders hold the amounts as they were typed, as
+        strings.
+
+        :param orders: Dict of product to USD amount; amounts may be numbers or numeric strings
+        :return: Dict of product to float
+        """
+
+        return {product: float(amount) for product, amount in orders.items()}
 
     def parse_to_datetime(self, date, time_):
         """
@@ -323,15 +566,15 @@ class CoinbaseBot:
 
         self.time_delta = FREQUENCY_TO_DAYS[new_frequency]
 
-    def update_deposit_date(self):
-        """Updates to the next deposit date."""
+    def update_deposit_date(self, schedule=None):
+        """Updates to the next deposit date of a schedule, by default the first."""
 
-        self.next_deposit_date += self.time_delta
+        (schedule or self.schedules[0]).update_deposit_date()
 
-    def update_purchase_date(self):
-        """Updates to the next purchase date."""
+    def update_purchase_date(self, schedule=None):
+        """Updates to the next purchase date of a schedule, by default the first."""
 
-        self.next_purchase_date += self.time_delta
+        (schedule or self.schedules[0]).update_purchase_date()
 
     def is_time_to_deposit(self):
         """Returns True if the current datetime is the deposit datetime."""
@@ -362,66 +605,503 @@ class CoinbaseBot:
         if not kwargs:
             return ValueError("ERROR: orders cannot be null")
 
-        # Clear current orders dict
-        self.orders = {}
+        self.orders = self.parse_orders(kwargs)
+
+    def get_event_name(self, event, schedule=None):
+        """
+        Returns the scheduler event name of one of the bot's cycles. Names are prefixed with the bot's name and
+        the schedule's name so several bots and schedules can share a scheduler.
+
+        :param event: "deposit" or "purchase"
+        :param schedule: PurchaseSchedule the cycle belongs to; defaults to the first schedule
+        :return: str
+        """
+
+        schedule = schedule or self.schedules[0]
+
+        return ":".join(part for part in (self.name, schedule.name, event) if part is not None)
+
+    def schedule_deposit(self, schedule):
+        """Arms the scheduler with the next deposit of a schedule."""
+
+        self.scheduler.schedule(
+            schedule.next_deposit_date,
+            partial(self.run_deposit_cycle, schedule),
+            name=self.get_event_name("deposit", schedule),
+        )
+
+    def schedule_purchase(self, schedule):
+        """Arms the scheduler with the next purchase of a schedule."""
+
+        self.scheduler.schedule(
+            schedule.next_purchase_date,
+            partial(self.run_purchase_cycle, schedule),
+            name=self.get_event_name("purchase", schedule),
+        )
+
+    def schedule_next_cycle(self):
+        """
+        Arms the scheduler with the next deposit and purchase dates of every schedule, replacing any pending
+        deadlines. All schedules share one timeline, so one thread serves every cadence.
+
+        :return: None
+        """
+
+        for schedule in self.schedules:
+            self.scheduler.cancel(self.get_event_name("deposit", schedule))
+            self.scheduler.cancel(self.get_event_name("purchase", schedule))
+            self.schedule_deposit(schedule)
+            self.schedule_purchase(schedule)
+
+    def get_client_oid(self, product, schedule=None):
+        """
+        Returns the client_oid of a product's order in a schedule's next purchase. Retries of the same purchase get
+        the same ID.
+
+        :param product: The cryptocurrency to purchase as a string
+        :param schedule: PurchaseSchedule the order belongs to; defaults to the first schedule
+        :return: UUID string
+        """
+
+        schedule = schedule or self.schedules[0]
+
+        return make_client_oid(self.get_event_name("purchase", schedule), product, schedule.next_purchase_date)
+
+    @staticmethod
+    def record_lag(cycle, scheduled_date):
+        """
+        Records how late a cycle started relative to its scheduled date.
+
+        :param cycle: "deposit" or "purchase"
+        :param scheduled_date: datetime the cycle was due
+        :return: None
+        """
+
+        SCHEDULER_LAG.observe(max((datetime.now() - scheduled_date).total_seconds(), 0.0), cycle=cycle)
+
+    def handle_cycle_error(self, event, error):
+        """
+        Reports a failed cycle and skips it, so the bot keeps running on its schedule.
+
+        :param event: The ScheduledEvent whose action raised
+        :param error: The exception raised
+        :return: None
+        """
+
+        print(f"ERROR: {event.name} cycle failed: {str(error)}")
+        ERRORS.inc(kind="cycle")
+        self.skip_failed_cycle(event)
+
+    def skip_failed_cycle(self, event):
+        """
+        Moves a schedule past a cycle that raised before it could schedule its successor.
+
+        :param event: The ScheduledEvent whose action raised
+        :return: True if the cycle was skipped; False if it had already been rescheduled
+        """
+
+        for schedule in self.schedules:
+            if event.name == self.get_event_name("deposit", schedule) and schedule.next_deposit_date == event.when:
+                schedule.update_deposit_date()
+                self.schedule_deposit(schedule)
+                return True
+
+            if event.name == self.get_event_name("purchase", schedule) and schedule.next_purchase_date == event.when:
+                schedule.update_purchase_date()
+                self.schedule_purchase(schedule)
+                return True
+
+        return False
+
+    @trace("deposit_cycle")
+    def run_deposit_cycle(self, schedule=None):
+        """
+        Deposits the sum of a schedule's orders and schedules its next deposit.
+
+        :param schedule: PurchaseSchedule to run; defaults to the first schedule
+        :return: None
+        """
+
+        schedule = self.start_cycle("deposit", schedule)
+        deposit_amount = sum(schedule.orders.values())
+        print(f"Depositing ${deposit_amount:.2f} into Coinbase Pro account. . .")
+
+        # deposit_from_bank() not supported in sandbox mode
+        if "sandbox" in self.coinbase.api_url:
+            print("WARNING: deposit_from_bank() is not supported in sandbox mode")
+
+        elif self.coinbase.get_balance_snapshot().covers(deposit_amount):
+            print(f"Cash balance already covers ${deposit_amount:.2f}; skipping deposit.")
+
+        else:
+            self.coinbase.deposit_from_bank(deposit_amount)
+
+        # Update to the next deposit date.
+        schedule.update_deposit_date()
+        self.schedule_deposit(schedule)
+
+    @trace("place_order")
+    def place_order(self, product, amount, schedule=None):
+        """
+        Places a single market order. Confirmations are emailed once the whole cycle has been placed.
+
+        With an outbox, transaction details are retrieved by the outbox's worker rather than here.
+
+        :param product: The cryptocurrency to purchase as a string
+        :param amount: The amount of USD to make a purchase with
+        :param schedule: PurchaseSchedule the order belongs to; defaults to the first schedule
+        :return: Dict with the "order_id" and the "transaction_details", which are None if not retrieved
+        """
+
+        print(f"Placing order for ${amount:.2f} of {product}. . .")
+
+        order_id = self.coinbase.place_market_order(product, amount, client_oid=self.get_client_oid(product, schedule))
+        USD_DEPLOYED.inc(amount, product=product)
+
+        if self.outbox is not None:
+            return {"order_id": order_id, "transaction_details": None}
+
+        # The order is placed once it has an id, so failing to look up its details does not fail the order
+        try:
+            purchase_date = self.get_purchase_date(schedule)
+            transaction_details = self.coinbase.get_transaction_details(product, purchase_date, order_id=order_id)
+            return {"order_id": order_id, "transaction_details": transaction_details}
+
+        except Exception as e:
+            return self.skip_transaction_details(product, order_id, e)
+
+    @staticmethod
+    def skip_transaction_details(product, order_id, error):
+        """
+        Reports a placed order whose transaction details could not be retrieved, so its email cannot be sent.
+
+        :param product: The cryptocurrency of the order as a string
+        :param order_id: Id of the placed order
+        :param error: The exception raised; an IndexError means the order has no fills yet
+        :return: The order's result for place_order(), without transaction details
+        """
+
+        print(f"ERROR: Email could not be sent for order {order_id} of {product}: {str(error) or type(error).__name__}")
+        ERRORS.inc(kind="email")
+
+        return {"order_id": order_id, "transaction_details": None}
+
+    def get_balance_snapshot(self):
+        """
+        Retrieves the balances used to plan a cycle's orders.
+
+        :return: BalanceSnapshot, or None in sandbox mode where coinbase-accounts is not supported
+        """
+
+        if "sandbox" in self.coinbase.api_url:
+            print("WARNING: are_sufficient_funds_available() not supported in sandbox mode")
+            return None
+
+        return self.coinbase.get_balance_snapshot()
+
+    @trace("place_orders")
+    def place_orders(self, schedule=None):
+        """
+        Places every order of a schedule, by default the first, through a pool of up to max_workers threads.
+
+        Balances are fetched once per cycle and each order reserves its amount before it is submitted. Orders the
+        remaining cash balance does not cover are skipped and logged, and the rest of the cycle is still placed.
+
+        :param schedule: PurchaseSchedule to place the orders of
+        :return: Dict of product to {"order_id": str or None, "transaction_details": dict or None,
+            "error": Exception or None}
+        """
+
+        schedule = schedule or self.schedules[0]
+        planned, results = self.plan_orders(schedule, self.get_balance_snapshot())
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for product, amount in planned.items():
+                # Each order runs in a copy of this context so that its spans belong to the cycle's trace
+                context = contextvars.copy_context()
+                futures[product] = executor.submit(context.run, self.place_order, product, amount, schedule)
+
+        for product, future in futures.items():
+            try:
+                results[product] = {**future.result(), "error": None}
+
+            except Exception as e:
+                results[product] = self.fail_order(product, e)
+
+        return {product: results[product] for product in schedule.orders}
+
+    def plan_orders(self, schedule, balances):
+        """
+        Reserves the amount of each of a schedule's orders in turn against the cycle's balances.
+
+        :param schedule: PurchaseSchedule to plan the orders of
+        :param balances: BalanceSnapshot, or None to place every order unchecked
+        :return: Tuple of the dict of product to amount of the orders to place, and the dict of results of the
+            skipped ones
+        """
+
+        planned = {}
+        results = {}
+
+        for product, amount in schedule.orders.items():
+            if balances is not None and not balances.reserve(amount):
+                results[product] = self.skip_order(product)
+                continue
+
+            planned[product] = amount
+
+        return planned, results
+
+    @staticmethod
+    def fail_order(product, error):
+        """
+        Reports an order that raised.
+
+        :param product: The cryptocurrency of the order as a string
+        :param error: The exception raised
+        :return: The order's result for place_orders()
+        """
+
+        print(f"ERROR: Order for {product} failed: {str(error)}")
+        ERRORS.inc(kind="order")
+
+        return {"order_id": None, "transaction_details": None, "error": error}
+
+    @staticmethod
+    def skip_order(product):
+        """
+        Reports an order that the cash balance left after the cycle's other orders does not cover.
+
+        :param product: The cryptocurrency of the order as a string
+        :return: The order's result for place_orders()
+        """
+
+        error = RuntimeError("User does not have sufficient funds for the current order")
+        print(f"WARNING: Skipped order for {product}: {str(error)}; the cycle's other orders are still placed")
+        ERRORS.inc(kind="order")
+
+        return {"order_id": None, "transaction_details": None, "error": error}
+
+    def collect_transaction_details(self, results):
+        """
+        Returns the transaction details of every order of a cycle that was placed successfully.
+
+        :param results: Dict returned by place_orders()
+        :return: List of dicts containing transaction details
+        """
+
+        return [result["transaction_details"] for result in results.values() if result["transaction_details"]]
+
+    def send_email_confirmations(self, results):
+        """
+        Emails the confirmations of a purchase cycle over one SMTP session, or as one digest if email_digest is set.
+
+        :param results: Dict returned by place_orders()
+        :return: Number of emails sent
+        """
+
+        transaction_details_list = self.collect_transaction_details(results)
+
+        if not transaction_details_list:
+            return 0
 
-        for product, amount in kwargs.items():
-            self.orders[product] = amount
+        sent = self.coinbase.send_email_confirmations(transaction_details_list, digest=self.email_digest)
+
+        if sent:
+            print("Email confirmation sent!")
+
+        return sent
+
+    def queue_email_confirmations(self, results, schedule=None):
+        """
+        Hands the successful orders of a purchase cycle to the outbox, which retrieves their transaction details
+        and emails them in the background.
+
+        :param results: Dict returned by place_orders()
+        :param schedule: PurchaseSchedule the orders belong to; defaults to the first schedule
+        :return: True if queued; False otherwise
+        """
+
+        purchase_date = self.get_purchase_date(schedule)
+        orders = [
+            {"product": product, "start_date": purchase_date, "order_id": result["order_id"]}
+            for product, result in results.items()
+            if result["order_id"]
+        ]
+
+        if not orders:
+            return False
+
+        return self.outbox.enqueue({"orders": orders, "digest": self.email_digest, "sent": []})
+
+    @staticmethod
+    def get_unsent_orders(notification):
+        """
+        :param notification: Dict with the "orders" of a cycle and the order IDs whose email was "sent"
+        :return: List of the notification's orders whose email has not been sent yet
+        """
+
+        sent = notification.get("sent", [])
+
+        return [order for order in notification["orders"] if order["order_id"] not in sent]
+
+    def record_sent(self, notification, orders):
+        """
+        Returns the on_sent callback of a delivery, which adds the orders of each email sent to the notification's
+        "sent" list and saves the outbox, so a retry only sends the emails that did not go out.
+
+        :param notification: Dict with the "orders" of a cycle and whether to send a "digest"
+        :param orders: The orders being emailed, in the order of their emails
+        :return: Callable taking the index of an email
+        """
+
+        def on_sent(index):
+            emailed = orders if notification["digest"] else [orders[index]]
+
+            # Replaced rather than appended to, so a concurrent save never sees the list change size
+            notification["sent"] = notification.get("sent", []) + [order["order_id"] for order in emailed]
+            self.outbox.save()
+
+        return on_sent
+
+    @staticmethod
+    def check_sent(notification, orders, sent):
+        """
+        Raises a RuntimeError, so the outbox retries the notification, unless every email of a delivery was sent.
+        Sending nothing because email credentials are missing or rejected counts as a failure.
+
+        :param notification: Dict with the "orders" of a cycle and whether to send a "digest"
+        :param orders: The orders that were emailed
+        :param sent: Number of emails sent
+        :return: None
+        """
+
+        expected = 1 if notification["digest"] else len(orders)
+
+        if sent < expected:
+            raise RuntimeError(f"ERROR: Only {sent} of {expected} email confirmations were sent")
+
+    @trace("deliver_email_confirmations")
+    def deliver_email_confirmations(self, notification):
+        """
+        Retrieves the transaction details of a queued notification and emails them. Called by the outbox's worker.
+
+        Orders whose email was sent by an earlier attempt are skipped, and the call raises unless every remaining
+        email is sent.
+
+        :param notification: Dict with the "orders" of a cycle and whether to send a "digest"
+        :return: Number of emails sent
+        """
+
+        orders = self.get_unsent_orders(notification)
+
+        if not orders:
+            return 0
+
+        transaction_details_list = [
+            self.coinbase.get_transaction_details(order["product"], order["start_date"], order_id=order["order_id"])
+            for order in orders
+        ]
+
+        sent = self.coinbase.send_email_confirmations(
+            transaction_details_list, digest=notification["digest"], on_sent=self.record_sent(notification, orders)
+        )
+        self.check_sent(notification, orders, sent)
+        print("Email confirmation sent!")
+
+        return sent
+
+    @trace("purchase_cycle")
+    def run_purchase_cycle(self, schedule=None):
+        """
+        Places a market order for every product of a schedule and schedules its next purchase.
+
+        :param schedule: PurchaseSchedule to run; defaults to the first schedule
+        :return: None
+        """
+
+        schedule = self.start_cycle("purchase", schedule)
+        results = self.place_orders(schedule)
+
+        if self.outbox is not None:
+            self.queue_email_confirmations(results, schedule)
+
+        else:
+            self.send_email_confirmations(results)
+
+        # Update to the next purchase date.
+        schedule.update_purchase_date()
+        self.schedule_purchase(schedule)
+        self.finish_purchase_cycle(schedule, results)
+
+    def start_cycle(self, event, schedule=None):
+        """
+        Tags the current trace with a cycle's schedule and records how late the cycle started.
+
+        :param event: "deposit" or "purchase"
+        :param schedule: PurchaseSchedule of the cycle; defaults to the first schedule
+        :return: The cycle's PurchaseSchedule
+        """
+
+        schedule = schedule or self.schedules[0]
+        tracer.set_attribute("schedule", self.get_event_name(event, schedule))
+        self.record_lag(event, getattr(schedule, f"next_{event}_date"))
+
+        return schedule
+
+    @staticmethod
+    def finish_purchase_cycle(schedule, results):
+        """
+        Prints a schedule's next dates once its purchase cycle is rescheduled, and raises if any order failed.
+
+        :param schedule: PurchaseSchedule of the cycle
+        :param results: Dict of product to result, as returned by place_orders()
+        :return: None
+        """
+
+        # Print out the next deposit/purchase dates.
+        print(f"Next deposit date: {schedule.next_deposit_date}")
+        print(f"Next purchasing date: {schedule.next_purchase_date}")
+
+        failed_products = [product for product, result in results.items() if result["error"] is not None]
+
+        if failed_products:
+            raise RuntimeError(f"Could not place orders for: {', '.join(failed_products)}")
+
+    def get_purchase_date(self, schedule=None):
+        """
+        :param schedule: PurchaseSchedule; defaults to the first schedule
+        :return: The schedule's next purchase date as a YYYY-MM-DD string
+        """
+
+        return (schedule or self.schedules[0]).next_purchase_date.strftime("%Y-%m-%d")
 
     def activate(self):
         """
         Activates the coinbase bot and performs transactions based on the dates and conditions.
 
+        The bot sleeps until the next deposit or purchase deadline rather than polling the clock.
+
         :return: None
         """
 
-        print(f"Next deposit date: {self.next_deposit_date}")
-        print(f"Next purchasing date: {self.next_purchase_date}")
+        for schedule in self.schedules:
+            print(f"Next deposit date: {schedule.next_deposit_date}")
+            print(f"Next purchasing date: {schedule.next_purchase_date}")
 
-        while True:
-            # If our conditions are met, initiate transactions.
-            if self.is_time_to_deposit():
-                # Deposit from bank.
-                deposit_amount = sum(self.orders.values())
-                print(f"Depositing ${deposit_amount:.2f} into Coinbase Pro account. . .")
-
-                # deposit_from_bank() not supported in sandbox mode
-                if "sandbox" not in self.coinbase.api_url:
-                    self.coinbase.deposit_from_bank(deposit_amount)
-                else:
-                    print("WARNING: deposit_from_bank() is not supported in sandbox mode")
-
-                # Update to the next deposit date.
-                self.update_deposit_date()
-
-            if self.is_time_to_purchase():
-                # Place market orders.
-                for product, amount in self.orders.items():
-                    print(f"Placing order for ${amount:.2f} of {product}. . .")
-
-                    # are_sufficient_funds_available() not supported in sandbox mode
-                    if "sandbox" not in self.coinbase.api_url:
-                        if not self.coinbase.are_sufficient_funds_available(amount):
-                            raise RuntimeError("User does not have sufficient funds for the current order")
-
-                    else:
-                        print("WARNING: are_sufficient_funds_available() not supported in sandbox mode")
-
-                    self.coinbase.place_market_order(product, amount)
-
-                    try:
-                        purchase_date = self.next_purchase_date.strftime("%Y-%m-%d")
-                        transaction_details = self.coinbase.get_transaction_details(product, purchase_date)
-                        if self.coinbase.send_email_confirmation(transaction_details):
-                            print("Email confirmation sent!")
-
-                    # There are no transaction details
-                    except IndexError:
-                        print("ERROR: Email could not be sent.")
-
-                # Update to the next purchase date.
-                self.update_purchase_date()
-
-                # Print out the next deposit/purchase dates.
-                print(f"Next deposit date: {self.next_deposit_date}")
-                print(f"Next purchasing date: {self.next_purchase_date}")
+        if self.outbox is not None:
+            self.outbox.start()
+
+        try:
+            self.schedule_next_cycle()
+            self.scheduler.run()
+
+        finally:
+            if self.outbox is not None:
+                self.outbox.stop()
+
+    def deactivate(self):
+        """Stops a running activate() loop."""
+
+        self.scheduler.stop()
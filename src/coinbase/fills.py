@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+# Maximum page size accepted by the fills endpoint
+FILLS_PAGE_LIMIT = 100
+
+Fill = namedtuple(
+    "Fill",
+    ["trade_id", "product_id", "order_id", "created_at", "side", "price", "size", "fee", "usd_volume", "settled"],
+)
+
+
+class FillsQuery:
+    """
+    The pages of one fills query, following the CB-AFTER (older) or CB-BEFORE (newer) pagination cursors. The
+    handlers request `parameters` and pass each response to read_page() until the query is done.
+    """
+
+    def __init__(
+        self, product=None, order_id=None, start_date=None, end_date=None, before=None, limit=FILLS_PAGE_LIMIT
+    ):
+        """
+        :param product: Optional cryptocurrency to filter by as a string
+        :param order_id: Optional order ID to filter by
+        :param start_date: Optional string in "yyyy-mm-dd" format
+        :param end_date: Optional string in "yyyy-mm-dd" format
+        :param before: Optional cursor (trade ID); if given, walks towards newer fills than the cursor
+        :param limit: Number of fills requested per page
+        """
+
+        if product is None and order_id is None:
+            raise ValueError("ERROR: product or order_id must be provided")
+
+        if not isinstance(limit, int):
+            raise TypeError("ERROR: limit must be of type int")
+
+        if not 0 < limit <= FILLS_PAGE_LIMIT:
+            raise ValueError(f"ERROR: limit must be between 1 and {FILLS_PAGE_LIMIT}")
+
+        filters = {
+            "product_id": None if product is None else product + "-USD",
+            "order_id": order_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "before": before,
+        }
+
+        self.limit = limit
+        self.fill_parameters = {"limit": limit, **{key: value for key, value in filters.items() if value is not None}}
+        self.parameters = self.fill_parameters
+        self.cursor_header, self.cursor_parameter = (
+            ("CB-BEFORE", "before") if before is not None else ("CB-AFTER", "after")
+        )
+        self.done = False
+
+    def read_page(self, response):
+        """
+        Parses a page of fills and moves the query on to the next page.
+
+        :param response: Response to a request for the current parameters
+        :return: List of Fill records
+        """
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not retrieve fills: {response.content}")
+
+        page = [parse_fill(fill) for fill in response.json()]
+        cursor = response.headers.get(self.cursor_header)
+
+        # A short page is the last one
+        self.done = len(page) < self.limit or not cursor
+        self.parameters = {**self.fill_parameters, self.cursor_parameter: cursor}
+
+        return page
+
+
+def parse_fill(fill):
+    """
+    Converts a fill from the fills endpoint into a typed Fill record.
+
+    :param fill: Fill as a dict
+    :return: Fill
+    """
+
+    from dateutil.parser import isoparse
+
+    return Fill(
+        trade_id=int(fill["trade_id"]),
+        product_id=fill["product_id"],
+        order_id=fill["order_id"],
+        created_at=isoparse(fill["created_at"]),
+        side=fill["side"],
+        price=float(fill["price"]),
+        size=float(fill["size"]),
+        fee=float(fill["fee"]),
+        usd_volume=float(fill.get("usd_volume") or 0.0),
+        settled=bool(fill.get("settled", True)),
+    )
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+LEDGER_FILEPATH = os.getcwd() + "/ledger.sqlite3"
+
+# Number of fills written per transaction while syncing
+SYNC_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    trade_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    side TEXT NOT NULL,
+    price REAL NOT NULL,
+    size REAL NOT NULL,
+    fee REAL NOT NULL,
+    usd_volume REAL NOT NULL,
+    settled INTEGER NOT NULL,
+    PRIMARY KEY (product_id, trade_id)
+);
+CREATE INDEX IF NOT EXISTS fills_product_time ON fills (product_id, created_at);
+CREATE INDEX IF NOT EXISTS fills_time ON fills (created_at);
+CREATE INDEX IF NOT EXISTS fills_order ON fills (order_id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    funds REAL,
+    filled_size REAL,
+    executed_value REAL,
+    fill_fees REAL
+);
+CREATE INDEX IF NOT EXISTS orders_product_time ON orders (product_id, created_at);
+
+CREATE TABLE IF NOT EXISTS deposits (
+    deposit_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    amount REAL NOT NULL,
+    currency TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deposits_time ON deposits (created_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    product_id TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+class FillsLedger:
+    """
+    Local SQLite record of the user's fills, orders and deposits.
+
+    Fills are synced incrementally: each product remembers the newest trade ID it has stored, and later syncs
+    only request fills newer than that cursor.
+    """
+
+    def __init__(self, path=LEDGER_FILEPATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    def record_fills(self, fills):
+        """
+        Stores fills, ignoring any that are already in the ledger.
+
+        :param fills: Iterable of Fill records
+        :return: Number of fills inserted
+        """
+
+        rows = [
+            (
+                fill.trade_id,
+                fill.product_id,
+                fill.order_id,
+                fill.created_at.isoformat(),
+                fill.side,
+                fill.price,
+                fill.size,
+                fill.fee,
+                fill.usd_volume,
+                int(fill.settled),
+            )
+            for fill in fills
+        ]
+
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany("INSERT OR IGNORE INTO fills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self._connection.total_changes - before
+
+    def record_order(self, order):
+        """
+        Stores an order, replacing any earlier state of the same order.
+
+        :param order: Order as a dict, as returned by the orders endpoint
+        :return: None
+        """
+
+        row = (
+            order["id"],
+            order["product_id"],
+            order.get("created_at") or _now(),
+            order.get("status", "pending"),
+            _to_float(order.get("specified_funds") or order.get("funds")),
+            _to_float(order.get("filled_size")),
+            _to_float(order.get("executed_value")),
+            _to_float(order.get("fill_fees")),
+        )
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def record_deposit(self, deposit_id, amount, currency="USD"):
+        """
+        Stores a deposit.
+
+        :param deposit_id: The deposit ID returned by Coinbase
+        :param amount: The amount deposited
+        :param currency: Currency code as a string
+        :return: None
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO deposits VALUES (?, ?, ?, ?)", (deposit_id, _now(), float(amount), currency)
+            )
+
+    def get_cursor(self, product_id):
+        """
+        Returns the newest trade ID synced for a product.
+
+        :param product_id: Product ID such as "BTC-USD"
+        :return: int, or None if the product has never been synced
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT cursor FROM sync_state WHERE product_id = ?", (product_id,)
+            ).fetchone()
+
+        return None if row is None else row["cursor"]
+
+    def sync_fills(self, handler, product):
+        """
+        Downloads fills for a product that are newer than the stored cursor.
+
+        :param handler: CoinbaseProHandler used to stream the fills
+        :param product: The cryptocurrency to sync as a string
+        :return: Number of new fills stored
+        """
+
+        product_id = product + "-USD"
+        cursor = self.get_cursor(product_id)
+        newest_trade_id = cursor
+        inserted = 0
+        batch = []
+
+        for fill in handler.iter_fills(product=product, before=cursor):
+            batch.append(fill)
+            newest_trade_id = max(fill.trade_id, newest_trade_id or fill.trade_id)
+
+            if len(batch) >= SYNC_BATCH_SIZE:
+                inserted += self.record_fills(batch)
+                batch = []
+
+        inserted += self.record_fills(batch)
+
+        if newest_trade_id is not None and newest_trade_id != cursor:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (product_id, newest_trade_id)
+                )
+
+        return inserted
+
+    def get_fills(self, product_id=None, start=None, end=None):
+        """
+        Returns stored fills, oldest first.
+
+        :param product_id: Optional product ID such as "BTC-USD"
+        :param start: Optional timezone-aware datetime; only fills at or after it are returned
+        :param end: Optional timezone-aware datetime; only fills before it are returned
+        :return: List of sqlite3.Row
+        """
+
+        query = "SELECT * FROM fills WHERE 1 = 1"
+        parameters = []
+
+        if product_id is not None:
+            query += " AND product_id = ?"
+            parameters.append(product_id)
+
+        if start is not None:
+            query += " AND created_at >= ?"
+            parameters.append(start.isoformat())
+
+        if end is not None:
+            query += " AND created_at < ?"
+            parameters.append(end.isoformat())
+
+        with self._lock:
+            return self._connection.execute(query + " ORDER BY created_at, trade_id", parameters).fetchall()
+
+    def get_totals(self, product_id):
+        """
+        Sums every stored fill of a product.
+
+        :param product_id: Product ID such as "BTC-USD"
+        :return: Dict with the total "size", "usd_volume" and "fee"
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT TOTAL(size) AS size, TOTAL(usd_volume) AS usd_volume, TOTAL(fee) AS fee "
+                "FROM fills WHERE product_id = ?",
+                (product_id,),
+            ).fetchone()
+
+        return {"size": row["size"], "usd_volume": row["usd_volume"], "fee": row["fee"]}
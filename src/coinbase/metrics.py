@@ -0,0 +1,390 @@
+import functools
+import inspect
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Scheduler lag is measured against minute-granular deadlines, so its buckets reach further
+LAG_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 3600.0)
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if value not in (float("inf"), float("-inf")) else ("+Inf" if value > 0 else "-Inf")
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        """
+        Returns the child metric for a set of label values. Hold on to it on hot paths to skip the lookup.
+
+        :param labels: A value for every label name
+        :return: The child metric
+        """
+
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"ERROR: {self.name} takes the labels {', '.join(self.labelnames) or 'none'}")
+
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._create_child())
+
+        return child
+
+    def collect(self):
+        """
+        Renders the metric in the Prometheus text format.
+
+        :return: List of lines
+        """
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+        # labels() may add a child while the page is rendered
+        with self._lock:
+            children = list(self._children.items())
+
+        for key, child in sorted(children):
+            lines.extend(child.collect(self.name, self.labelnames, key))
+
+        return lines
+
+    def _create_child(self):
+        raise NotImplementedError()
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        if amount < 0:
+            raise ValueError("ERROR: Counters can only be incremented by a non-negative amount")
+
+        with self._lock:
+            self.value += amount
+
+    def collect(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as the number of calls or USD spent."""
+
+    type = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        """
+        Increments the counter.
+
+        :param amount: Non-negative amount to add
+        :param labels: A value for every label name
+        :return: None
+        """
+
+        self.labels(**labels).inc(amount)
+
+    def get(self, **labels):
+        """Returns the current value for a set of label values."""
+
+        return self.labels(**labels).value
+
+    def _create_child(self):
+        return _CounterChild()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def collect(self, name, labelnames, key):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+
+        lines = []
+        cumulative = 0
+
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+
+        return lines
+
+
+class Histogram(_Metric):
+    """Counts observations, such as latencies, in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """
+        Records one observation.
+
+        :param value: float
+        :param labels: A value for every label name
+        :return: None
+        """
+
+        self.labels(**labels).observe(value)
+
+    def get(self, **labels):
+        """Returns the "count" and "sum" of the observations for a set of label values."""
+
+        child = self.labels(**labels)
+
+        with child._lock:
+            return {"count": sum(child.counts), "sum": child.sum}
+
+    def _create_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class MetricsRegistry:
+    """Holds the metrics to expose and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Adds a metric to the registry.
+
+        :param metric: Counter or Histogram
+        :return: The metric
+        """
+
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"ERROR: Metric {metric.name} is already registered")
+
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Creates and registers a Counter."""
+
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Creates and registers a Histogram."""
+
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """
+        Renders every metric in the Prometheus text format.
+
+        :return: str
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        return "".join(line + "\n" for metric in metrics for line in metric.collect())
+
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_CALLS = REGISTRY.counter(
+    "coinbase_handler_calls_total", "Calls of Coinbase Pro handler methods.", ("method", "outcome")
+)
+HANDLER_LATENCY = REGISTRY.histogram(
+    "coinbase_handler_duration_seconds", "Duration of Coinbase Pro handler methods.", ("method",)
+)
+SMTP_MESSAGES = REGISTRY.counter("coinbase_smtp_messages_total", "Email messages handed to SMTP.", ("outcome",))
+SMTP_LATENCY = REGISTRY.histogram("coinbase_smtp_session_duration_seconds", "Duration of SMTP sessions.")
+SCHEDULER_LAG = REGISTRY.histogram(
+    "coinbase_scheduler_lag_seconds", "Time between a cycle's scheduled date and when it ran.", ("cycle",), LAG_BUCKETS
+)
+USD_DEPLOYED = REGISTRY.counter("coinbase_usd_deployed_total", "USD spent on market orders.", ("product",))
+ERRORS = REGISTRY.counter("coinbase_errors_total", "Failed orders, cycles and emails.", ("kind",))
+OUTBOX_NOTIFICATIONS = REGISTRY.counter(
+    "coinbase_outbox_notifications_total",
+    "Notifications queued, retried, sent, failed or dropped by the outbox.",
+    ("outcome",),
+)
+
+
+def observe(name):
+    """
+    Decorator that counts the calls of a function or coroutine function, by outcome, and times them.
+
+    :param name: Value of the "method" label
+    :return: Decorator
+    """
+
+    def decorator(function):
+        latency = HANDLER_LATENCY.labels(method=name)
+        succeeded = HANDLER_CALLS.labels(method=name, outcome="success")
+        failed = HANDLER_CALLS.labels(method=name, outcome="error")
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+
+                try:
+                    result = await function(*args, **kwargs)
+
+                except Exception:
+                    failed.inc()
+                    raise
+
+                finally:
+                    latency.observe(perf_counter() - start)
+
+                succeeded.inc()
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+
+            try:
+                result = function(*args, **kwargs)
+
+            except Exception:
+                failed.inc()
+                raise
+
+            finally:
+                latency.observe(perf_counter() - start)
+
+            succeeded.inc()
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def instrumented(cls):
+    """
+    Class decorator that applies observe() to every public method defined on the class. Static methods and
+    generators are left as they are.
+
+    :param cls: The class to instrument
+    :return: The class
+    """
+
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attribute):
+            continue
+
+        if inspect.isgeneratorfunction(attribute) or inspect.isasyncgenfunction(attribute):
+            continue
+
+        setattr(cls, name, observe(name)(attribute))
+
+    return cls
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the registry at /metrics."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        content = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Small HTTP server that exposes a MetricsRegistry to Prometheus on a background thread."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, host=DEFAULT_METRICS_HOST, registry=REGISTRY):
+        super().__init__((host, port), MetricsRequestHandler)
+        self.registry = registry
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL of the metrics page."""
+
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/metrics"
+
+    def start(self):
+        """Serves requests on a background thread."""
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        print(f"SUCCESS: Serving metrics at {self.url}")
+
+    def stop(self):
+        """Stops serving and closes the listening socket."""
+
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+from src.coinbase.metrics import ERRORS, SMTP_LATENCY, SMTP_MESSAGES
+from src.coinbase.tracing import trace, tracer
+from src.coinbase.utilities import EmailCredentials
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+
+
+class EmailNotifier:
+    """Sends purchase confirmations to the user's email address."""
+
+    def __init__(self, credentials=None, host=SMTP_HOST, port=SMTP_PORT, use_ssl=True):
+        self.credentials = credentials or EmailCredentials()
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+
+    @contextmanager
+    def open_session(self):
+        """
+        Opens one authenticated SMTP connection that any number of messages can be sent over.
+
+        :return: Context manager yielding the logged in smtplib.SMTP connection
+        """
+
+        import smtplib
+
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+
+        with smtp_class(self.host, self.port) as smtp:
+            smtp.login(self.credentials.email_address, self.credentials.password)
+            yield smtp
+
+    def build_confirmation_message(self, transaction_details):
+        """
+        Builds the confirmation email for a single transaction.
+
+        :param transaction_details: Dict containing transaction details
+        :return: EmailMessage
+        """
+
+        if not isinstance(transaction_details, dict):
+            raise TypeError("ERROR: transaction_details must be of type dict")
+
+        if not transaction_details:
+            raise ValueError("ERROR: transaction_details cannot be null")
+
+        product = transaction_details["product"]
+        start_date = transaction_details["start_date"]
+        coinbase_fee = transaction_details["coinbase_fee"]
+        amount_invested = transaction_details["amount_invested"]
+        purchase_price = transaction_details["purchase_price"]
+        purchase_amount = transaction_details["purchase_amount"]
+        total_amount = transaction_details["total_amount"]
+
+        from email.message import EmailMessage
+
+        msg = EmailMessage()
+        msg["Subject"] = f"Your Purchase of ${total_amount} of {product} Was Successful!"
+        msg["From"] = self.credentials.email_address
+        msg["To"] = self.credentials.email_address
+
+        content = f"Hello,\n\n You successfully placed your order! Please see below details:\n\n \
+            Amount Purchased: {purchase_amount} {product}\n \
+            Purchase Price: ${purchase_price}\n \
+            Total Amount: ${total_amount}\n \
+            Amount Invested: ${amount_invested}\n \
+            Coinbase Fees: ${coinbase_fee}\n \
+            Date: {start_date}"
+
+        msg.set_content(content)
+
+        return msg
+
+    def build_digest_message(self, transaction_details_list):
+        """
+        Builds one email summarising every transaction of a purchase cycle.
+
+        :param transaction_details_list: List of dicts containing transaction details
+        :return: EmailMessage
+        """
+
+        if not isinstance(transaction_details_list, list):
+            raise TypeError("ERROR: transaction_details_list must be of type list")
+
+        if not transaction_details_list:
+            raise ValueError("ERROR: transaction_details_list cannot be null")
+
+        sections = []
+        total_amount = 0.0
+
+        for transaction_details in transaction_details_list:
+            if not isinstance(transaction_details, dict):
+                raise TypeError("ERROR: transaction_details must be of type dict")
+
+            if not transaction_details:
+                raise ValueError("ERROR: transaction_details cannot be null")
+
+            product = transaction_details["product"]
+            total_amount += float(transaction_details["total_amount"])
+
+            sections.append(
+                f"{product}:\n"
+                f"    Amount Purchased: {transaction_details['purchase_amount']} {product}\n"
+                f"    Purchase Price: ${transaction_details['purchase_price']}\n"
+                f"    Total Amount: ${transaction_details['total_amount']}\n"
+                f"    Amount Invested: ${transaction_details['amount_invested']}\n"
+                f"    Coinbase Fees: ${transaction_details['coinbase_fee']}\n"
+                f"    Date: {transaction_details['start_date']}"
+            )
+
+        products = ", ".join(transaction_details["product"] for transaction_details in transaction_details_list)
+
+        from email.message import EmailMessage
+
+        msg = EmailMessage()
+        msg["Subject"] = f"Your Purchases of ${total_amount:.2f} of {products} Were Successful!"
+        msg["From"] = self.credentials.email_address
+        msg["To"] = self.credentials.email_address
+
+        content = "Hello,\n\nYou successfully placed your orders! Please see below details:\n\n"
+        content += "\n\n".join(sections)
+
+        msg.set_content(content)
+
+        return msg
+
+    def send_email_confirmation(self, transaction_details):
+        """
+        Sends user a confirmation email with the details of the transaction.
+
+        :param transaction_details: Dict containing transaction details
+        :return: True if the email is sent successfully; False otherwise
+        """
+
+        msg = self.build_confirmation_message(transaction_details)
+
+        return self.send_messages([msg]) == 1
+
+    def send_email_confirmations(self, transaction_details_list, digest=False, on_sent=None):
+        """
+        Sends the confirmations of a whole purchase cycle over a single SMTP session.
+
+        :param transaction_details_list: List of dicts containing transaction details
+        :param digest: If True, combines every transaction into one email
+        :param on_sent: Optional callable given the index of each email as soon as it is sent
+        :return: Number of emails sent
+        """
+
+        if digest:
+            messages = [self.build_digest_message(transaction_details_list)]
+
+        else:
+            if not isinstance(transaction_details_list, list):
+                raise TypeError("ERROR: transaction_details_list must be of type list")
+
+            messages = [
+                self.build_confirmation_message(transaction_details) for transaction_details in transaction_details_list
+            ]
+
+        return self.send_messages(messages, on_sent=on_sent)
+
+    @trace("smtp")
+    def send_messages(self, messages, on_sent=None):
+        """
+        Sends messages over one SMTP session, logging in only once.
+
+        :param messages: List of EmailMessage
+        :param on_sent: Optional callable given the index of each message as soon as it is sent, so that callers
+            know which messages went out before an error
+        :return: Number of messages sent
+        """
+
+        if self.credentials.empty_credentials:
+            print("WARNING: No email credentials provided")
+            return 0
+
+        import smtplib
+
+        tracer.set_attribute("messages", len(messages))
+        sent = 0
+        start = perf_counter()
+
+        try:
+            with self.open_session() as smtp:
+                for msg in messages:
+                    smtp.send_message(msg)
+                    sent += 1
+                    SMTP_MESSAGES.inc(outcome="sent")
+
+                    if on_sent is not None:
+                        on_sent(sent - 1)
+
+        # It's okay if email doesn't work
+        except smtplib.SMTPAuthenticationError:
+            print("WARNING: Email credentials are not valid")
+            self.record_failure(len(messages) - sent)
+
+        except Exception:
+            self.record_failure(len(messages) - sent)
+            raise
+
+        finally:
+            SMTP_LATENCY.observe(perf_counter() - start)
+
+        return sent
+
+    @staticmethod
+    def record_failure(unsent):
+        """Counts the messages of a failed SMTP session that were not sent."""
+
+        SMTP_MESSAGES.inc(unsent, outcome="failed")
+        ERRORS.inc(kind="email")
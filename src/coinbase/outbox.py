@@ -0,0 +1,207 @@
+import os
+import queue
+import threading
+
+from src.coinbase.metrics import OUTBOX_NOTIFICATIONS
+from src.coinbase.utilities import atomic_write_json, read_json
+
+# Maximum number of notifications waiting to be sent
+OUTBOX_MAX_SIZE = 1000
+
+# Attempts per notification, with the delay between attempts doubling up to OUTBOX_MAX_RETRY_DELAY seconds
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 2.0
+OUTBOX_MAX_RETRY_DELAY = 60.0
+
+
+class NotificationOutbox:
+    """
+    Bounded queue of notifications delivered by a background thread, so sending email never delays orders.
+
+    A notification is a JSON-serializable dict handed to deliver(), which raises to request a retry. With a path,
+    every notification that has not been sent is kept in that file: it is written whenever a notification is
+    queued, retried, sent or given up on, so nothing queued is lost if the process is killed. Notifications left in
+    the file are queued again when the next outbox is created.
+    """
+
+    def __init__(
+        self,
+        deliver,
+        path=None,
+        maxsize=OUTBOX_MAX_SIZE,
+        max_attempts=OUTBOX_MAX_ATTEMPTS,
+        retry_delay=OUTBOX_RETRY_DELAY,
+        max_retry_delay=OUTBOX_MAX_RETRY_DELAY,
+    ):
+        if not callable(deliver):
+            raise TypeError("ERROR: deliver must be callable")
+
+        if not isinstance(maxsize, int):
+            raise TypeError("ERROR: maxsize must be of type int")
+
+        if maxsize <= 0:
+            raise ValueError("ERROR: maxsize must be a positive number")
+
+        self.deliver = deliver
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._queue = queue.Queue(maxsize)
+        self._pending = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0}
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def _count(self, counter):
+        with self._lock:
+            self._counts[counter] += 1
+
+        OUTBOX_NOTIFICATIONS.inc(outcome=counter)
+
+    def enqueue(self, notification):
+        """
+        Queues a notification without waiting for it to be sent.
+
+        :param notification: JSON-serializable dict passed to deliver()
+        :return: True if queued; False if the outbox is full
+        """
+
+        job = {"notification": notification, "attempts": 0}
+
+        if not self._put(job):
+            return False
+
+        self._count("enqueued")
+        self.save()
+        return True
+
+    def _put(self, job):
+        try:
+            self._queue.put_nowait(job)
+
+        except queue.Full:
+            print("WARNING: Notification outbox is full; dropping notification")
+            self._count("dropped")
+            return False
+
+        with self._lock:
+            self._pending.append(job)
+
+        return True
+
+    def _resolve(self, job, counter):
+        with self._lock:
+            self._pending.remove(job)
+
+        self._count(counter)
+        self.save()
+
+    def get_metrics(self):
+        """
+        Returns the queue depth and this outbox's delivery counters. The counters of every outbox are exported
+        together as coinbase_outbox_notifications_total.
+
+        :return: Dict with "depth", "enqueued", "sent", "retried", "failed" and "dropped"
+        """
+
+        with self._lock:
+            return {"depth": self._queue.qsize(), **self._counts}
+
+    def start(self):
+        """
+        Starts the delivery thread.
+
+        :return: None
+        """
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-outbox")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stops the delivery thread once its current notification is done and saves what is left.
+
+        :param timeout: Seconds to wait for the delivery thread
+        :return: None
+        """
+
+        self._stop_event.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+        self.save()
+
+    def join(self):
+        """Blocks until every queued notification has been sent or given up on."""
+
+        self._queue.join()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                job = self._queue.get(timeout=0.1)
+
+            except queue.Empty:
+                continue
+
+            try:
+                self._deliver(job)
+
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, job):
+        while True:
+            try:
+                self.deliver(job["notification"])
+                self._resolve(job, "sent")
+                return
+
+            except Exception as e:
+                job["attempts"] += 1
+
+                if job["attempts"] >= self.max_attempts:
+                    print(f"ERROR: Notification could not be sent after {job['attempts']} attempts: {str(e)}")
+                    self._resolve(job, "failed")
+                    return
+
+                print(f"WARNING: Notification could not be sent, retrying: {str(e)}")
+                self._count("retried")
+                self.save()
+
+            delay = min(self.retry_delay * 2 ** (job["attempts"] - 1), self.max_retry_delay)
+
+            # Queue the notification again for the next start() if we are stopped while backing off
+            if self._stop_event.wait(delay):
+                with self._lock:
+                    self._pending.remove(job)
+
+                self._put(job)
+                return
+
+    def save(self):
+        """Writes every notification that has not been sent to self.path, if the outbox has one."""
+
+        if self.path is None:
+            return
+
+        # Written under the lock so that concurrent saves cannot overwrite a newer list with an older one
+        with self._lock:
+            atomic_write_json(self.path, self._pending)
+
+    def load(self):
+        """Queues the notifications stored in self.path."""
+
+        for job in read_json(self.path, default=[]):
+            self._put(job)
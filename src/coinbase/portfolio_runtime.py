@@ -0,0 +1,170 @@
+from http.cookiejar import DefaultCookiePolicy
+
+from src.coinbase.coinbase_bot import COINBASE_API_URL, CoinbaseBot
+from src.coinbase.rate_limit import PUBLIC_BURST, PUBLIC_RATE, RateLimiter, TokenBucket
+from src.coinbase.scheduler import DeadlineScheduler
+from src.coinbase.session import DEFAULT_POOL_SIZE, create_session
+
+
+class PortfolioRuntime:
+    """
+    Runs many portfolios, each a CoinbaseBot with its own credentials, orders and frequency, in one process.
+
+    Every bot shares one DeadlineScheduler thread and one pooled HTTP session, so adding a portfolio adds only its
+    own small state rather than a thread and a connection pool. Each bot keeps its own metadata cache and dates,
+    and a failing cycle is reported without stopping the other portfolios.
+
+    Portfolios with the same API key share a rate limiter, and every portfolio shares the public bucket, matching
+    how Coinbase counts requests per key and per IP address.
+
+    Portfolios built with an outbox_path send their emails through their own NotificationOutbox, whose worker runs
+    while the runtime is active.
+    """
+
+    def __init__(self, api_url=COINBASE_API_URL, pool_size=DEFAULT_POOL_SIZE, max_workers=1, session=None):
+        self.api_url = api_url
+        self.max_workers = max_workers
+        self.session = session or create_session(pool_size=max(pool_size, max_workers))
+
+        # Portfolios share connections but must never share cookies
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        self.scheduler = DeadlineScheduler(error_handler=self.handle_error)
+        self.bots = {}
+        self.public_bucket = TokenBucket(PUBLIC_RATE, PUBLIC_BURST)
+        self.rate_limiters = {}
+        self.active = False
+
+    def get_rate_limiter(self, api_key):
+        """
+        Returns the rate limiter shared by every portfolio using an API key.
+
+        :param api_key: str
+        :return: RateLimiter
+        """
+
+        if api_key not in self.rate_limiters:
+            self.rate_limiters[api_key] = RateLimiter(public=self.public_bucket)
+
+        return self.rate_limiters[api_key]
+
+    def add_portfolio(self, name, auth, frequency, start_date, start_time, orders, **kwargs):
+        """
+        Adds a portfolio to the runtime.
+
+        :param name: Unique name of the portfolio
+        :param auth: CoinbaseExchangeAuth with the portfolio's API keys
+        :param frequency: Valid values are "daily", "weekly", "biweekly", "monthly"
+        :param start_date: The date string in format YYYY-MM-DD
+        :param start_time: The time string in format HH:MM XM
+        :param orders: Dict of product to USD amount
+        :param kwargs: Passed through to CoinbaseBot, e.g. email_digest or outbox_path
+        :return: The portfolio's CoinbaseBot
+        """
+
+        if not isinstance(name, str):
+            raise TypeError("ERROR: name must be of type str")
+
+        if not name:
+            raise ValueError("ERROR: name cannot be null")
+
+        if ":" in name:
+            raise ValueError("ERROR: name cannot contain ':'")
+
+        if name in self.bots:
+            raise ValueError(f"ERROR: Portfolio {name} already exists")
+
+        bot = CoinbaseBot(
+            api_url=self.api_url,
+            auth=auth,
+            frequency=frequency,
+            start_date=start_date,
+            start_time=start_time,
+            scheduler=self.scheduler,
+            session=self.session,
+            max_workers=self.max_workers,
+            orders=orders,
+            name=name,
+            rate_limiter=self.get_rate_limiter(auth.api_key),
+            **kwargs,
+        )
+        self.bots[name] = bot
+
+        # Portfolios added to a running runtime deliver their emails straight away
+        if self.active and bot.outbox is not None:
+            bot.outbox.start()
+
+        return bot
+
+    def remove_portfolio(self, name):
+        """
+        Removes a portfolio, cancels its pending cycles and stops its outbox, which keeps unsent emails in its file.
+
+        :param name: Name of the portfolio
+        :return: The removed CoinbaseBot
+        """
+
+        bot = self.bots.pop(name)
+
+        for schedule in bot.schedules:
+            self.scheduler.cancel(bot.get_event_name("deposit", schedule))
+            self.scheduler.cancel(bot.get_event_name("purchase", schedule))
+
+        if bot.outbox is not None:
+            bot.outbox.stop()
+
+        return bot
+
+    def handle_error(self, event, error):
+        """
+        Reports a failed cycle. A cycle that failed before moving on to its next date is skipped, so the portfolio
+        keeps its schedule.
+
+        :param event: The ScheduledEvent whose action raised
+        :param error: The exception raised
+        :return: None
+        """
+
+        name = event.name.split(":", 1)[0]
+        cycle = event.name.rsplit(":", 1)[1]
+        print(f"ERROR: {cycle.capitalize()} cycle of portfolio {name} failed: {str(error)}")
+
+        bot = self.bots.get(name)
+
+        if bot is not None:
+            bot.skip_failed_cycle(event)
+
+    def activate(self):
+        """
+        Schedules every portfolio and runs their cycles until deactivate() is called. The portfolios' outboxes are
+        started first and stopped once the cycles stop, saving any emails that have not been sent.
+
+        :return: None
+        """
+
+        self.active = True
+
+        for name, bot in self.bots.items():
+            for schedule in bot.schedules:
+                print(f"{name}: next deposit date: {schedule.next_deposit_date}")
+                print(f"{name}: next purchasing date: {schedule.next_purchase_date}")
+
+            if bot.outbox is not None:
+                bot.outbox.start()
+
+            bot.schedule_next_cycle()
+
+        try:
+            self.scheduler.run()
+
+        finally:
+            self.active = False
+
+            for bot in list(self.bots.values()):
+                if bot.outbox is not None:
+                    bot.outbox.stop()
+
+    def deactivate(self):
+        """Stops a running activate() loop."""
+
+        self.scheduler.stop()
@@ -0,0 +1,454 @@
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+from time import monotonic
+
+from src.coinbase.balance import BalanceSnapshot, is_usd_wallet
+from src.coinbase.cache import MetadataCache
+from src.coinbase.notifier import EmailNotifier
+from src.coinbase.rate_limit import RateLimiter
+from src.coinbase.retry import RetryPolicy
+from src.coinbase.session import DEFAULT_TIMEOUT
+from src.coinbase.tracing import tracer
+
+# Exponential backoff used while waiting for a market order to settle
+ORDER_POLL_INITIAL_DELAY = 0.1
+ORDER_POLL_MAX_DELAY = 2.0
+ORDER_POLL_TIMEOUT = 30.0
+
+# A call of a handler method, yielded by an operation for the handler to make
+HandlerCall = namedtuple("HandlerCall", ["method", "args", "kwargs"])
+
+
+def call(method, *args, **kwargs):
+    """
+    Asks the handler running an operation to call one of its methods and send back the result.
+
+    :param method: Name of the handler method, e.g. "_request" or "get_order"
+    :return: HandlerCall
+    """
+
+    return HandlerCall(method, args, kwargs)
+
+
+class CoinbaseProProtocol:
+    """
+    The Coinbase Pro API, independent of how requests are sent.
+
+    Every exchange call is written once here as an operation: a generator that builds its requests, yields a
+    HandlerCall for each request, sleep or nested call it needs, and parses what is sent back. CoinbaseProHandler
+    runs operations with requests and time.sleep, and AsyncCoinbaseProHandler awaits them with aiohttp and
+    asyncio.sleep, so the handlers only differ in how they do I/O. An exception raised by a call is thrown back
+    into the operation at the point it was yielded.
+
+    Subclasses provide _run(), _acquire(), _transmit() and _sleep(), and set connection_errors to the transport's
+    exceptions for connection errors and timeouts.
+    """
+
+    connection_errors = ()
+
+    def __init__(
+        self,
+        api_url,
+        auth,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        ledger=None,
+        rate_limiter=None,
+        retry_policy=None,
+    ):
+        self.api_url = api_url
+        self.auth = auth
+        self.notifier = EmailNotifier()
+        self.email = self.notifier.credentials
+        self.timeout = timeout
+        self.cache = cache or MetadataCache()
+        self.ledger = ledger
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    def _request_operation(self, method, endpoint, params=None, data=None, retry=None):
+        """
+        Sends an authenticated request, retrying connection errors, timeouts and server errors with backoff.
+
+        Only requests that are safe to repeat are retried: by default GET requests. Orders are made safe to repeat
+        by their client_oid; see _submit_market_order().
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to api_url
+        :param params: Optional dict of query parameters
+        :param data: Optional request body as a string
+        :param retry: True to retry failures; defaults to True for GET requests only
+        :return: The transport's response
+        """
+
+        retry = method == "GET" if retry is None else retry
+        attempt = 0
+
+        while True:
+            try:
+                response = yield from self._send_operation(method, endpoint, params, data)
+
+            except self.connection_errors as e:
+                if not retry or attempt >= self.retry_policy.max_retries:
+                    raise
+
+                error = str(e) or type(e).__name__
+
+            else:
+                if not retry or attempt >= self.retry_policy.max_retries:
+                    return response
+
+                if not self.retry_policy.is_retryable_status(response.status_code):
+                    return response
+
+                error = f"status {response.status_code}"
+
+            delay = self.retry_policy.get_delay(attempt)
+            print(f"WARNING: {method} {endpoint} failed with {error}; retrying in {delay:.2f} seconds")
+            yield call("_sleep", delay)
+            attempt += 1
+
+    def _send_operation(self, method, endpoint, params=None, data=None):
+        """
+        Sends a request once the rate limiter has a token for it. A 429 response pauses the limiter for its
+        Retry-After and the request is sent again.
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to api_url
+        :param params: Optional dict of query parameters
+        :param data: Optional request body as a string
+        :return: The transport's response
+        """
+
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            with tracer.span("http", method=method, endpoint=endpoint, attempt=attempt) as span:
+                span.set_attribute("rate_limit_wait", (yield call("_acquire", endpoint)))
+                response = yield call("_transmit", method, endpoint, params=params, data=data)
+                span.set_attribute("status_code", response.status_code)
+
+            if response.status_code != 429 or attempt == self.rate_limiter.max_retries:
+                return response
+
+            self.rate_limiter.throttle(endpoint, response.headers.get("Retry-After"))
+
+    def _get_or_fetch(self, key, fetch):
+        """
+        MetadataCache.get_or_fetch() for a fetch that is an operation.
+
+        :param key: str
+        :param fetch: Operation function taking no arguments
+        :return: The cached or fetched value
+        """
+
+        value = self.cache.get(key)
+
+        if value is None:
+            value = yield from fetch()
+            self.cache.set(key, value)
+
+        return value
+
+    def _fetch_payment_method(self):
+        response = yield call("_request", "GET", "payment-methods")
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not find payment method: {response.content}")
+
+        print("SUCCESS: Retrieved payment method")
+
+        return response.json()[0]["id"]
+
+    def _fetch_usd_wallet_id(self):
+        response = yield call("_request", "GET", "coinbase-accounts")
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not find USD wallet: {response.content}")
+
+        for wallet in response.json():
+            if is_usd_wallet(wallet):
+                return wallet["id"]
+
+        raise RuntimeError("ERROR: Could not find USD wallet")
+
+    def _fetch_profile(self):
+        response = yield call("_request", "GET", "profiles")
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not find profile: {response.content}")
+
+        profiles = response.json()
+
+        for profile in profiles:
+            if profile.get("is_default"):
+                return profile
+
+        return profiles[0]
+
+    def _deposit_from_bank(self, amount):
+        if not isinstance(amount, (int, float)):
+            raise TypeError("ERROR: amount must be of type int or float")
+
+        if amount <= 0:
+            raise ValueError("ERROR: amount must be a positive number")
+
+        deposit_request = {
+            "amount": amount,
+            "currency": "USD",
+            "payment_method_id": (yield call("get_payment_method")),
+        }
+
+        response = yield call("_request", "POST", "deposits/payment-method", data=json.dumps(deposit_request))
+
+        if response.status_code != 200:
+            # The bank may have been removed from the account; look it up again next time
+            self.cache.invalidate("payment_method")
+            raise RuntimeError(f"ERROR: Could not make deposit to Coinbase Pro account: {response.content}")
+
+        if self.ledger is not None:
+            self.ledger.record_deposit(response.json()["id"], amount)
+
+        print(f"SUCCESS: Deposited ${amount:.2f} to Coinbase Pro account.")
+        return True
+
+    def _get_balance_snapshot(self):
+        response = yield call("_request", "GET", "coinbase-accounts")
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not retrieve account balances: {response.content}")
+
+        return BalanceSnapshot(response.json())
+
+    def _are_sufficient_funds_available(self, amount):
+        if not isinstance(amount, (int, float)):
+            raise TypeError("ERROR: amount must be of type int or float")
+
+        if amount <= 0:
+            raise ValueError("ERROR: amount must be a positive number")
+
+        return (yield call("get_balance_snapshot")).covers(amount)
+
+    def _place_market_order(self, product, amount, client_oid=None):
+        if not isinstance(product, str):
+            raise TypeError("ERROR: product must be of type str")
+
+        if not isinstance(amount, (int, float)):
+            raise TypeError("ERROR: amount must be of type int or float")
+
+        if not product:
+            raise ValueError("ERROR: product cannot be null")
+
+        if amount <= 0:
+            raise ValueError("ERROR: amount must be a positive number")
+
+        order_id = yield call("submit_market_order", self.build_market_order(product, amount, client_oid))
+
+        print(f"SUCCESS: Made a market order for ${amount:.2f} of {product}")
+
+        # Wait for the order to settle so its fills are available
+        order = yield call("wait_for_order", order_id)
+
+        if self.ledger is not None:
+            self.ledger.record_order(order)
+
+        return order_id
+
+    def _submit_market_order(self, market_order):
+        client_oid = market_order.get("client_oid")
+        attempt = 0
+
+        while True:
+            try:
+                response = yield call("_request", "POST", "orders", retry=False, data=json.dumps(market_order))
+
+            except self.connection_errors as e:
+                if client_oid is None:
+                    raise
+
+                error = str(e) or type(e).__name__
+
+            else:
+                if response.status_code == 200:
+                    return response.json()["id"]
+
+                if client_oid is None or not self.retry_policy.is_retryable_status(response.status_code):
+                    raise RuntimeError(f"Could not place market order: {response.content}")
+
+                error = f"status {response.status_code}"
+
+            # The order may have been placed even though its response was lost
+            order = yield call("find_order_by_client_oid", client_oid)
+
+            if order is not None:
+                print(f"WARNING: Recovered order {order['id']} after the exchange failed with {error}")
+                return order["id"]
+
+            if attempt >= self.retry_policy.max_retries:
+                raise RuntimeError(f"Could not place market order: {error}")
+
+            delay = self.retry_policy.get_delay(attempt)
+            print(f"WARNING: Placing order {client_oid} failed with {error}; retrying in {delay:.2f} seconds")
+            yield call("_sleep", delay)
+            attempt += 1
+
+    def _find_order_by_client_oid(self, client_oid):
+        response = yield call("_request", "GET", "orders/client:" + client_oid)
+
+        if response.status_code == 404:
+            return None
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not look up order {client_oid}: {response.content}")
+
+        return response.json()
+
+    def _get_order(self, order_id):
+        if not isinstance(order_id, str):
+            raise TypeError("ERROR: order_id must be of type str")
+
+        if not order_id:
+            raise ValueError("ERROR: order_id cannot be null")
+
+        response = yield call("_request", "GET", "orders/" + order_id)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not find order {order_id}: {response.content}")
+
+        return response.json()
+
+    def _wait_for_order(self, order_id, timeout=ORDER_POLL_TIMEOUT):
+        deadline = monotonic() + timeout
+        delay = ORDER_POLL_INITIAL_DELAY
+
+        while True:
+            order = yield call("get_order", order_id)
+
+            if order["status"] == "done":
+                return order
+
+            remaining = deadline - monotonic()
+
+            if remaining <= 0:
+                print(f"WARNING: Order {order_id} was not done after {timeout} seconds")
+                return order
+
+            yield call("_sleep", min(delay, remaining))
+            delay = min(delay * 2, ORDER_POLL_MAX_DELAY)
+
+    def _get_transaction_details(self, product, start_date, order_id=None):
+        if not isinstance(product, str):
+            raise TypeError("ERROR: product must be of type str")
+
+        if not isinstance(start_date, str):
+            raise TypeError("ERROR: start_date must be of type str")
+
+        if not product:
+            raise ValueError("ERROR: product cannot be null")
+
+        if not start_date:
+            raise ValueError("ERROR: start_date cannot be null")
+
+        # Raises a ValueError if start_date is not in the right format
+        datetime.strptime(start_date, "%Y-%m-%d")
+
+        if order_id is not None:
+            fill_parameters = {"order_id": order_id}
+        else:
+            fill_parameters = {"product_id": product + "-USD", "start_date": start_date}
+
+        response = yield call("_request", "GET", "fills", params=fill_parameters)
+
+        if response.status_code != 200:
+            raise RuntimeError("ERROR: Could not find transaction details")
+
+        return self.parse_transaction_details(product, start_date, response.json(), order_id)
+
+    def _get_candles(self, product, start, end, granularity):
+        candle_parameters = {
+            "start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            "end": datetime.fromtimestamp(end, timezone.utc).isoformat(),
+            "granularity": granularity,
+        }
+        response = yield call("_request", "GET", f"products/{product}-USD/candles", params=candle_parameters)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not retrieve {product} candles: {response.content}")
+
+        return response.json()
+
+    def get_cache_stats(self):
+        """
+        Returns hit and miss counters of the metadata cache.
+
+        :return: Dict with "hits", "misses" and "entries"
+        """
+
+        return self.cache.get_stats()
+
+    @staticmethod
+    def build_market_order(product, amount, client_oid=None):
+        """
+        Builds the request body of a market buy order.
+
+        :param product: The cryptocurrency to purchase as a string
+        :param amount: The amount of USD to make a purchase with
+        :param client_oid: Optional UUID string identifying the order
+        :return: The order as a dict
+        """
+
+        market_order = {
+            "type": "market",
+            "side": "buy",
+            "product_id": product + "-USD",
+            "funds": amount,
+        }
+
+        if client_oid is not None:
+            market_order["client_oid"] = client_oid
+
+        return market_order
+
+    @staticmethod
+    def parse_transaction_details(product, start_date, fills, order_id=None):
+        """
+        Extracts the transaction details from a list of fills.
+
+        :param product: The cryptocurrency the fills belong to as a string
+        :param start_date: String in "yyyy-mm-dd" format
+        :param fills: List of fills as returned by the fills endpoint
+        :param order_id: If given, the details are summed over all fills; otherwise only the first fill is used
+        :return: Extracted details as a dict
+        """
+
+        if order_id is None:
+            fills = fills[:1]
+
+        # Raises an IndexError if there are no fills
+        transaction = fills[0]
+
+        if len(fills) == 1:
+            coinbase_fee = round(float(transaction["fee"]), 2)
+            amount_invested = round(float(transaction["usd_volume"]), 2)
+            purchase_price = round(float(transaction["price"]), 2)
+            purchase_amount = transaction["size"]
+
+        # An order filled in several parts; report the totals and the volume-weighted price
+        else:
+            total_size = sum(float(fill["size"]) for fill in fills)
+            total_volume = sum(float(fill["usd_volume"]) for fill in fills)
+            coinbase_fee = round(sum(float(fill["fee"]) for fill in fills), 2)
+            amount_invested = round(total_volume, 2)
+            purchase_price = round(total_volume / total_size, 2)
+            purchase_amount = f"{total_size:.8f}"
+
+        parsed_transaction = {
+            "product": product,
+            "start_date": start_date,
+            "coinbase_fee": "%.2f" % coinbase_fee,
+            "amount_invested": "%.2f" % amount_invested,
+            "purchase_price": "%.2f" % purchase_price,
+            "purchase_amount": purchase_amount,
+            "total_amount": "%.2f" % (coinbase_fee + amount_invested),
+        }
+
+        return parsed_transaction
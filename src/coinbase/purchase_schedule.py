@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+
+class PurchaseSchedule:
+    """
+    One cadence of recurring purchases: a set of orders, how often they repeat, and the next deposit and purchase
+    dates. The deposit for a cycle is made one minute before its purchase.
+    """
+
+    def __init__(self, time_delta, next_purchase_date, orders=None, name=None):
+        self.name = name
+        self.time_delta = time_delta
+        self.next_purchase_date = next_purchase_date
+        self.next_deposit_date = next_purchase_date + timedelta(minutes=-1)
+        self.orders = {} if orders is None else orders
+
+    def __repr__(self):
+        return f"PurchaseSchedule(name={self.name!r}, every={self.time_delta}, next={self.next_purchase_date})"
+
+    def update_deposit_date(self):
+        """Updates to the next deposit date."""
+
+        self.next_deposit_date += self.time_delta
+
+    def update_purchase_date(self):
+        """Updates to the next purchase date."""
+
+        self.next_purchase_date += self.time_delta
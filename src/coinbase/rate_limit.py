@@ -0,0 +1,225 @@
+import threading
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep, time
+
+# Coinbase Pro's documented limits, in requests per second and burst size
+PUBLIC_RATE = 10.0
+PUBLIC_BURST = 15
+PRIVATE_RATE = 15.0
+PRIVATE_BURST = 30
+
+# First path segments of the endpoints that do not need authentication
+PUBLIC_ENDPOINTS = ("currencies", "products", "time")
+
+# Seconds to back off after a 429 that has no usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+# Number of times a rate-limited request is retried before its 429 is returned
+DEFAULT_MAX_RETRIES = 3
+
+
+def parse_retry_after(value, default=DEFAULT_RETRY_AFTER):
+    """
+    Parses a Retry-After header, given either in seconds or as an HTTP date.
+
+    :param value: Header value as a string, or None
+    :param default: Seconds to return if the header is missing or invalid
+    :return: Seconds to wait as a float
+    """
+
+    if not value:
+        return default
+
+    try:
+        return max(float(value), 0.0)
+
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Token bucket that refills at rate tokens per second up to burst tokens.
+
+    A token is reserved under a lock that is never held while waiting, so one bucket can be shared by threads and
+    by coroutines on any number of event loops. Callers that find the bucket empty queue up behind each other
+    rather than racing for the next token.
+    """
+
+    def __init__(self, rate, burst=None):
+        if not isinstance(rate, (int, float)):
+            raise TypeError("ERROR: rate must be of type int or float")
+
+        if rate <= 0:
+            raise ValueError("ERROR: rate must be a positive number")
+
+        self.rate = float(rate)
+        self.burst = max(int(burst if burst is not None else rate), 1)
+        self._tokens = float(self.burst)
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token, borrowing against future refills if none is left.
+
+        :return: Seconds the caller must wait before using the token
+        """
+
+        with self._lock:
+            now = monotonic()
+
+            # The bucket does not refill while it is paused, which moves _updated into the future
+            if now > self._updated:
+                self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+                self._updated = now
+
+            self._tokens -= 1
+
+            return max(self._updated - now, 0.0) + max(-self._tokens, 0.0) / self.rate
+
+    def pause(self, seconds):
+        """
+        Holds back every token for the given number of seconds, e.g. after the server answered with Retry-After.
+
+        :param seconds: float
+        :return: None
+        """
+
+        with self._lock:
+            # Only one request goes out when the pause ends, rather than a whole burst
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = max(self._updated, monotonic() + seconds)
+
+    def acquire(self):
+        """
+        Blocks the calling thread until a token is available.
+
+        :return: Seconds waited
+        """
+
+        wait = self.reserve()
+
+        if wait > 0:
+            sleep(wait)
+
+        return wait
+
+    async def acquire_async(self):
+        """
+        Awaits a token without blocking the event loop.
+
+        :return: Seconds waited
+        """
+
+        wait = self.reserve()
+
+        if wait > 0:
+            # Imported here so that the threaded bot never loads asyncio
+            import asyncio
+
+            await asyncio.sleep(wait)
+
+        return wait
+
+
+class RateLimiter:
+    """
+    Limits exchange requests with separate buckets for public and private endpoints, and records how long calls
+    waited for a token.
+
+    Share one RateLimiter between every handler that uses the same API key, since Coinbase counts private requests
+    per key. Public requests are counted per IP address, so their bucket can be shared more widely.
+    """
+
+    def __init__(self, public=None, private=None, max_retries=DEFAULT_MAX_RETRIES):
+        self.buckets = {
+            "public": public or TokenBucket(PUBLIC_RATE, PUBLIC_BURST),
+            "private": private or TokenBucket(PRIVATE_RATE, PRIVATE_BURST),
+        }
+        self.max_retries = max_retries
+        self._stats = {scope: {"calls": 0, "throttled": 0, "waited": 0.0, "max_wait": 0.0} for scope in self.buckets}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_scope(endpoint):
+        """
+        Returns which bucket an endpoint draws from.
+
+        :param endpoint: Path relative to the API URL
+        :return: "public" or "private"
+        """
+
+        return "public" if endpoint.split("?")[0].strip("/").split("/")[0] in PUBLIC_ENDPOINTS else "private"
+
+    def acquire(self, endpoint):
+        """
+        Blocks until the endpoint's bucket has a token.
+
+        :param endpoint: Path relative to the API URL
+        :return: Seconds waited
+        """
+
+        scope = self.get_scope(endpoint)
+        wait = self.buckets[scope].acquire()
+        self._record(scope, wait)
+
+        return wait
+
+    async def acquire_async(self, endpoint):
+        """
+        Awaits a token from the endpoint's bucket.
+
+        :param endpoint: Path relative to the API URL
+        :return: Seconds waited
+        """
+
+        scope = self.get_scope(endpoint)
+        wait = await self.buckets[scope].acquire_async()
+        self._record(scope, wait)
+
+        return wait
+
+    def throttle(self, endpoint, retry_after):
+        """
+        Pauses the endpoint's bucket after a 429 response.
+
+        :param endpoint: Path relative to the API URL
+        :param retry_after: The response's Retry-After header, or None
+        :return: Seconds the bucket is paused for
+        """
+
+        scope = self.get_scope(endpoint)
+        seconds = parse_retry_after(retry_after)
+        self.buckets[scope].pause(seconds)
+
+        with self._lock:
+            self._stats[scope]["throttled"] += 1
+
+        print(f"WARNING: Rate limited by Coinbase; retrying {scope} requests in {seconds:.2f} seconds")
+
+        return seconds
+
+    def get_stats(self):
+        """
+        Returns per-bucket statistics.
+
+        :return: Dict of "public" and "private" to the number of "calls", 429 responses "throttled", and the total
+            and maximum seconds "waited" for a token
+        """
+
+        with self._lock:
+            return {scope: dict(stats) for scope, stats in self._stats.items()}
+
+    def _record(self, scope, wait):
+        with self._lock:
+            stats = self._stats[scope]
+            stats["calls"] += 1
+            stats["waited"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
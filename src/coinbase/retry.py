@@ -0,0 +1,71 @@
+import random
+import uuid
+
+# Namespace of the client_oid UUIDs derived by make_client_oid()
+CLIENT_OID_NAMESPACE = uuid.UUID("8a3c1f4e-5b2d-4c7e-9f60-2d1b7e4a9c35")
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_INITIAL_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+
+# Server errors worth retrying; anything else is answered the same way however often it is sent
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+
+def make_client_oid(portfolio, product, scheduled_time):
+    """
+    Derives the client_oid of a scheduled market order. The same portfolio, product and scheduled time always give
+    the same ID, so an order whose response was lost can be looked up instead of being placed again.
+
+    :param portfolio: Name of the portfolio or schedule placing the order, or None
+    :param product: The cryptocurrency to purchase as a string
+    :param scheduled_time: datetime of the purchase the order belongs to
+    :return: UUID string
+    """
+
+    return str(uuid.uuid5(CLIENT_OID_NAMESPACE, f"{portfolio or ''}|{product}|{scheduled_time.isoformat()}"))
+
+
+class RetryPolicy:
+    """
+    Retries failed exchange requests with exponential backoff and full jitter, so that many bots recovering at once
+    do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        initial_delay=DEFAULT_INITIAL_DELAY,
+        max_delay=DEFAULT_MAX_DELAY,
+        retryable_status_codes=RETRYABLE_STATUS_CODES,
+    ):
+        if not isinstance(max_retries, int):
+            raise TypeError("ERROR: max_retries must be of type int")
+
+        if max_retries < 0:
+            raise ValueError("ERROR: max_retries cannot be negative")
+
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.retryable_status_codes = tuple(retryable_status_codes)
+
+    def get_delay(self, attempt):
+        """
+        Returns how long to wait before the next try.
+
+        :param attempt: Number of the failed try, starting at 0
+        :return: Seconds as a float, drawn uniformly up to the exponential backoff
+        """
+
+        return random.uniform(0, min(self.initial_delay * 2**attempt, self.max_delay))
+
+    def is_retryable_status(self, status_code):
+        """
+        Checks whether a response status is worth retrying.
+
+        :param status_code: int
+        :return: True if the request may succeed when retried; False otherwise
+        """
+
+        return status_code in self.retryable_status_codes
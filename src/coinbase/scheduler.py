@@ -0,0 +1,148 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+# Upper bound on a single sleep so wall-clock adjustments (NTP, suspend/resume) are picked up
+MAX_SLEEP_SECONDS = 300
+
+
+class ScheduledEvent:
+    """A single deadline kept in the DeadlineScheduler's priority queue."""
+
+    def __init__(self, when, name, action):
+        self.when = when
+        self.name = name
+        self.action = action
+        self.cancelled = False
+
+
+class DeadlineScheduler:
+    """
+    Keeps upcoming deadlines in a priority queue and sleeps until the earliest one is due.
+
+    Deadlines are given as wall-clock datetimes. The thread blocks on a condition variable (timed on the
+    monotonic clock) until the earliest deadline, so it stays idle between events instead of polling.
+
+    By default an exception raised by an action stops run(). If an error_handler is given, it is called with the
+    event and the exception instead and the loop carries on, so one failing owner cannot starve the others.
+    """
+
+    def __init__(self, max_sleep=MAX_SLEEP_SECONDS, error_handler=None):
+        self.max_sleep = max_sleep
+        self.error_handler = error_handler
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def __len__(self):
+        with self._condition:
+            return sum(1 for _, _, event in self._queue if not event.cancelled)
+
+    def schedule(self, when, action, name=None):
+        """
+        Schedules an action to run at the given datetime.
+
+        :param when: datetime at which the action should fire
+        :param action: Callable taking no arguments
+        :param name: Optional name used to cancel the event
+        :return: The ScheduledEvent that was queued
+        """
+
+        if not isinstance(when, datetime):
+            raise TypeError("ERROR: when must be of type datetime")
+
+        if not callable(action):
+            raise TypeError("ERROR: action must be callable")
+
+        event = ScheduledEvent(when, name, action)
+
+        with self._condition:
+            heapq.heappush(self._queue, (when, next(self._counter), event))
+            # Wake the run loop in case this deadline is earlier than the one it is sleeping on
+            self._condition.notify()
+
+        return event
+
+    def cancel(self, name):
+        """
+        Cancels every pending event with the given name.
+
+        :param name: Name the events were scheduled with
+        :return: Number of events cancelled
+        """
+
+        cancelled = 0
+
+        with self._condition:
+            for _, _, event in self._queue:
+                if event.name == name and not event.cancelled:
+                    event.cancelled = True
+                    cancelled += 1
+
+            self._condition.notify()
+
+        return cancelled
+
+    def next_deadline(self):
+        """Returns the datetime of the earliest pending event, or None if the queue is empty."""
+
+        with self._condition:
+            self._discard_cancelled()
+            return self._queue[0][0] if self._queue else None
+
+    def stop(self):
+        """Stops the run loop after the currently firing action (if any) returns."""
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def run(self):
+        """
+        Fires events as their deadlines pass until stop() is called.
+
+        :return: None
+        """
+
+        while True:
+            event = self._wait_for_next_event()
+
+            if event is None:
+                return
+
+            if self.error_handler is None:
+                event.action()
+                continue
+
+            try:
+                event.action()
+
+            except Exception as e:
+                self.error_handler(event, e)
+
+    def _discard_cancelled(self):
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+
+    def _wait_for_next_event(self):
+        with self._condition:
+            while not self._stopped:
+                self._discard_cancelled()
+
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+
+                when = self._queue[0][0]
+                remaining = (when - datetime.now()).total_seconds()
+
+                if remaining <= 0:
+                    return heapq.heappop(self._queue)[2]
+
+                # Condition.wait() measures its timeout on the monotonic clock. Waking early because a
+                # new event was scheduled (or one was cancelled) simply re-evaluates the head of the queue.
+                self._condition.wait(min(remaining, self.max_sleep))
+
+            return None
@@ -0,0 +1,98 @@
+import threading
+from weakref import WeakKeyDictionary
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+# (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that records how many requests each pooled connection has carried."""
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._requests_per_connection = WeakKeyDictionary()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+
+        # The body has not been read yet, so the connection (and its socket) is still attached to the raw
+        # response. Pooled connection objects reconnect in place, so the socket identifies the TCP connection.
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+
+        with self._stats_lock:
+            self.requests_sent += 1
+
+            if sock is not None:
+                if sock not in self._requests_per_connection:
+                    self.connections_opened += 1
+                    self._requests_per_connection[sock] = 0
+
+                self._requests_per_connection[sock] += 1
+
+        return response
+
+    def get_connection_stats(self):
+        """
+        Returns connection reuse statistics for this adapter.
+
+        :return: Dict with totals and the number of requests carried by each live connection
+        """
+
+        with self._stats_lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "requests_sent": self.requests_sent,
+                "reused_requests": self.requests_sent - self.connections_opened,
+                "requests_per_connection": list(self._requests_per_connection.values()),
+            }
+
+
+def normalize_timeout(timeout):
+    """
+    Converts a timeout as requests accepts it into a (connect timeout, read timeout) tuple.
+
+    :param timeout: Seconds for both the connect and read timeouts, or a tuple of (connect timeout, read timeout)
+    :return: Tuple of (connect timeout, read timeout) in seconds
+    """
+
+    if isinstance(timeout, (int, float)) and not isinstance(timeout, bool):
+        return timeout, timeout
+
+    if not isinstance(timeout, tuple) or len(timeout) != 2:
+        raise TypeError("ERROR: timeout must be a number or a tuple of (connect timeout, read timeout)")
+
+    return timeout
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, keep_alive=True):
+    """
+    Creates a requests.Session backed by a pooled adapter.
+
+    :param pool_size: Maximum number of connections kept open per host
+    :param keep_alive: False to close every connection after its response
+    :return: requests.Session
+    """
+
+    if not isinstance(pool_size, int):
+        raise TypeError("ERROR: pool_size must be of type int")
+
+    if pool_size <= 0:
+        raise ValueError("ERROR: pool_size must be a positive number")
+
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
@@ -0,0 +1,282 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+from time import perf_counter, time
+
+TRACE_FORMATS = ("jsonl", "chrome")
+
+# Arguments of traced functions that are recorded as span attributes
+TRACED_ARGUMENTS = ("product", "amount", "order_id", "client_oid", "method", "endpoint")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed step of a trace. Spans opened while another span is current become its children."""
+
+    def __init__(self, tracer, name, attributes, parent=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(8).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.thread_id = threading.get_ident()
+        self.start = None
+        self.duration = None
+        self.status = "ok"
+        self._started = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start = time()
+        self._started = perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = perf_counter() - self._started
+
+        if exc_value is not None:
+            self.status = "error"
+            self.attributes["error"] = str(exc_value)
+
+        _current_span.reset(self._token)
+        self.tracer.finish(self)
+
+        return False
+
+    def to_dict(self):
+        """
+        Returns the span as one line of a JSON lines trace.
+
+        :return: Dict
+        """
+
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+        }
+
+    def to_chrome_event(self):
+        """
+        Returns the span as a complete event of the Chrome trace event format, viewable in chrome://tracing or
+        Perfetto.
+
+        :return: Dict
+        """
+
+        return {
+            "name": self.name,
+            "cat": "coinbase",
+            "ph": "X",
+            "ts": self.start * 1e6,
+            "dur": self.duration * 1e6,
+            "pid": os.getpid(),
+            "tid": self.thread_id,
+            "args": {**self.attributes, "status": self.status, "trace_id": self.trace_id},
+        }
+
+
+class _NullSpan:
+    """Span handed out while tracing is disabled. Every operation is a no-op."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans and writes each trace to a file once its root span ends.
+
+    Tracing is disabled until enable() is called; until then span() returns a shared no-op span and traced
+    functions call straight through.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.format = "jsonl"
+        self.exported = 0
+        self._traces = {}
+        self._lock = threading.Lock()
+
+    def enable(self, path, format="jsonl"):
+        """
+        Starts recording traces.
+
+        :param path: File that completed traces are appended to
+        :param format: "jsonl" for one JSON object per span, or "chrome" for the Chrome trace event format
+        :return: None
+        """
+
+        if format not in TRACE_FORMATS:
+            raise ValueError(f"ERROR: format must be one of {', '.join(TRACE_FORMATS)}")
+
+        # Chrome reads a JSON array whose closing bracket may be missing, so events can be appended as they come
+        if format == "chrome" and (not os.path.exists(path) or os.path.getsize(path) == 0):
+            with open(path, "w") as trace_file:
+                trace_file.write("[\n")
+
+        self.path = path
+        self.format = format
+        self.exported = 0
+        self.enabled = True
+
+    def disable(self):
+        """Stops recording traces. Traces that are still open are discarded."""
+
+        self.enabled = False
+
+        with self._lock:
+            self._traces = {}
+
+    def span(self, name, **attributes):
+        """
+        Opens a span as a child of the current span.
+
+        :param name: Name of the step
+        :param attributes: Attributes to record on the span
+        :return: Span to use as a context manager
+        """
+
+        if not self.enabled:
+            return NULL_SPAN
+
+        return Span(self, name, attributes, _current_span.get())
+
+    def set_attribute(self, key, value):
+        """Sets an attribute on the current span, if there is one."""
+
+        span = _current_span.get()
+
+        if span is not None:
+            span.set_attribute(key, value)
+
+    def finish(self, span):
+        """
+        Stores an ended span and exports its trace once the root span ends.
+
+        :param span: Span
+        :return: None
+        """
+
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span)
+
+            if span.parent_id is not None:
+                return
+
+            del self._traces[span.trace_id]
+
+            if self.enabled:
+                self.export(spans)
+
+    def export(self, spans):
+        """
+        Appends the spans of a trace to the trace file.
+
+        :param spans: List of Span
+        :return: None
+        """
+
+        if self.format == "chrome":
+            lines = [json.dumps(span.to_chrome_event(), default=str) + ",\n" for span in spans]
+
+        else:
+            lines = [json.dumps(span.to_dict(), default=str) + "\n" for span in spans]
+
+        with open(self.path, "a") as trace_file:
+            trace_file.writelines(lines)
+
+        self.exported += 1
+
+
+tracer = Tracer()
+
+
+def _get_attributes(signature, args, kwargs):
+    arguments = signature.bind_partial(*args, **kwargs).arguments
+
+    return {name: arguments[name] for name in TRACED_ARGUMENTS if name in arguments}
+
+
+def trace(name):
+    """
+    Decorator that runs a function or coroutine function in a span while tracing is enabled. Arguments named in
+    TRACED_ARGUMENTS are recorded as attributes.
+
+    :param name: Name of the span
+    :return: Decorator
+    """
+
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await function(*args, **kwargs)
+
+                with tracer.span(name, **_get_attributes(signature, args, kwargs)):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+
+            with tracer.span(name, **_get_attributes(signature, args, kwargs)):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced(cls):
+    """
+    Class decorator that applies trace() to every public method defined on the class. Static methods and
+    generators are left as they are.
+
+    :param cls: The class to trace
+    :return: The class
+    """
+
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attribute):
+            continue
+
+        if inspect.isgeneratorfunction(attribute) or inspect.isasyncgenfunction(attribute):
+            continue
+
+        setattr(cls, name, trace(name)(attribute))
+
+    return cls
@@ -1,19 +1,101 @@
+import json
 import os
+import threading
 
-from dotenv import load_dotenv
+DOTENV_FILEPATH = os.getcwd() + "/.env"
 
-# Load environment variables
-path_to_dotenv_file = os.getcwd() + "/.env"
-load_dotenv(path_to_dotenv_file)
+
+def atomic_write_json(path, data):
+    """
+    Writes data to a JSON file. The data is written and flushed to a temporary file first, which then replaces
+    path, so a crash cannot leave a truncated file behind.
+
+    :param path: Filepath to write to
+    :param data: JSON-serializable data
+    :return: None
+    """
+
+    temporary_path = path + ".tmp"
+
+    with open(temporary_path, "w") as json_file:
+        json.dump(data, json_file)
+        json_file.flush()
+        os.fsync(json_file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def read_json(path, default=None):
+    """
+    Reads a JSON file written by atomic_write_json().
+
+    :param path: Filepath to read
+    :param default: Returned if the file does not exist or cannot be parsed
+    :return: The parsed data, or default
+    """
+
+    try:
+        with open(path, "r") as json_file:
+            return json.load(json_file)
+
+    except FileNotFoundError:
+        return default
+
+    except (OSError, ValueError):
+        print(f"WARNING: Could not read {path}")
+        return default
+
+
+class Config:
+    """
+    Environment variables, falling back to the .env file. The file is parsed once, when the first variable is
+    read, rather than when this module is imported.
+    """
+
+    def __init__(self, dotenv_filepath=DOTENV_FILEPATH):
+        self.dotenv_filepath = dotenv_filepath
+        self._values = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Parses the .env file unless it has been parsed already.
+
+        :return: Dict of the variables in the file
+        """
+
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    from dotenv import dotenv_values
+
+                    self._values = dotenv_values(self.dotenv_filepath)
+
+        return self._values
+
+    def get(self, name):
+        """
+        Returns a variable. As with load_dotenv(), the process environment takes precedence over the .env file.
+
+        :param name: Name of the variable
+        :return: str, or None if it is not set
+        """
+
+        value = os.environ.get(name)
+
+        return value if value is not None else self.load().get(name)
+
+
+config = Config()
 
 
 class CoinbaseProCredentials:
     """Coinbase Pro API keys"""
 
     def __init__(self):
-        self.api_key = os.getenv("CB_API_KEY")
-        self.secret_key = os.getenv("CB_API_SECRET")
-        self.passphrase = os.getenv("CB_API_PASS")
+        self.api_key = config.get("CB_API_KEY")
+        self.secret_key = config.get("CB_API_SECRET")
+        self.passphrase = config.get("CB_API_PASS")
 
     @property
     def empty_credentials(self):
@@ -26,9 +108,24 @@ class CoinbaseSandboxCredentials:
     """Coinbase Sandbox API keys"""
 
     def __init__(self):
-        self.api_key = os.getenv("CB_API_KEY_TEST")
-        self.secret_key = os.getenv("CB_API_SECRET_TEST")
-        self.passphrase = os.getenv("CB_API_PASS_TEST")
+        self.api_key = config.get("CB_API_KEY_TEST")
+        self.secret_key = config.get("CB_API_SECRET_TEST")
+        self.passphrase = config.get("CB_API_PASS_TEST")
+
+    @property
+    def empty_credentials(self):
+        """True if any credential is empty; False otherwise"""
+
+        return not (bool(self.api_key) and bool(self.secret_key) and bool(self.passphrase))
+
+
+class PortfolioCredentials:
+    """Coinbase Pro API keys of one portfolio, read from variables named <PREFIX>_CB_API_KEY etc."""
+
+    def __init__(self, prefix):
+        self.api_key = config.get(f"{prefix}_CB_API_KEY")
+        self.secret_key = config.get(f"{prefix}_CB_API_SECRET")
+        self.passphrase = config.get(f"{prefix}_CB_API_PASS")
 
     @property
     def empty_credentials(self):
@@ -41,8 +138,8 @@ class EmailCredentials:
     """User's email credentials"""
 
     def __init__(self):
-        self.email_address = os.getenv("EMAIL_ADDRESS")
-        self.password = os.getenv("EMAIL_PASSWORD")
+        self.email_address = config.get("EMAIL_ADDRESS")
+        self.password = config.get("EMAIL_PASSWORD")
 
     @property
     def empty_credentials(self):
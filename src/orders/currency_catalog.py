@@ -0,0 +1,114 @@
+import os
+import threading
+from time import time
+
+import requests
+
+from src.coinbase.utilities import atomic_write_json, read_json
+
+CURRENCIES_URL = "https://api.exchange.coinbase.com/currencies"
+CATALOG_FILEPATH = os.getcwd() + "/currencies.json"
+
+# Seconds before the catalog is downloaded again. Listings change rarely, so a day is plenty.
+CATALOG_TTL = 24 * 60 * 60
+
+
+class CurrencyCatalog:
+    """
+    Set of currency symbols supported by Coinbase, downloaded with a single request to /currencies.
+
+    The catalog is saved to path and reused until it is older than ttl. In offline mode the saved catalog is
+    trusted regardless of its age and no request is made.
+    """
+
+    def __init__(self, path=CATALOG_FILEPATH, ttl=CATALOG_TTL, offline=False, url=CURRENCIES_URL):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.url = url
+        self.fetched_at = None
+        self._symbols = None
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """Returns True if the catalog has not been loaded or is older than ttl."""
+
+        return self.fetched_at is None or time() - self.fetched_at >= self.ttl
+
+    def get_symbols(self):
+        """
+        Returns the supported symbols, reading the saved catalog or downloading it as needed.
+
+        :return: frozenset of upper case symbols
+        """
+
+        with self._lock:
+            if self._symbols is None and self.path is not None and os.path.exists(self.path):
+                self.load()
+
+            if self._symbols is None and self.offline:
+                raise RuntimeError(f"ERROR: No saved currency catalog at {self.path} to use offline")
+
+            if self.is_stale() and not self.offline:
+                try:
+                    self.refresh()
+
+                # A stale catalog is better than none
+                except RuntimeError:
+                    if self._symbols is None:
+                        raise
+
+                    print("WARNING: Could not refresh the currency catalog; using the saved catalog")
+
+            return self._symbols
+
+    def is_supported(self, symbol):
+        """
+        Checks if Coinbase supports a currency.
+
+        :param symbol: Currency symbol such as "BTC"
+        :return: True if supported; False otherwise
+        """
+
+        return symbol.upper() in self.get_symbols()
+
+    def __contains__(self, symbol):
+        return self.is_supported(symbol)
+
+    def refresh(self):
+        """Downloads the catalog and saves it to self.path."""
+
+        try:
+            r = requests.get(self.url, timeout=10)
+
+        except requests.RequestException as e:
+            raise RuntimeError(f"ERROR: Could not retrieve the currency catalog: {str(e)}")
+
+        if r.status_code != 200:
+            raise RuntimeError(f"ERROR: Could not retrieve the currency catalog: {r.content}")
+
+        self._symbols = frozenset(currency["id"].upper() for currency in r.json())
+        self.fetched_at = time()
+
+        if self.path is not None:
+            self.save()
+
+    def save(self):
+        """Writes the catalog to self.path."""
+
+        atomic_write_json(self.path, {"fetched_at": self.fetched_at, "currencies": sorted(self._symbols)})
+
+    def load(self):
+        """Reads the catalog saved in self.path."""
+
+        catalog = read_json(self.path)
+
+        if catalog is None:
+            return
+
+        try:
+            self._symbols = frozenset(catalog["currencies"])
+            self.fetched_at = catalog["fetched_at"]
+
+        except (KeyError, TypeError):
+            print(f"WARNING: Could not read currency catalog file {self.path}")
@@ -4,6 +4,7 @@ class InputCollector:
         self.start_time = None
         self.frequency = None
         self.orders = None
+        self.schedules = []
 
     def get_start_date(self):
         """Checks if the start date the user inputs is valid."""
@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+
+from src.orders.utilities import DataInputVerifier
+
+# Order file extensions and the format each one is read as
+ORDER_FILE_FORMATS = {".yaml": "yaml", ".yml": "yaml", ".json": "json", ".csv": "csv"}
+
+# Columns of a CSV order file; rows that share the schedule columns are grouped into one schedule
+CSV_ORDER_COLUMNS = ("crypto", "amount_usd")
+CSV_SCHEDULE_COLUMNS = ("name", "start_date", "start_time", "frequency")
+
+# Keys of a schedule that hold one value each, whether they are required, and the message of an invalid value
+SCHEDULE_FIELDS = (
+    ("name", False, "Schedule name '{}' is not valid!"),
+    ("start_date", True, "Date string '{}' is not valid!"),
+    ("start_time", True, "Time string '{}' is not valid!"),
+    ("frequency", True, "Frequency '{}' is not valid!"),
+)
+
+# Keys of a schedule that hold one value per order
+ORDER_FIELDS = ("crypto", "amount_usd")
+
+
+def load_yaml(filepath):
+    """
+    Loads a YAML file with every scalar kept as a string, using the LibYAML parser when PyYAML was built with it.
+
+    :param filepath: Filepath to the YAML file
+    :return: The parsed document
+    """
+
+    import yaml
+
+    with open(filepath, "r") as yaml_file:
+        return yaml.load(yaml_file, Loader=getattr(yaml, "CBaseLoader", yaml.BaseLoader))
+
+
+def load_json(filepath):
+    """
+    Loads a JSON file with numbers kept as the strings they were written as, like the YAML loader does.
+
+    :param filepath: Filepath to the JSON file
+    :return: The parsed document
+    """
+
+    with open(filepath, "r") as json_file:
+        return json.load(json_file, parse_int=str, parse_float=str)
+
+
+def load_csv(filepath):
+    """
+    Loads a CSV file with one order per row. The crypto and amount_usd columns are required; rows with the same
+    name, start_date, start_time and frequency form one schedule. A file with a single unnamed schedule is
+    returned in the format of a single-schedule YAML file, and any other file as a schedules list.
+
+    :param filepath: Filepath to the CSV file
+    :return: The parsed document
+    """
+
+    schedules = {}
+
+    with open(filepath, "r", newline="") as csv_file:
+        reader = csv.DictReader(csv_file, skipinitialspace=True)
+        missing = [column for column in CSV_ORDER_COLUMNS if column not in (reader.fieldnames or ())]
+
+        if missing:
+            raise RuntimeError(f"CSV order file {filepath} has no {', '.join(missing)} column!")
+
+        for row in reader:
+            key = tuple(row.get(column) or None for column in CSV_SCHEDULE_COLUMNS)
+            schedule = schedules.get(key)
+
+            if schedule is None:
+                schedule = {column: value for column, value in zip(CSV_SCHEDULE_COLUMNS, key) if value is not None}
+                schedule.update({column: [] for column in CSV_ORDER_COLUMNS})
+                schedules[key] = schedule
+
+            for column in CSV_ORDER_COLUMNS:
+                schedule[column].append(row[column] or "")
+
+    if len(schedules) == 1:
+        (schedule,) = schedules.values()
+
+        if "name" not in schedule:
+            return schedule
+
+    return {"schedules": list(schedules.values())}
+
+
+def load_order_file(filepath):
+    """
+    Loads an order file in any of the ORDER_FILE_FORMATS, chosen by its extension.
+
+    :param filepath: Filepath to the order file
+    :return: The parsed document, with every value a string as YAMLInputCollector expects
+    """
+
+    extension = os.path.splitext(filepath)[1].lower()
+    file_format = ORDER_FILE_FORMATS.get(extension)
+
+    if file_format is None:
+        raise RuntimeError(f"Order file {filepath} must end in one of {', '.join(ORDER_FILE_FORMATS)}!")
+
+    if file_format == "json":
+        return load_json(filepath)
+
+    if file_format == "csv":
+        return load_csv(filepath)
+
+    return load_yaml(filepath)
+
+
+def format_error(location, message):
+    """Prefixes an error message with the location of the value it is about, e.g. "schedules[0].crypto[1]"."""
+
+    return f"{location}: {message}" if location else message
+
+
+def is_valid_name(name):
+    """Checks if a schedule name is a non-empty string without a colon, which separates it in client_oids."""
+
+    return isinstance(name, str) and bool(name) and ":" not in name
+
+
+class OrderSchema:
+    """
+    Schema of an order document: either a single schedule, or a schedules list of them. The schema is compiled
+    once into a check per key, and validate() runs every check over the whole document in one pass, so that all
+    errors are reported together rather than one per attempt. The orders of every schedule are validated in a
+    single batch, against one read of the currency catalog.
+    """
+
+    def __init__(self, schedule_fields=SCHEDULE_FIELDS):
+        """
+        :param schedule_fields: Tuples of (key, required, error message) for the values of a schedule
+        """
+
+        checks = {
+            "name": is_valid_name,
+            "start_date": DataInputVerifier.is_valid_date_string,
+            "start_time": DataInputVerifier.is_valid_time_string,
+            "frequency": DataInputVerifier.is_valid_frequency,
+        }
+
+        self.schedule_checks = [(key, required, checks[key], message) for key, required, message in schedule_fields]
+
+    @staticmethod
+    def get_order_columns(block):
+        """Returns the crypto and amount_usd lists of a schedule, or None in place of either if it is not a list."""
+
+        return tuple(block.get(key) if isinstance(block.get(key), list) else None for key in ORDER_FIELDS)
+
+    def validate(self, document):
+        """
+        Validates an order document.
+
+        :param document: Document returned by load_order_file()
+        :return: Tuple of the list of schedules, in the keyword arguments of CoinbaseBot.add_schedule(), and the
+            list of error messages; the schedules are only complete if there are no errors
+        """
+
+        if not isinstance(document, dict):
+            return [], ["Orders must be a mapping!"]
+
+        # A single schedule is unnamed; a name next to it belongs to the portfolio it is part of
+        if "schedules" not in document:
+            blocks = [{**document, "name": None}]
+
+        else:
+            blocks = document["schedules"]
+
+            if not isinstance(blocks, list) or not blocks:
+                return [], ["Schedules must be a non-empty list!"]
+
+        # Orders of lists that do not match in length are validated up to the shorter one
+        orders = [
+            order
+            for block in blocks
+            if isinstance(block, dict)
+            for order in zip(*(column or () for column in self.get_order_columns(block)))
+        ]
+        reports = iter(DataInputVerifier.validate_orders(orders))
+        errors = []
+
+        if "schedules" not in document:
+            return [self.validate_schedule(blocks[0], "", reports, errors)], errors
+
+        schedules = []
+        names = set()
+
+        for index, block in enumerate(blocks):
+            location = f"schedules[{index}]"
+
+            if not isinstance(block, dict):
+                errors.append(format_error(location, "Every schedule must be a mapping!"))
+                continue
+
+            schedule = self.validate_schedule(block, location, reports, errors)
+
+            name = schedule["name"]
+
+            # Names that failed validation may not even be hashable, and were reported already
+            if is_valid_name(name):
+                if name in names:
+                    errors.append(format_error(location, f"Schedule name '{name}' is used more than once!"))
+
+                names.add(name)
+
+            schedules.append(schedule)
+
+        return schedules, errors
+
+    def validate_schedule(self, block, location, reports, errors):
+        """
+        Validates one schedule, appending an error message for each problem found.
+
+        :param block: Mapping of the schedule's keys
+        :param location: Location of the schedule in error messages, e.g. "schedules[0]"; empty for a single one
+        :param reports: Iterator of the schedule's OrderReports from DataInputVerifier.validate_orders(), which
+            are consumed
+        :param errors: List the error messages are appended to
+        :return: The schedule in the keyword arguments of CoinbaseBot.add_schedule()
+        """
+
+        prefix = location + "." if location else ""
+        schedule = {}
+        valid = {}
+
+        for key, required, check, message in self.schedule_checks:
+            value = block.get(key)
+
+            if value is None:
+                valid[key] = not required
+
+                if required:
+                    errors.append(format_error(prefix + key, f"'{key}' is missing!"))
+
+            else:
+                valid[key] = check(value)
+
+                if not valid[key]:
+                    errors.append(format_error(prefix + key, message.format(value)))
+
+            schedule[key] = value
+
+        start_date, start_time = schedule["start_date"], schedule["start_time"]
+
+        if valid["start_date"] and valid["start_time"]:
+            if not DataInputVerifier.is_valid_date_and_time_to_start(start_date, start_time):
+                errors.append(format_error(location, f"Datetime string '{start_date} {start_time}' is not valid!"))
+
+        columns = self.get_order_columns(block)
+
+        for key, column in zip(ORDER_FIELDS, columns):
+            if column is None:
+                errors.append(format_error(prefix + key, f"'{key}' must be a list!"))
+
+        crypto_list, amount_usd_list = (column or [] for column in columns)
+
+        if None not in columns and len(crypto_list) != len(amount_usd_list):
+            errors.append(format_error(location, "Number of crypto symbols does not match number of amounts given."))
+
+        schedule["orders"] = {}
+
+        for index in range(min(len(crypto_list), len(amount_usd_list))):
+            report = next(reports)
+
+            # The report lists the crypto symbol's error before the dollar amount's
+            if not report.valid_crypto:
+                errors.append(format_error(f"{prefix}crypto[{index}]", report.errors[0]))
+
+            if not report.valid_dollar_amount:
+                errors.append(format_error(f"{prefix}amount_usd[{index}]", report.errors[-1]))
+
+            # Invalid symbols may not even be hashable, so only valid orders are kept
+            if not report.errors:
+                schedule["orders"][report.crypto] = report.dollar_amount
+
+        return schedule
+
+    def get_schedules(self, document):
+        """
+        Validates an order document and returns its schedules.
+
+        :param document: Document returned by load_order_file()
+        :return: List of schedules in the keyword arguments of CoinbaseBot.add_schedule()
+        """
+
+        schedules, errors = self.validate(document)
+
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+        return schedules
+
+
+# Compiled once and shared by every collector
+order_schema = OrderSchema()
@@ -0,0 +1,96 @@
+import os
+
+from src.coinbase.utilities import PortfolioCredentials
+from src.orders.input_collection import InputCollector
+from src.orders.order_file import load_yaml
+from src.orders.yaml_input_collector import YAMLInputCollector
+
+PORTFOLIOS_FILEPATH = os.getcwd() + "/portfolios.yaml"
+
+
+class PortfolioInputCollector(YAMLInputCollector):
+    """Collects and validates a single portfolio's entry of portfolios.yaml."""
+
+    def __init__(self, portfolio):
+        InputCollector.__init__(self)
+        self.yaml_file = portfolio
+        self.name = None
+        self.credentials = None
+
+    def get_name(self):
+        """Checks if the portfolio name is valid."""
+
+        name = self.yaml_file.get("name")
+
+        if not isinstance(name, str) or not name:
+            raise RuntimeError("Portfolio name cannot be null!")
+
+        return name
+
+    def get_credentials(self):
+        """Reads the portfolio's API keys from the environment variables named by credentials_prefix."""
+
+        prefix = self.yaml_file.get("credentials_prefix")
+
+        if not isinstance(prefix, str) or not prefix:
+            raise RuntimeError(f"Portfolio '{self.name}' has no credentials_prefix!")
+
+        credentials = PortfolioCredentials(prefix)
+
+        if credentials.empty_credentials:
+            raise RuntimeError(f"No API credentials found for portfolio '{self.name}' with prefix '{prefix}'!")
+
+        return credentials
+
+    def collect_inputs(self):
+        """Driver function to collect the portfolio's inputs."""
+
+        self.name = self.get_name()
+        self.credentials = self.get_credentials()
+        super().collect_inputs()
+
+
+class PortfoliosYAMLCollector:
+    """Loads every portfolio defined in a portfolios.yaml file."""
+
+    def __init__(self, yaml_filepath=PORTFOLIOS_FILEPATH, verbose=False):
+        self.yaml_file = None
+        self.portfolios = []
+        self.load_yaml_file(yaml_filepath, verbose)
+
+    def load_yaml_file(self, yaml_filepath=PORTFOLIOS_FILEPATH, verbose=False):
+        """
+        Loads the YAML file from the given filepath.
+
+        :param yaml_filepath: Filepath to the YAML file
+        :param verbose: True to print the loaded YAML file; False otherwise
+        :return: None
+        """
+
+        self.yaml_file = load_yaml(yaml_filepath)
+
+        if verbose:
+            print(self.yaml_file)
+
+    def collect_inputs(self):
+        """Driver function to collect and validate every portfolio."""
+
+        entries = (self.yaml_file or {}).get("portfolios")
+
+        if not isinstance(entries, list) or not entries:
+            raise RuntimeError("No portfolios defined!")
+
+        portfolios = []
+        names = set()
+
+        for entry in entries:
+            portfolio = PortfolioInputCollector(entry)
+            portfolio.collect_inputs()
+
+            if portfolio.name in names:
+                raise RuntimeError(f"Portfolio name '{portfolio.name}' is used more than once!")
+
+            names.add(portfolio.name)
+            portfolios.append(portfolio)
+
+        self.portfolios = portfolios
@@ -1,8 +1,14 @@
+from collections import namedtuple
 from datetime import datetime
 
-import requests
-
 from src.coinbase.frequency import FREQUENCY_TO_DAYS
+from src.orders.currency_catalog import CurrencyCatalog
+
+# Symbols supported by Coinbase, downloaded once and shared by every lookup
+currency_catalog = CurrencyCatalog()
+
+# Result of validating one order; errors is empty if the order is valid
+OrderReport = namedtuple("OrderReport", ["crypto", "dollar_amount", "valid_crypto", "valid_dollar_amount", "errors"])
 
 
 class DataInputVerifier:
@@ -139,7 +145,8 @@ class DataInputVerifier:
     @staticmethod
     def is_valid_crypto(crypto):
         """
-        Checks if provided crypto string is valid.
+        Checks if provided crypto string is valid. Symbols are looked up in the shared currency catalog, so only
+        the first call may make a request.
 
         :param crypto: str
         :return: True if valid; False otherwise
@@ -159,13 +166,51 @@ class DataInputVerifier:
         crypto = crypto.upper()
 
         # Check if the API supports the inputted crypto.
-        r = requests.get("https://api.exchange.coinbase.com/currencies/" + crypto)
-        if r.status_code != 200:
-            print(f"Invalid crypto symbol {crypto}.")
+        try:
+            if not currency_catalog.is_supported(crypto):
+                print(f"Invalid crypto symbol {crypto}.")
+                return False
+
+        except RuntimeError as e:
+            print(str(e))
             return False
 
         return True
 
+    @staticmethod
+    def validate_orders(orders):
+        """
+        Validates a list of orders at once. The currency catalog is read once, refreshing it if needed, so the
+        only request made is at most one download of the catalog; every symbol is then checked against it.
+
+        :param orders: List of (crypto, dollar_amount) tuples
+        :return: List of OrderReport, one per order in the same order
+        """
+
+        try:
+            symbols = currency_catalog.get_symbols()
+
+        except RuntimeError as e:
+            print(str(e))
+            symbols = frozenset()
+
+        reports = []
+
+        for crypto, dollar_amount in orders:
+            valid_crypto = isinstance(crypto, str) and crypto.isalpha() and crypto.upper() in symbols
+            valid_dollar_amount = DataInputVerifier.is_valid_dollar_amount(dollar_amount)
+            errors = []
+
+            if not valid_crypto:
+                errors.append(f"Cryptocurrency symbol '{crypto}' is not valid!")
+
+            if not valid_dollar_amount:
+                errors.append(f"Dollar amount '{dollar_amount}' is not valid!")
+
+            reports.append(OrderReport(crypto, dollar_amount, valid_crypto, valid_dollar_amount, errors))
+
+        return reports
+
     @staticmethod
     def is_valid_dollar_amount(dollar_amount):
         """
@@ -1,9 +1,7 @@
 import os
 
-import yaml
-
 from src.orders.input_collection import InputCollector
-from src.orders.utilities import DataInputVerifier
+from src.orders.order_file import load_order_file, order_schema
 
 YAML_FILEPATH = os.getcwd() + "/orders.yaml"
 
@@ -16,84 +14,28 @@ class YAMLInputCollector(InputCollector):
 
     def load_yaml_file(self, yaml_filepath=YAML_FILEPATH, verbose=False):
         """
-        Loads the YAML file from the given filepath.
+        Loads the orders file from the given filepath. JSON and CSV files are read as well as YAML.
 
-        :param yaml_filepath: Filepath to the YAML file
-        :param verbose: True to print the loaded YAML file; False otherwise
+        :param yaml_filepath: Filepath to the orders file
+        :param verbose: True to print the loaded orders; False otherwise
         :return: None
         """
 
-        with open(yaml_filepath, "r") as yaml_file:
-            self.yaml_file = yaml.load(yaml_file, Loader=yaml.BaseLoader)
+        self.yaml_file = load_order_file(yaml_filepath)
 
         if verbose:
             print(self.yaml_file)
 
-    def get_start_date(self):
-        """Checks if the start date the user inputs is valid."""
-
-        start_date = self.yaml_file["start_date"]
-
-        if not DataInputVerifier.is_valid_date_string(start_date):
-            raise RuntimeError(f"Date string '{start_date}' is not valid!")
-
-        return start_date
-
-    def get_start_time(self):
-        """Checks if the start time the user inputs is valid."""
-
-        start_time = self.yaml_file["start_time"]
-
-        if not DataInputVerifier.is_valid_time_string(start_time):
-            raise RuntimeError(f"Time string '{start_time}' is not valid!")
-
-        return start_time
-
-    def get_start_datetime(self):
-        """Checks if the start date and time the user inputs is valid."""
-
-        start_date = self.get_start_date()
-        start_time = self.get_start_time()
-
-        if not DataInputVerifier.is_valid_date_and_time_to_start(start_date, start_time):
-            raise RuntimeError(f"Datetime string '{start_date} {start_time}' is not valid!")
-
-        return start_date, start_time
-
-    def get_frequency(self):
-        """Checks if the frequency the user inputs is valid."""
-
-        frequency = self.yaml_file["frequency"]
-
-        if not DataInputVerifier.is_valid_frequency(frequency):
-            raise RuntimeError(f"Frequency '{frequency}' is not valid!")
-
-        return frequency
-
-    def get_orders(self):
-        """Constructs a dictionary of valid orders."""
-
-        orders = {}
-        crypto_list = self.yaml_file["crypto"]
-        amount_usd_list = self.yaml_file["amount_usd"]
-
-        if len(crypto_list) != len(amount_usd_list):
-            raise RuntimeError("Number of crypto symbols does not match number of amounts given.")
-
-        for crypto, dollar_amount in zip(crypto_list, amount_usd_list):
-            if not DataInputVerifier.is_valid_crypto(crypto):
-                raise RuntimeError(f"Cryptocurrency symbol '{crypto}' is not valid!")
-
-            if not DataInputVerifier.is_valid_dollar_amount(dollar_amount):
-                raise RuntimeError(f"Dollar amount '{dollar_amount}' is not valid!")
-
-            orders[crypto] = dollar_amount
-
-        return orders
-
     def collect_inputs(self):
-        """Driver function to collect user inputs."""
+        """
+        Driver function to collect user inputs. A file with a schedules list sets self.schedules to every block,
+        and the single-schedule attributes to the first one. The whole file is validated at once, and the
+        RuntimeError raised lists every error in it.
+        """
 
-        self.start_date, self.start_time = self.get_start_datetime()
-        self.frequency = self.get_frequency()
-        self.orders = self.get_orders()
+        self.schedules = order_schema.get_schedules(self.yaml_file)
+        first = self.schedules[0]
+        self.start_date = first["start_date"]
+        self.start_time = first["start_time"]
+        self.frequency = first["frequency"]
+        self.orders = first["orders"]
@@ -0,0 +1,557 @@
+import base64
+import hashlib
+import hmac
+import json
+import math
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep, time
+from urllib.parse import parse_qsl, urlsplit
+
+MOCK_API_KEY = "mock-api-key"
+MOCK_SECRET_KEY = base64.b64encode(b"mock-secret-key").decode()
+MOCK_PASSPHRASE = "mock-passphrase"
+
+DEFAULT_CURRENCIES = ["USD", "BTC", "ETH", "ADA", "SOL", "DOT", "LINK", "LTC", "DOGE", "AVAX", "MATIC", "XLM"]
+DEFAULT_PRICE = 100.0
+
+# Taker fee charged on every fill
+FEE_RATE = 0.005
+
+# Seconds a request timestamp may be off by before the request is rejected
+TIMESTAMP_TOLERANCE = 30
+
+# Endpoints that do not require authentication
+PUBLIC_ENDPOINTS = ("currencies", "products")
+
+# Candle sizes in seconds accepted by the candles endpoint, and the most candles it returns per request
+CANDLE_GRANULARITIES = (60, 300, 900, 3600, 21600, 86400)
+MAX_CANDLES = 300
+
+# Period in seconds of the price wave that synthetic candles follow
+CANDLE_PRICE_PERIOD = 30 * 86400
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MockExchangeRequestHandler(BaseHTTPRequestHandler):
+    """Reads each request and writes the response chosen by the MockCoinbaseExchange serving it."""
+
+    protocol_version = "HTTP/1.1"
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+
+        status, payload, headers = self.server.dispatch(self.command, self.path, self.headers, body)
+
+        # The request was handled but its response is lost, as on a network failure
+        if status is None:
+            self.close_connection = True
+            return
+
+        content = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = handle_request
+    do_POST = handle_request
+    do_DELETE = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockCoinbaseExchange(ThreadingHTTPServer):
+    """
+    In-process stand-in for the Coinbase Pro endpoints used by the bot, for tests and benchmarks.
+
+    Private endpoints check the CB-ACCESS-* headers exactly as Coinbase does. Market orders fill at a fixed price
+    per product against an in-memory USD balance. Latency, injected errors and rate limits can be configured,
+    and every request is counted.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        api_key=MOCK_API_KEY,
+        secret_key=MOCK_SECRET_KEY,
+        passphrase=MOCK_PASSPHRASE,
+        usd_balance=1000.0,
+        currencies=None,
+        prices=None,
+        latency=0.0,
+        rate_limit=None,
+        public_rate_limit=None,
+        polls_until_done=0,
+        fills_per_order=1,
+        host="127.0.0.1",
+        port=0,
+    ):
+        super().__init__((host, port), MockExchangeRequestHandler)
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+        self.currencies = list(DEFAULT_CURRENCIES if currencies is None else currencies)
+        self.prices = dict(prices or {})
+        self.latency = latency
+        self.rate_limits = {"private": rate_limit, "public": public_rate_limit}
+        self.polls_until_done = polls_until_done
+        self.fills_per_order = fills_per_order
+        self.payment_method_id = str(uuid.uuid4())
+        self.profile_id = str(uuid.uuid4())
+        self.balances = {"USD": float(usd_balance)}
+        self.wallet_ids = {}
+        self.orders = {}
+        self.fills = []
+        self.deposits = []
+        self.candle_gaps = set()
+        self.requests = []
+        self.status_counts = {}
+        self._failures = {}
+        self._dropped_responses = {}
+        self._order_polls = {}
+        self._recent_requests = {"private": deque(), "public": deque()}
+        self._next_trade_id = 1
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL to pass to the handlers as api_url."""
+
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/"
+
+    @property
+    def credentials(self):
+        """Keyword arguments for CoinbaseExchangeAuth that the exchange accepts."""
+
+        return {"api_key": self.api_key, "secret_key": self.secret_key, "passphrase": self.passphrase}
+
+    def start(self):
+        """Serves requests on a background thread."""
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the listening socket."""
+
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def fail(self, method, endpoint, status=500, message="Internal server error", times=1):
+        """
+        Makes the next requests to an endpoint fail.
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to the base URL without the query string, e.g. "orders"
+        :param status: HTTP status code to respond with
+        :param message: Error message to respond with
+        :param times: Number of requests to fail
+        :return: None
+        """
+
+        with self._lock:
+            self._failures.setdefault((method, endpoint), deque()).extend([(status, message)] * times)
+
+    def drop_responses(self, method, endpoint, times=1):
+        """
+        Handles the next requests to an endpoint but closes the connection instead of responding, as if the
+        response were lost on the network.
+
+        :param method: HTTP method as a string
+        :param endpoint: Path relative to the base URL without the query string, e.g. "orders"
+        :param times: Number of responses to drop
+        :return: None
+        """
+
+        with self._lock:
+            self._dropped_responses[(method, endpoint)] = self._dropped_responses.get((method, endpoint), 0) + times
+
+    def get_request_count(self, method=None, endpoint=None):
+        """
+        Counts the requests received.
+
+        :param method: Optional HTTP method to count
+        :param endpoint: Optional path relative to the base URL without the query string
+        :return: int
+        """
+
+        with self._lock:
+            return sum(
+                1
+                for request_method, request_endpoint, _ in self.requests
+                if method in (None, request_method) and endpoint in (None, request_endpoint)
+            )
+
+    def add_fill(self, product_id, order_id, price, size, created_at=None):
+        """
+        Stores a fill, as if an order had been matched.
+
+        :param product_id: Product ID such as "BTC-USD"
+        :param order_id: ID of the order the fill belongs to
+        :param price: Price per unit in USD
+        :param size: Amount of the cryptocurrency bought
+        :param created_at: Optional ISO 8601 timestamp; defaults to now
+        :return: The fill as a dict
+        """
+
+        with self._lock:
+            return self._add_fill(product_id, order_id, price, size, created_at)
+
+    def _add_fill(self, product_id, order_id, price, size, created_at=None):
+        usd_volume = price * size
+        fill = {
+            "trade_id": self._next_trade_id,
+            "product_id": product_id,
+            "order_id": order_id,
+            "created_at": created_at or _now(),
+            "side": "buy",
+            "price": f"{price:.2f}",
+            "size": f"{size:.8f}",
+            "fee": f"{usd_volume * FEE_RATE:.10f}",
+            "usd_volume": f"{usd_volume:.10f}",
+            "liquidity": "T",
+            "settled": True,
+        }
+
+        self._next_trade_id += 1
+        self.fills.append(fill)
+
+        return fill
+
+    def dispatch(self, method, path, headers, body):
+        """
+        Chooses the response to a request.
+
+        :return: Tuple of status code, JSON-serializable body and dict of extra headers
+        """
+
+        url = urlsplit(path)
+        endpoint = url.path.strip("/")
+        query = dict(parse_qsl(url.query))
+        scope = "public" if endpoint.split("/")[0] in PUBLIC_ENDPOINTS else "private"
+
+        with self._lock:
+            self.requests.append((method, endpoint, query))
+
+        if self.latency:
+            sleep(self.latency)
+
+        status, payload, extra_headers = self._route(method, path, endpoint, query, scope, headers, body)
+
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+            if self._dropped_responses.get((method, endpoint)):
+                self._dropped_responses[(method, endpoint)] -= 1
+                return None, None, {}
+
+        return status, payload, extra_headers
+
+    def _route(self, method, path, endpoint, query, scope, headers, body):
+        if self._is_rate_limited(scope):
+            return 429, {"message": "Rate limit exceeded"}, {"Retry-After": "1"}
+
+        with self._lock:
+            failures = self._failures.get((method, endpoint))
+
+            if failures:
+                status, message = failures.popleft()
+                return status, {"message": message}, {}
+
+        if scope == "private":
+            error = self.authenticate(method, path, headers, body)
+
+            if error is not None:
+                return 401, {"message": error}, {}
+
+        segments = endpoint.split("/")
+
+        with self._lock:
+            if method == "GET" and endpoint == "payment-methods":
+                return 200, self._get_payment_methods(), {}
+
+            if method == "POST" and endpoint == "deposits/payment-method":
+                return self._create_deposit(json.loads(body or "{}"))
+
+            if method == "GET" and endpoint == "coinbase-accounts":
+                return 200, self._get_wallets(), {}
+
+            if method == "GET" and endpoint == "profiles":
+                return 200, [{"id": self.profile_id, "name": "default", "is_default": True, "active": True}], {}
+
+            if method == "POST" and endpoint == "orders":
+                return self._create_order(json.loads(body or "{}"))
+
+            if method == "GET" and segments[0] == "orders" and len(segments) == 2:
+                return self._get_order(segments[1])
+
+            if method == "GET" and endpoint == "fills":
+                return self._get_fills(query)
+
+            if method == "GET" and endpoint == "currencies":
+                return 200, [{"id": symbol, "name": symbol, "status": "online"} for symbol in self.currencies], {}
+
+            if method == "GET" and segments[0] == "products" and segments[2:] == ["candles"]:
+                return self._get_candles(segments[1], query)
+
+            if method == "GET" and segments[0] == "currencies" and len(segments) == 2:
+                if segments[1] not in self.currencies:
+                    return 404, {"message": "NotFound"}, {}
+
+                return 200, {"id": segments[1], "name": segments[1], "status": "online"}, {}
+
+        return 404, {"message": "NotFound"}, {}
+
+    def _is_rate_limited(self, scope):
+        limit = self.rate_limits[scope]
+
+        if limit is None:
+            return False
+
+        now = monotonic()
+
+        with self._lock:
+            recent = self._recent_requests[scope]
+
+            while recent and now - recent[0] >= 1:
+                recent.popleft()
+
+            if len(recent) >= limit:
+                return True
+
+            recent.append(now)
+
+        return False
+
+    def authenticate(self, method, path, headers, body):
+        """
+        Verifies the CB-ACCESS-* headers of a request.
+
+        :return: None if the request is authentic; otherwise the error message
+        """
+
+        if headers.get("CB-ACCESS-KEY") != self.api_key:
+            return "Invalid API Key"
+
+        if headers.get("CB-ACCESS-PASSPHRASE") != self.passphrase:
+            return "Invalid Passphrase"
+
+        timestamp = headers.get("CB-ACCESS-TIMESTAMP") or ""
+
+        try:
+            if abs(time() - float(timestamp)) > TIMESTAMP_TOLERANCE:
+                return "request timestamp expired"
+
+        except ValueError:
+            return "invalid timestamp"
+
+        message = timestamp + method + path + body
+        signature = hmac.new(base64.b64decode(self.secret_key), message.encode(), hashlib.sha256)
+        expected = base64.b64encode(signature.digest()).decode()
+
+        if not hmac.compare_digest(headers.get("CB-ACCESS-SIGN") or "", expected):
+            return "invalid signature"
+
+        return None
+
+    def _get_payment_methods(self):
+        return [{"id": self.payment_method_id, "type": "ach_bank_account", "name": "Mock Bank", "currency": "USD"}]
+
+    def _get_wallets(self):
+        wallets = []
+
+        for currency, balance in self.balances.items():
+            wallet_id = self.wallet_ids.setdefault(currency, str(uuid.uuid4()))
+            name = "Cash (USD)" if currency == "USD" else f"{currency} Wallet"
+            wallets.append({"id": wallet_id, "name": name, "balance": f"{balance:.8f}", "currency": currency})
+
+        return wallets
+
+    def _create_deposit(self, deposit):
+        if deposit.get("payment_method_id") != self.payment_method_id:
+            return 400, {"message": "payment method not found"}, {}
+
+        amount = float(deposit.get("amount") or 0)
+
+        if amount <= 0:
+            return 400, {"message": "amount must be a positive number"}, {}
+
+        self.balances["USD"] += amount
+        deposit_record = {"id": str(uuid.uuid4()), "amount": f"{amount:.2f}", "currency": "USD", "payout_at": _now()}
+        self.deposits.append(deposit_record)
+
+        return 200, deposit_record, {}
+
+    def _create_order(self, order):
+        product_id = order.get("product_id") or ""
+        base_currency = product_id.split("-")[0]
+
+        if order.get("type") != "market" or order.get("side") != "buy":
+            return 400, {"message": "Only market buy orders are supported"}, {}
+
+        if not product_id.endswith("-USD") or base_currency not in self.currencies:
+            return 400, {"message": "Invalid product_id"}, {}
+
+        funds = float(order.get("funds") or 0)
+
+        if funds <= 0:
+            return 400, {"message": "funds must be a positive number"}, {}
+
+        if funds > self.balances["USD"]:
+            return 400, {"message": "Insufficient funds"}, {}
+
+        order_id = str(uuid.uuid4())
+        price = self.prices.get(base_currency, DEFAULT_PRICE)
+        fee = funds * FEE_RATE
+        size = (funds - fee) / price
+
+        for _ in range(self.fills_per_order):
+            self._add_fill(product_id, order_id, price, size / self.fills_per_order)
+
+        self.balances["USD"] -= funds
+        self.balances[base_currency] = self.balances.get(base_currency, 0.0) + size
+        self.orders[order_id] = {
+            "id": order_id,
+            "product_id": product_id,
+            "side": "buy",
+            "type": "market",
+            "specified_funds": f"{funds:.2f}",
+            "funds": f"{funds - fee:.10f}",
+            "filled_size": f"{size:.8f}",
+            "executed_value": f"{funds - fee:.10f}",
+            "fill_fees": f"{fee:.10f}",
+            "status": "pending",
+            "settled": False,
+            "created_at": _now(),
+        }
+
+        if order.get("client_oid"):
+            self.orders[order_id]["client_oid"] = order["client_oid"]
+
+        self._order_polls[order_id] = 0
+
+        return 200, self.orders[order_id], {}
+
+    def _get_order(self, order_id):
+        if order_id.startswith("client:"):
+            client_oid = order_id[len("client:") :]
+            order_id = next(
+                (order["id"] for order in self.orders.values() if order.get("client_oid") == client_oid), ""
+            )
+
+        order = self.orders.get(order_id)
+
+        if order is None:
+            return 404, {"message": "NotFound"}, {}
+
+        self._order_polls[order_id] += 1
+
+        if order["status"] != "done" and self._order_polls[order_id] > self.polls_until_done:
+            order.update(status="done", settled=True, done_at=_now(), done_reason="filled")
+
+        return 200, order, {}
+
+    def get_candle_price(self, product_id, time_):
+        """
+        Price that synthetic candles follow: a wave around the product's fixed price.
+
+        :param product_id: Product ID such as "BTC-USD"
+        :param time_: Seconds since the epoch
+        :return: float
+        """
+
+        price = self.prices.get(product_id.split("-")[0], DEFAULT_PRICE)
+
+        return price * (1 + 0.1 * math.sin(2 * math.pi * time_ / CANDLE_PRICE_PERIOD))
+
+    def _get_candles(self, product_id, query):
+        if product_id.split("-")[0] not in self.currencies:
+            return 404, {"message": "NotFound"}, {}
+
+        granularity = int(query.get("granularity", 60))
+
+        if granularity not in CANDLE_GRANULARITIES:
+            return 400, {"message": "Unsupported granularity"}, {}
+
+        start = int(datetime.fromisoformat(query["start"]).timestamp())
+        end = int(datetime.fromisoformat(query["end"]).timestamp())
+
+        if (end - start) // granularity + 1 > MAX_CANDLES:
+            return 400, {"message": "granularity too small for the requested time range"}, {}
+
+        # Candles are aligned to the granularity and come newest first; times in candle_gaps had no trades
+        first = -(-start // granularity) * granularity
+        candles = []
+
+        for time_ in range(end - end % granularity, first - 1, -granularity):
+            if time_ in self.candle_gaps:
+                continue
+
+            open_price = self.get_candle_price(product_id, time_)
+            close_price = self.get_candle_price(product_id, time_ + granularity)
+            low, high = sorted((open_price, close_price))
+            candles.append([time_, low, high, open_price, close_price, 1.0])
+
+        return 200, candles, {}
+
+    def _get_fills(self, query):
+        if "order_id" not in query and "product_id" not in query:
+            return 400, {"message": "product_id or order_id is required"}, {}
+
+        limit = int(query.get("limit", 100))
+        fills = [
+            fill
+            for fill in self.fills
+            if query.get("order_id") in (None, fill["order_id"])
+            and query.get("product_id") in (None, fill["product_id"])
+            and fill["created_at"][:10] >= query.get("start_date", "")
+            and (not query.get("end_date") or fill["created_at"][:10] < query["end_date"])
+        ]
+
+        # Pages are newest first; "after" walks to older fills and "before" to newer fills
+        if "before" in query:
+            page = sorted(
+                (fill for fill in fills if fill["trade_id"] > int(query["before"])), key=lambda fill: fill["trade_id"]
+            )[:limit]
+            page.reverse()
+
+        else:
+            cursor = int(query["after"]) if "after" in query else None
+            page = sorted(
+                (fill for fill in fills if cursor is None or fill["trade_id"] < cursor),
+                key=lambda fill: fill["trade_id"],
+                reverse=True,
+            )[:limit]
+
+        headers = {}
+
+        if page:
+            headers = {"CB-BEFORE": str(page[0]["trade_id"]), "CB-AFTER": str(page[-1]["trade_id"])}
+
+        return 200, page, headers
@@ -0,0 +1,135 @@
+import base64
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+
+class SMTPRequestHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib to log in and send messages."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def read_line(self):
+        return self.rfile.readline().decode().rstrip("\r\n")
+
+    def handle(self):
+        server = self.server
+        server.record("connections")
+        self.reply("220 localhost SMTP stand-in ready")
+
+        while True:
+            line = self.read_line()
+
+            if not line:
+                return
+
+            command = line.split(" ", 1)[0].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250 AUTH PLAIN LOGIN\r\n")
+
+            elif command == "AUTH":
+                self.authenticate(line)
+
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.receive_message()
+                self.reply("250 OK")
+
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+
+            else:
+                self.reply("502 Command not implemented")
+
+    def authenticate(self, line):
+        parts = line.split(" ")
+        mechanism = parts[1].upper()
+
+        if mechanism == "PLAIN":
+            _, username, password = base64.b64decode(parts[2]).decode().split("\0")
+
+        else:
+            self.reply("334 " + base64.b64encode(b"Username:").decode())
+            username = base64.b64decode(self.read_line()).decode()
+            self.reply("334 " + base64.b64encode(b"Password:").decode())
+            password = base64.b64decode(self.read_line()).decode()
+
+        if (username, password) != (self.server.username, self.server.password):
+            self.reply("535 Authentication credentials invalid")
+            return
+
+        self.server.record("logins")
+        self.reply("235 Authentication successful")
+
+    def receive_message(self):
+        lines = []
+
+        while True:
+            line = self.rfile.readline()
+
+            if line in (b".\r\n", b".\n", b""):
+                break
+
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+
+        with self.server.lock:
+            self.server.messages.append(message_from_bytes(b"".join(lines), policy=policy.default))
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    In-process SMTP server for tests. Accepts a single username/password and keeps every received message.
+
+    Counts connections and logins so tests can check how many sessions a sender opened.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, username, password, host="127.0.0.1", port=0):
+        super().__init__((host, port), SMTPRequestHandler)
+        self.username = username
+        self.password = password
+        self.messages = []
+        self.counts = {"connections": 0, "logins": 0}
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record(self, counter):
+        with self.lock:
+            self.counts[counter] += 1
+
+    def start(self):
+        """Serves requests on a background thread."""
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the listening socket."""
+
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,68 @@
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseBot, CoinbaseExchangeAuth, CoinbaseProHandler
+from testing.mock_exchange import MockCoinbaseExchange
+
+SANDBOX_API_URL = "https://api-public.sandbox.pro.coinbase.com/"
+
+# Arguments of the bots built by make_bot: a weekly schedule far enough ahead that it never fires during a test
+BOT_DEFAULTS = {"frequency": "weekly", "start_date": "2039-01-01", "start_time": "10:00 AM"}
+
+
+def get_connection_arguments(exchange, kwargs):
+    """Returns the api_url and auth of a handler or bot, pointed at a mock exchange if one is given."""
+
+    if exchange is None:
+        return {"api_url": SANDBOX_API_URL, "auth": CoinbaseExchangeAuth("key", "4096", "pass"), **kwargs}
+
+    return {"api_url": exchange.url, "auth": CoinbaseExchangeAuth(**exchange.credentials), **kwargs}
+
+
+@pytest.fixture
+def mock_exchange():
+    """A MockCoinbaseExchange serving on a free local port for the duration of a test."""
+
+    with MockCoinbaseExchange() as exchange:
+        yield exchange
+
+
+@pytest.fixture
+def make_handler():
+    """
+    Factory of CoinbaseProHandlers, called as make_handler(exchange=None, **kwargs). Handlers talk to the given
+    MockCoinbaseExchange, or to the sandbox with dummy credentials, and kwargs override any other argument.
+    """
+
+    handlers = []
+
+    def make_handler(exchange=None, **kwargs):
+        handler = CoinbaseProHandler(**get_connection_arguments(exchange, kwargs))
+        handlers.append(handler)
+
+        return handler
+
+    yield make_handler
+
+    for handler in handlers:
+        handler.session.close()
+
+
+@pytest.fixture
+def make_bot():
+    """
+    Factory of CoinbaseBots, called as make_bot(exchange=None, **kwargs). Bots start with BOT_DEFAULTS and talk to
+    the given MockCoinbaseExchange, or to the sandbox with dummy credentials; kwargs override any argument.
+    """
+
+    bots = []
+
+    def make_bot(exchange=None, **kwargs):
+        bot = CoinbaseBot(**get_connection_arguments(exchange, {**BOT_DEFAULTS, **kwargs}))
+        bots.append(bot)
+
+        return bot
+
+    yield make_bot
+
+    for bot in bots:
+        bot.coinbase.session.close()
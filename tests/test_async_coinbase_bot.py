@@ -0,0 +1,384 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import monotonic
+
+import pytest
+
+from src.coinbase.async_coinbase_bot import AsyncCoinbaseBot, AsyncCoinbaseProHandler, create_async_session
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.frequency import FREQUENCY_TO_DAYS
+
+API_SECRET = base64.b64encode(b"secret").decode()
+FILL = {"fee": "0.10", "usd_volume": "10.00", "price": "20000.00", "size": "0.0005"}
+
+
+class ExchangeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def is_signed(self, body):
+        message = self.headers["CB-ACCESS-TIMESTAMP"] + self.command + self.path + body
+        signature = hmac.new(base64.b64decode(API_SECRET), message.encode(), hashlib.sha256)
+        return self.headers["CB-ACCESS-SIGN"] == base64.b64encode(signature.digest()).decode()
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        self.requests_seen.append((self.command, self.path))
+
+        if not self.is_signed(body):
+            return self.respond(401, {"message": "invalid signature"})
+
+        routes = {
+            ("GET", "/payment-methods"): [{"id": "bank-id"}],
+            ("POST", "/deposits/payment-method"): {"id": "deposit-id"},
+            ("GET", "/coinbase-accounts"): [{"name": "Cash (USD)", "currency": "USD", "balance": "100.00"}],
+            ("POST", "/orders"): {"id": "order-1", "status": "pending"},
+            ("GET", "/orders/order-1"): {"id": "order-1", "status": "done"},
+            ("GET", "/fills?order_id=order-1"): [FILL],
+        }
+
+        if (self.command, self.path) not in routes:
+            return self.respond(404, {"message": "not found"})
+
+        self.respond(200, routes[(self.command, self.path)])
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def exchange_url():
+    ExchangeRequestHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ExchangeRequestHandler)
+    t = Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncCoinbaseProHandler:
+    """Tests AsyncCoinbaseProHandler class against a local exchange."""
+
+    def test_requests_are_signed(self, exchange_url):
+        """Checks that the async handler signs requests the same way as CoinbaseExchangeAuth."""
+
+        async def run():
+            async with AsyncCoinbaseProHandler(
+                exchange_url, CoinbaseExchangeAuth("key", API_SECRET, "pass")
+            ) as handler:
+                assert await handler.get_payment_method() == "bank-id"
+                assert await handler.deposit_from_bank(50)
+                assert await handler.are_sufficient_funds_available(100)
+                assert not await handler.are_sufficient_funds_available(100.01)
+
+        asyncio.run(run())
+
+    def test_invalid_auth_raises_runtime_error(self, exchange_url):
+        """Checks that a rejected signature raises a RuntimeError."""
+
+        async def run():
+            async with AsyncCoinbaseProHandler(exchange_url, CoinbaseExchangeAuth("key", "4096", "pass")) as handler:
+                with pytest.raises(RuntimeError, match="Could not find payment method"):
+                    await handler.get_payment_method()
+
+        asyncio.run(run())
+
+    def test_place_market_order_and_get_transaction_details(self, exchange_url):
+        """Checks that an order is placed, polled until done and its fills are parsed."""
+
+        async def run():
+            async with AsyncCoinbaseProHandler(
+                exchange_url, CoinbaseExchangeAuth("key", API_SECRET, "pass")
+            ) as handler:
+                order_id = await handler.place_market_order("BTC", 10)
+                return await handler.get_transaction_details("BTC", "2022-01-01", order_id=order_id)
+
+        details = asyncio.run(run())
+
+        assert details["product"] == "BTC"
+        assert details["total_amount"] == "10.10"
+        assert ("GET", "/fills?order_id=order-1") in ExchangeRequestHandler.requests_seen
+
+    def test_invalid_parameters(self):
+        """Checks that the async handler validates parameters like the synchronous one."""
+
+        handler = AsyncCoinbaseProHandler("http://127.0.0.1:1/", CoinbaseExchangeAuth("key", API_SECRET, "pass"))
+
+        with pytest.raises(TypeError, match="amount must be of type int or float"):
+            asyncio.run(handler.deposit_from_bank("50"))
+
+        with pytest.raises(ValueError, match="product cannot be null"):
+            asyncio.run(handler.place_market_order("", 100))
+
+        with pytest.raises(TypeError, match="pool_size must be of type int"):
+            create_async_session(pool_size="10")
+
+        with pytest.raises(TypeError, match="timeout must be a number or a tuple"):
+            create_async_session(timeout="10")
+
+    def test_float_timeout(self, exchange_url):
+        """Checks that a single number is used as both the connect and read timeouts, as with requests."""
+
+        async def run():
+            async with AsyncCoinbaseProHandler(
+                exchange_url, CoinbaseExchangeAuth("key", API_SECRET, "pass"), timeout=2.5
+            ) as handler:
+                return handler.session.timeout if await handler.get_payment_method() else None
+
+        timeout = asyncio.run(run())
+
+        assert (timeout.sock_connect, timeout.sock_read) == (2.5, 2.5)
+
+
+class TestAsyncHandlerParity:
+    """Tests that AsyncCoinbaseProHandler matches CoinbaseProHandler against the mock exchange."""
+
+    def test_handlers_return_the_same_results(self, mock_exchange):
+        """Checks that both handlers agree on the wallet, profile, candles and fills of the same exchange."""
+
+        auth = CoinbaseExchangeAuth(**mock_exchange.credentials)
+        coinbase = CoinbaseProHandler(mock_exchange.url, auth)
+        order_id = coinbase.place_market_order("BTC", 10)
+        end = int(datetime(2022, 1, 2).timestamp())
+
+        async def run():
+            async with AsyncCoinbaseProHandler(mock_exchange.url, auth) as handler:
+                return (
+                    await handler.get_usd_wallet_id(),
+                    await handler.get_profile(),
+                    await handler.get_candles("BTC", end - 7200, end, 3600),
+                    [fill async for fill in handler.iter_fills(order_id=order_id)],
+                    handler.get_connection_stats(),
+                )
+
+        wallet_id, profile, candles, fills, stats = asyncio.run(run())
+
+        assert wallet_id == coinbase.get_usd_wallet_id()
+        assert profile == coinbase.get_profile()
+        assert candles == coinbase.get_candles("BTC", end - 7200, end, 3600)
+        assert fills == list(coinbase.iter_fills(order_id=order_id))
+        assert stats["requests_sent"] == 4
+        coinbase.session.close()
+
+    def test_payment_method_is_fetched_once(self, mock_exchange):
+        """Checks that get_payment_method() is served from the metadata cache after the first call."""
+
+        async def run():
+            async with AsyncCoinbaseProHandler(
+                mock_exchange.url, CoinbaseExchangeAuth(**mock_exchange.credentials)
+            ) as handler:
+                return [await handler.get_payment_method() for _ in range(5)]
+
+        assert len(set(asyncio.run(run()))) == 1
+        assert mock_exchange.get_request_count("GET", "payment-methods") == 1
+
+
+class TestAsyncCoinbaseBot:
+    """Tests AsyncCoinbaseBot class against a local exchange."""
+
+    def test_no_scheduler_thread(self):
+        """Checks that the async bot runs its cycles on the event loop without building a DeadlineScheduler."""
+
+        bot = AsyncCoinbaseBot(
+            api_url="http://127.0.0.1/",
+            auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+            frequency="daily",
+            start_date="2039-01-03",
+            start_time="07:00 AM",
+            orders={"BTC": 10},
+        )
+
+        assert not hasattr(bot, "scheduler")
+        assert bot.schedules[0].orders == {"BTC": 10.0}
+
+    def test_inherited_scheduling_methods(self, capsys):
+        """Checks that CoinbaseBot's scheduling and cycle error methods work on an async bot."""
+
+        bot = AsyncCoinbaseBot(
+            api_url="http://127.0.0.1/",
+            auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+            frequency="daily",
+            start_date="2039-01-03",
+            start_time="07:00 AM",
+            orders={"BTC": 10},
+        )
+        schedule = bot.schedules[0]
+
+        bot.schedule_next_cycle()
+        bot.schedule_deposit(schedule)
+        bot.schedule_purchase(schedule)
+
+        event = bot.get_next_event()
+        assert (event.when, event.name) == (datetime(2039, 1, 3, 6, 59), "deposit")
+
+        bot.handle_cycle_error(event, RuntimeError("rejected"))
+        assert "ERROR: deposit cycle failed: rejected" in capsys.readouterr().out
+        assert schedule.next_deposit_date == datetime(2039, 1, 4, 6, 59)
+        assert not bot.skip_failed_cycle(event)
+
+        event = bot.get_next_event()
+        assert bot.skip_failed_cycle(event)
+        assert schedule.next_purchase_date == datetime(2039, 1, 4, 7, 0)
+
+    def test_failed_cycle_is_skipped(self):
+        """Checks that activate() moves a schedule past a cycle that raised and keeps running."""
+
+        start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+
+        async def run():
+            bot = AsyncCoinbaseBot(
+                api_url="http://127.0.0.1:1/",
+                auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+                frequency="daily",
+                start_date=start.strftime("%Y-%m-%d"),
+                start_time=start.strftime("%I:%M %p"),
+                orders={"BTC": 10},
+            )
+            deadline = datetime.now()
+            bot.next_deposit_date = deadline
+
+            async def run_deposit_cycle(schedule=None):
+                raise RuntimeError("rejected")
+
+            bot.run_deposit_cycle = run_deposit_cycle
+            task = asyncio.create_task(bot.activate())
+            await asyncio.sleep(0.2)
+            bot.deactivate()
+            await task
+
+            return bot, deadline
+
+        bot, deadline = asyncio.run(run())
+
+        assert bot.next_deposit_date == deadline + FREQUENCY_TO_DAYS["daily"]
+
+    def test_many_bots_share_one_event_loop(self, exchange_url):
+        """Checks that several bots run their cycles concurrently on one loop with a shared session."""
+
+        start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+
+        async def run():
+            session = create_async_session()
+            bots = [
+                AsyncCoinbaseBot(
+                    api_url=exchange_url,
+                    auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+                    frequency="daily",
+                    start_date=start.strftime("%Y-%m-%d"),
+                    start_time=start.strftime("%I:%M %p"),
+                    session=session,
+                )
+                for _ in range(10)
+            ]
+
+            for bot in bots:
+                bot.set_orders(BTC=10)
+                bot.next_deposit_date = datetime.now()
+                bot.next_purchase_date = datetime.now() + timedelta(milliseconds=200)
+
+            tasks = [asyncio.create_task(bot.activate()) for bot in bots]
+
+            started = monotonic()
+            await asyncio.sleep(1)
+
+            for bot in bots:
+                bot.deactivate()
+
+            await asyncio.gather(*tasks)
+            await session.close()
+
+            return bots, monotonic() - started
+
+        bots, elapsed = asyncio.run(run())
+
+        assert elapsed < 2
+        for bot in bots:
+            assert bot.next_deposit_date > datetime.now()
+            assert bot.next_purchase_date > datetime.now()
+
+        assert ExchangeRequestHandler.requests_seen.count(("POST", "/orders")) == 10
+
+        # The $100 cash balance already covers each $10 cycle, so no deposits are made
+        assert ExchangeRequestHandler.requests_seen.count(("POST", "/deposits/payment-method")) == 0
+        assert ExchangeRequestHandler.requests_seen.count(("GET", "/coinbase-accounts")) == 20
+
+    def test_outbox_delivers_on_the_event_loop(self, exchange_url, tmp_path):
+        """Checks that the outbox worker retrieves transaction details through the bot's event loop."""
+
+        start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+
+        def send_messages(messages, on_sent=None):
+            for index in range(len(messages)):
+                on_sent(index)
+
+            return len(messages)
+
+        async def run():
+            bot = AsyncCoinbaseBot(
+                api_url=exchange_url,
+                auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+                frequency="daily",
+                start_date=start.strftime("%Y-%m-%d"),
+                start_time=start.strftime("%I:%M %p"),
+                outbox_path=str(tmp_path / "outbox.json"),
+            )
+            bot.set_orders(BTC=10)
+            bot.next_deposit_date = start
+            bot.next_purchase_date = datetime.now()
+            bot.coinbase.notifier.send_messages = send_messages
+
+            task = asyncio.create_task(bot.activate())
+
+            while bot.outbox.get_metrics()["sent"] == 0:
+                await asyncio.sleep(0.05)
+
+            bot.deactivate()
+            await task
+
+            return bot
+
+        bot = asyncio.run(run())
+
+        assert bot.outbox.get_metrics()["sent"] == 1
+        assert ExchangeRequestHandler.requests_seen.count(("GET", "/fills?order_id=order-1")) == 1
+
+    def test_get_next_cycle_merges_schedules(self):
+        """Checks that the earliest deadline across every schedule is run next, deposits before purchases."""
+
+        bot = AsyncCoinbaseBot(
+            api_url="http://127.0.0.1/",
+            auth=CoinbaseExchangeAuth("key", API_SECRET, "pass"),
+            frequency="weekly",
+            start_date="2039-01-03",
+            start_time="09:00 AM",
+        )
+        bot.set_orders(ETH=50)
+        btc = bot.add_schedule("daily", "2039-01-03", "07:00 AM", {"BTC": 10})
+
+        next_deadline, run_cycle, schedule = bot.get_next_cycle()
+        assert (next_deadline, run_cycle, schedule) == (datetime(2039, 1, 3, 6, 59), bot.run_deposit_cycle, btc)
+
+        btc.update_deposit_date()
+        assert bot.get_next_cycle() == (datetime(2039, 1, 3, 7, 0), bot.run_purchase_cycle, btc)
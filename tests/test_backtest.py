@@ -0,0 +1,180 @@
+import json
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+from src.coinbase.backtest import Backtest, Candles, get_purchase_times, to_timestamp
+
+START = datetime(2039, 1, 1)
+DAY = 24 * 60 * 60
+
+
+def create_candles(prices, start=START):
+    """Daily candles that open and close at the given prices."""
+
+    times = [to_timestamp(start) + i * DAY for i in range(len(prices))]
+
+    return Candles(times, prices, prices)
+
+
+def loop_backtest(candles, amount, frequency, start_date, fee_rate):
+    """Reference implementation that buys one candle at a time."""
+
+    invested = units = 0.0
+    date = start_date
+
+    while to_timestamp(date) <= candles.times[-1]:
+        index = np.searchsorted(candles.times, to_timestamp(date), side="right") - 1
+        invested += amount
+        units += amount / (1 + fee_rate) / candles.opens[index]
+        date += {"daily": timedelta(days=1), "weekly": timedelta(days=7)}[frequency]
+
+    return invested, units
+
+
+class TestCandles:
+    """Tests Candles class and get_purchase_times()."""
+
+    def test_from_rows(self, tmp_path):
+        """Checks that candle rows, which the exchange returns newest first, are sorted by time."""
+
+        rows = [[DAY * 2, 9, 12, 11, 10, 1.5], [DAY, 8, 11, 9, 11, 2.0]]
+        filepath = tmp_path / "candles.json"
+        filepath.write_text(json.dumps(rows))
+
+        candles = Candles.load(str(filepath))
+
+        assert candles.times.tolist() == [DAY, DAY * 2]
+        assert candles.opens.tolist() == [9, 11]
+        assert candles.closes.tolist() == [11, 10]
+
+    def test_invalid_candles(self):
+        """Checks that Candles raises correct errors with invalid data."""
+
+        with pytest.raises(ValueError, match="candles cannot be empty"):
+            Candles([], [], [])
+
+        with pytest.raises(ValueError, match="strictly increasing"):
+            Candles([2, 1], [1, 1], [1, 1])
+
+        with pytest.raises(ValueError, match="prices must be positive"):
+            Candles([1, 2], [1, 0], [1, 1])
+
+    def test_get_purchase_indices(self):
+        """Checks that purchases fill in the candle containing them and purchases before the data are left out."""
+
+        candles = create_candles([10, 20, 30])
+        start = to_timestamp(START)
+
+        assert candles.get_purchase_indices(np.array([start - 1, start, start + 10, start + DAY])).tolist() == [0, 0, 1]
+
+    def test_get_purchase_times(self):
+        """Checks that schedules step like CoinbaseBot, including month ends."""
+
+        weekly = get_purchase_times(START, "weekly", datetime(2039, 1, 29))
+        monthly = get_purchase_times(datetime(2039, 1, 31), "monthly", datetime(2039, 4, 30))
+
+        assert (np.diff(weekly) == 7 * DAY).all() and len(weekly) == 5
+        assert [datetime.fromtimestamp(t, timezone.utc).day for t in monthly] == [31, 28, 28, 28]
+
+        with pytest.raises(ValueError, match="frequency must be one of"):
+            get_purchase_times(START, "hourly", datetime(2039, 2, 1))
+
+
+class TestBacktest:
+    """Tests Backtest class."""
+
+    def test_run(self):
+        """Checks the curves of a weekly schedule over prices that double."""
+
+        candles = create_candles([100.0] * 7 + [200.0] * 7)
+        results = Backtest({"BTC": candles}, fee_rate=0.0).run({"BTC": 50}, "weekly", START)
+        result = results["BTC"]
+
+        assert result.invested.tolist() == [50.0] * 7 + [100.0] * 7
+        assert result.units[-1] == pytest.approx(0.75)
+        assert result.value[-1] == pytest.approx(150.0)
+        assert result.pnl[6] == pytest.approx(0.0)
+        assert result.get_summary() == {
+            "invested": 100.0,
+            "fees": 0.0,
+            "units": pytest.approx(0.75),
+            "value": pytest.approx(150.0),
+            "pnl": pytest.approx(50.0),
+            "average_cost": pytest.approx(133.333, rel=1e-4),
+        }
+
+    def test_run_matches_loop(self):
+        """Checks the vectorized curves against a purchase-by-purchase loop, fees included."""
+
+        prices = np.random.default_rng(1).uniform(50, 150, 400)
+        candles = create_candles(prices)
+        backtest = Backtest({"BTC": candles, "ETH": candles}, fee_rate=0.005)
+
+        results = backtest.run({"BTC": 25, "ETH": 10}, "daily", START + timedelta(hours=10))
+
+        for product, amount in (("BTC", 25), ("ETH", 10)):
+            invested, units = loop_backtest(candles, amount, "daily", START + timedelta(hours=10), 0.005)
+
+            assert results[product].invested[-1] == pytest.approx(invested)
+            assert results[product].units[-1] == pytest.approx(units)
+            assert results[product].fees[-1] == pytest.approx(invested - invested / 1.005)
+
+    def test_end_date_is_truncated_at_the_candles(self, capsys):
+        """Checks that purchases after the last candle are left out with a warning instead of buying at its open."""
+
+        backtest = Backtest({"BTC": create_candles([100.0] * 7)}, fee_rate=0.0)
+        end_date = START + timedelta(days=30)
+
+        result = backtest.run({"BTC": 10}, "daily", START, end_date)["BTC"]
+
+        assert result.invested[-1] == 70.0
+        assert "WARNING: Candles of BTC end at 2039-01-07 00:00:00 UTC" in capsys.readouterr().out
+
+        sweep = backtest.sweep("BTC", ["daily"], [10], [START], end_date)
+
+        assert sweep["invested"].tolist() == [70.0]
+        assert "WARNING" in capsys.readouterr().out
+
+        backtest.run({"BTC": 10}, "daily", START, START + timedelta(days=6))
+
+        assert capsys.readouterr().out == ""
+
+    def test_unknown_product(self):
+        """Checks that a product without candles raises a ValueError."""
+
+        with pytest.raises(ValueError, match="No candles for ETH"):
+            Backtest({"BTC": create_candles([1.0])}).run({"ETH": 10}, "daily", START)
+
+    def test_sweep_matches_run(self):
+        """Checks that every combination of a sweep matches a single run."""
+
+        prices = np.random.default_rng(2).uniform(50, 150, 120)
+        backtest = Backtest({"BTC": create_candles(prices)})
+        start_dates = [START, START + timedelta(days=3)]
+
+        sweep = backtest.sweep("BTC", ["daily", "weekly", "biweekly", "monthly"], [10, 25.5], start_dates)
+
+        assert len(sweep["pnl"]) == 16
+
+        for i in range(16):
+            results = backtest.run({"BTC": sweep["amount"][i]}, sweep["frequency"][i], sweep["start_date"][i])
+            result = results["BTC"].get_summary()
+
+            for key in ("invested", "fees", "units", "value", "pnl", "average_cost"):
+                assert sweep[key][i] == pytest.approx(result[key])
+
+    def test_sweep_is_fast(self):
+        """Checks that thousands of combinations over ten years of daily candles take well under seconds."""
+
+        prices = np.random.default_rng(3).uniform(50, 150, 3650)
+        backtest = Backtest({"BTC": create_candles(prices)})
+        start_dates = [START + timedelta(days=day) for day in range(30)]
+
+        start = perf_counter()
+        sweep = backtest.sweep("BTC", ["daily", "weekly", "biweekly", "monthly"], np.arange(1, 101), start_dates)
+
+        assert len(sweep["pnl"]) == 12000
+        assert perf_counter() - start < 5
@@ -0,0 +1,96 @@
+import unittest.mock as mock
+
+import pytest
+
+from src.coinbase.balance import BalanceSnapshot
+
+API_URL = "https://api.pro.coinbase.com/"
+WALLETS = [
+    {"id": "usd-id", "name": "Cash (USD)", "currency": "USD", "balance": "100.00"},
+    {"id": "btc-id", "name": "BTC Wallet", "currency": "BTC", "balance": "0.5"},
+]
+
+
+def mock_response(status_code, json_body):
+    response = mock.Mock(status_code=status_code, content=b"")
+    response.json.return_value = json_body
+    return response
+
+
+class TestBalanceSnapshot:
+    """Tests BalanceSnapshot class."""
+
+    def test_balances_are_indexed_by_currency(self):
+        """Checks that balances are looked up by currency."""
+
+        balances = BalanceSnapshot(WALLETS)
+
+        assert balances.get_balance("USD") == 100.0
+        assert balances.get_balance("BTC") == 0.5
+        assert balances.get_balance("ETH") == 0.0
+
+    def test_usd_is_taken_from_cash_wallet(self):
+        """Checks that the USD balance is that of the "Cash (USD)" wallet, whichever USD wallet is listed first."""
+
+        balances = BalanceSnapshot(
+            [{"id": "vault-id", "name": "USD Vault", "currency": "USD", "balance": "5000"}] + WALLETS
+        )
+
+        assert balances.get_balance("USD") == 100.0
+
+    def test_reserve(self):
+        """Checks that reservations accumulate against the balance."""
+
+        balances = BalanceSnapshot(WALLETS)
+
+        assert balances.reserve(60)
+        assert not balances.reserve(50)
+        assert balances.reserve(40)
+        assert balances.get_available("USD") == 0.0
+        assert not balances.covers(0.01)
+
+    def test_invalid_parameters(self):
+        """Checks that reserve() and covers() validate the amount."""
+
+        balances = BalanceSnapshot(WALLETS)
+
+        with pytest.raises(TypeError, match="amount must be of type int or float"):
+            balances.reserve("10")
+
+        with pytest.raises(ValueError, match="amount must be a positive number"):
+            balances.covers(0)
+
+
+class TestCoinbaseBotBalanceSnapshot:
+    """Tests that a purchase cycle fetches balances once."""
+
+    def test_orders_are_checked_against_their_total(self, make_bot, capsys):
+        """Checks that N orders cost one balance request and those beyond the total are skipped and logged."""
+
+        coinbase = make_bot(api_url=API_URL)
+        coinbase.set_orders(BTC=40, ETH=40, ADA=40)
+
+        with mock.patch.object(
+            coinbase.coinbase, "_request", return_value=mock_response(200, WALLETS)
+        ) as request, mock.patch.object(coinbase, "place_order", return_value={"product": "placed"}):
+            results = coinbase.place_orders()
+
+        request.assert_called_once_with("GET", "coinbase-accounts")
+        assert results["BTC"]["error"] is None
+        assert results["ETH"]["error"] is None
+        assert str(results["ADA"]["error"]) == "User does not have sufficient funds for the current order"
+        assert "WARNING: Skipped order for ADA" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("orders,expected_deposits", [({"BTC": 50, "ETH": 50}, 0), ({"BTC": 50, "ETH": 51}, 1)])
+    def test_deposit_skipped_when_cash_covers_cycle(self, make_bot, orders, expected_deposits):
+        """Checks that no deposit is made if the cash balance already covers every order."""
+
+        coinbase = make_bot(api_url=API_URL)
+        coinbase.set_orders(**orders)
+
+        with mock.patch.object(
+            coinbase.coinbase, "_request", return_value=mock_response(200, WALLETS)
+        ), mock.patch.object(coinbase.coinbase, "deposit_from_bank") as deposit_from_bank:
+            coinbase.run_deposit_cycle()
+
+        assert deposit_from_bank.call_count == expected_deposits
@@ -0,0 +1,128 @@
+from benchmarks import import_time, portfolio_runtime
+from benchmarks.purchase_cycle import benchmark_cycle, find_regressions, normalize_endpoint, percentile
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 | _io
+import time:       200 |        200 |     json.decoder
+import time:       300 |        500 |   json
+import time:       400 |        400 |   argparse
+import time:      1000 |       1900 | place_order
+"""
+
+
+class TestPurchaseCycleBenchmark:
+    """Tests the purchase cycle benchmark helpers."""
+
+    def test_percentile(self):
+        """Checks nearest-rank percentiles."""
+
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([3.0], 99) == 3.0
+
+    def test_normalize_endpoint(self):
+        """Checks that order IDs and query strings are removed from endpoints."""
+
+        assert normalize_endpoint("GET", "/orders/1234-abcd") == "GET orders/{id}"
+        assert normalize_endpoint("GET", "/fills?order_id=1234") == "GET fills"
+
+    def test_find_regressions(self):
+        """Checks that extra requests or slower cycles beyond the tolerance are reported."""
+
+        baseline = {"10": {"wall_time": 1.0, "cpu_time": 0.5, "requests": 33}}
+
+        assert find_regressions({"10": {"wall_time": 1.4, "cpu_time": 0.5, "requests": 33}}, baseline) == []
+        assert find_regressions({"100": {"wall_time": 9.0, "cpu_time": 9.0, "requests": 999}}, baseline) == []
+
+        regressions = find_regressions({"10": {"wall_time": 1.6, "cpu_time": 0.5, "requests": 34}}, baseline)
+
+        assert len(regressions) == 2
+        assert "34 requests per cycle" in regressions[0]
+        assert "wall_time" in regressions[1]
+
+    def test_benchmark_cycle(self):
+        """Checks that a cycle against the mock exchange is measured."""
+
+        result = benchmark_cycle(2, rounds=1, max_workers=2)
+
+        # Two balance checks, one deposit, and an order, a poll and a fills lookup per product
+        assert result["requests"] == 9
+        assert result["endpoints"]["POST orders"]["count"] == 2
+        assert result["wall_time"] > 0
+        assert result["cpu_time"] > 0
+
+
+class TestPortfolioRuntimeBenchmark:
+    """Tests the portfolio runtime benchmark helpers."""
+
+    def test_find_regressions(self):
+        """Checks that extra threads, or memory or CPU time per portfolio beyond the tolerance, are reported."""
+
+        results = {
+            "1": {"memory": 1000, "threads": 1, "wall_time": 0.2, "cpu_time": 0.02},
+            "100": {"memory": 140000, "threads": 1, "wall_time": 20.0, "cpu_time": 2.0},
+        }
+
+        assert portfolio_runtime.find_regressions(results) == []
+
+        results["100"] = {"memory": 160000, "threads": 100, "wall_time": 20.0, "cpu_time": 4.0}
+        regressions = portfolio_runtime.find_regressions(results)
+
+        assert len(regressions) == 3
+        assert "100 threads" in regressions[0]
+        assert "memory" in regressions[1]
+        assert "cpu_time" in regressions[2]
+
+    def test_benchmark_portfolios(self):
+        """Checks that the cycles of every portfolio run on the runtime's one scheduler thread."""
+
+        result = portfolio_runtime.benchmark_portfolios(2)
+
+        assert result["threads"] == 1
+        assert result["memory"] > 0
+        assert result["cpu_time"] > 0
+
+
+class TestImportTimeBenchmark:
+    """Tests the import time benchmark helpers and that the CLI defers its heavy imports."""
+
+    def test_parse_importtime(self):
+        """Checks that modules are read with their nesting depth and cumulative time in seconds."""
+
+        entries = import_time.parse_importtime(IMPORTTIME_OUTPUT)
+
+        assert entries[1] == ("json.decoder", 2, 0.0002)
+        assert entries[-1] == ("place_order", 0, 0.0019)
+        assert import_time.get_import_tree(entries, "place_order") == (
+            0.0019,
+            ["place_order", "argparse", "json", "json.decoder"],
+        )
+
+    def test_find_regressions(self):
+        """Checks that deferred modules and slower imports beyond both tolerances are reported."""
+
+        baseline = {"place_order": {"import_time": 0.1, "modules": 8, "deferred": []}}
+
+        assert import_time.find_regressions({"place_order": {"import_time": 0.149, "deferred": []}}, baseline) == []
+        assert (
+            import_time.find_regressions({"x": {"import_time": 0.015, "deferred": []}}, {"x": {"import_time": 0.006}})
+            == []
+        )
+
+        regressions = import_time.find_regressions(
+            {"place_order": {"import_time": 0.2, "deferred": ["yaml"]}}, baseline
+        )
+
+        assert len(regressions) == 2
+        assert "loads yaml at import" in regressions[0]
+        assert "import_time" in regressions[1]
+
+    def test_cli_defers_heavy_imports(self):
+        """Checks that importing the CLI loads none of the modules that only some code paths need."""
+
+        result = import_time.measure_import("place_order", rounds=1)
+
+        assert result["deferred"] == []
+        assert result["import_time"] > 0
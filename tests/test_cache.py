@@ -0,0 +1,142 @@
+import unittest.mock as mock
+from time import sleep
+
+import pytest
+
+from src.coinbase.cache import MetadataCache
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+
+SANDBOX_API_URL = "https://api-public.sandbox.pro.coinbase.com/"
+
+
+def mock_response(status_code, json_body):
+    response = mock.Mock(status_code=status_code, content=b"")
+    response.json.return_value = json_body
+    return response
+
+
+class TestMetadataCache:
+    """Tests MetadataCache class."""
+
+    def test_get_and_set(self):
+        """Checks that cached values are returned and hits/misses are counted."""
+
+        cache = MetadataCache()
+
+        assert cache.get("payment_method") is None
+        cache.set("payment_method", "bank-id")
+        assert cache.get("payment_method") == "bank-id"
+        assert cache.get_stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_entries_expire(self):
+        """Checks that entries are not returned after their TTL."""
+
+        cache = MetadataCache(ttls={"payment_method": 0.1})
+        cache.set("payment_method", "bank-id")
+        cache.set("profile", {"id": "profile-id"}, ttl=60)
+
+        sleep(0.2)
+
+        assert cache.get("payment_method") is None
+        assert cache.get("profile") == {"id": "profile-id"}
+
+    def test_invalidate(self):
+        """Checks that invalidate() drops one key or every key."""
+
+        cache = MetadataCache()
+        cache.set("payment_method", "bank-id")
+        cache.set("profile", {"id": "profile-id"})
+
+        cache.invalidate("payment_method")
+        assert cache.get("payment_method") is None
+        assert cache.get("profile") == {"id": "profile-id"}
+
+        cache.invalidate()
+        assert cache.get("profile") is None
+
+    def test_get_or_fetch(self):
+        """Checks that get_or_fetch() only calls fetch on a miss."""
+
+        cache = MetadataCache()
+        fetch = mock.Mock(return_value="bank-id")
+
+        assert cache.get_or_fetch("payment_method", fetch) == "bank-id"
+        assert cache.get_or_fetch("payment_method", fetch) == "bank-id"
+        fetch.assert_called_once()
+
+    def test_persistence(self, tmp_path):
+        """Checks that entries survive a restart when a path is given."""
+
+        path = str(tmp_path / "cache.json")
+        MetadataCache(path=path).set("payment_method", "bank-id")
+
+        assert MetadataCache(path=path).get("payment_method") == "bank-id"
+
+    def test_corrupt_cache_file_is_ignored(self, tmp_path):
+        """Checks that an unreadable cache file starts an empty cache."""
+
+        path = tmp_path / "cache.json"
+        path.write_text("{not json")
+
+        assert MetadataCache(path=str(path)).get("payment_method") is None
+
+
+class TestCoinbaseProHandlerCache:
+    """Tests that CoinbaseProHandler caches account metadata."""
+
+    coinbase_pro = CoinbaseProHandler(api_url=SANDBOX_API_URL, auth=CoinbaseExchangeAuth("4096", "4096", "4096"))
+
+    def test_repeat_deposits_reuse_payment_method(self):
+        """Checks that only the first deposit looks up the payment method."""
+
+        self.coinbase_pro.cache.invalidate()
+        responses = [
+            mock_response(200, [{"id": "bank-id"}]),
+            mock_response(200, {"id": "deposit-1"}),
+            mock_response(200, {"id": "deposit-2"}),
+        ]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=responses) as request:
+            assert self.coinbase_pro.deposit_from_bank(50)
+            assert self.coinbase_pro.deposit_from_bank(50)
+
+        assert [call.args for call in request.call_args_list] == [
+            ("GET", "payment-methods"),
+            ("POST", "deposits/payment-method"),
+            ("POST", "deposits/payment-method"),
+        ]
+
+    def test_failed_deposit_invalidates_payment_method(self):
+        """Checks that a rejected deposit forces the payment method to be looked up again."""
+
+        self.coinbase_pro.cache.invalidate()
+        responses = [mock_response(200, [{"id": "bank-id"}]), mock_response(400, {})]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=responses):
+            with pytest.raises(RuntimeError, match="Could not make deposit"):
+                self.coinbase_pro.deposit_from_bank(50)
+
+        assert self.coinbase_pro.cache.get("payment_method") is None
+
+    def test_get_usd_wallet_id_and_profile(self):
+        """Checks that the USD wallet and default profile are looked up once."""
+
+        self.coinbase_pro.cache.invalidate()
+        responses = [
+            mock_response(
+                200,
+                [
+                    {"id": "btc-id", "name": "BTC Wallet", "currency": "BTC"},
+                    {"id": "usd-id", "name": "Cash (USD)", "currency": "USD"},
+                ],
+            ),
+            mock_response(200, [{"id": "other", "is_default": False}, {"id": "main", "is_default": True}]),
+        ]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=responses) as request:
+            for _ in range(3):
+                assert self.coinbase_pro.get_usd_wallet_id() == "usd-id"
+                assert self.coinbase_pro.get_profile()["id"] == "main"
+
+        assert request.call_count == 2
+        assert self.coinbase_pro.get_cache_stats()["hits"] >= 4
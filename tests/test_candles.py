@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.coinbase.backtest import Backtest, to_timestamp
+from src.coinbase.candles import CANDLE_DTYPE, CandleStore
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+
+HOUR = 60 * 60
+START = to_timestamp(datetime(2023, 1, 1))
+
+
+@pytest.fixture
+def candle_store(mock_exchange, tmp_path):
+    """A CandleStore in a temporary directory that fetches from the mock exchange."""
+
+    coinbase = CoinbaseProHandler(mock_exchange.url, CoinbaseExchangeAuth(**mock_exchange.credentials))
+
+    return CandleStore(str(tmp_path), coinbase=coinbase)
+
+
+class TestCoinbaseProHandlerCandles:
+    """Tests CoinbaseProHandler.get_candles() against the mock exchange."""
+
+    def test_get_candles(self, candle_store, mock_exchange):
+        """Checks that candles come newest first in the endpoint's row format."""
+
+        candles = candle_store.coinbase.get_candles("BTC", START, START + 2 * HOUR, HOUR)
+
+        assert [candle[0] for candle in candles] == [START + 2 * HOUR, START + HOUR, START]
+        assert candles[-1][3] == pytest.approx(mock_exchange.get_candle_price("BTC-USD", START))
+
+    def test_too_many_candles(self, candle_store):
+        """Checks that asking for more than 300 candles at once raises a RuntimeError."""
+
+        with pytest.raises(RuntimeError, match="Could not retrieve BTC candles"):
+            candle_store.coinbase.get_candles("BTC", START, START + 300 * HOUR, HOUR)
+
+
+class TestCandleStore:
+    """Tests CandleStore class against the mock exchange."""
+
+    def test_update_fetches_parallel_chunks(self, candle_store, mock_exchange):
+        """Checks that a range is fetched in chunks of up to 300 candles and stored sorted by time."""
+
+        added = candle_store.update("BTC", HOUR, START, START + 999 * HOUR)
+        candles = candle_store.read("BTC", HOUR)
+
+        assert added == 1000
+        assert mock_exchange.get_request_count("GET", "products/BTC-USD/candles") == 4
+        assert candles.dtype == CANDLE_DTYPE
+        assert (np.diff(candles["time"]) == HOUR).all()
+        assert candle_store.get_coverage("BTC", HOUR) == (START, START + 999 * HOUR)
+
+    def test_directory_is_created_on_first_write(self, candle_store, tmp_path):
+        """Checks that a store only creates its directory once it has candles to write."""
+
+        directory = tmp_path / "candles"
+        store = CandleStore(str(directory), coinbase=candle_store.coinbase)
+
+        assert not directory.exists()
+        assert len(store.read("BTC", HOUR)) == 0
+        assert store.get_coverage("BTC", HOUR) is None
+        assert not directory.exists()
+
+        store.update("BTC", HOUR, START, START + 9 * HOUR)
+
+        assert sorted(path.name for path in directory.iterdir()) == ["BTC-3600.candles", "BTC-3600.candles.json"]
+        assert store.get_coverage("BTC", HOUR) == (START, START + 9 * HOUR)
+
+    def test_only_missing_ranges_are_fetched(self, candle_store, mock_exchange):
+        """Checks that later updates fetch only the ranges before and after what is stored."""
+
+        candle_store.update("BTC", HOUR, START + 100 * HOUR, START + 199 * HOUR)
+
+        assert candle_store.update("BTC", HOUR, START + 120 * HOUR, START + 150 * HOUR) == 0
+        assert candle_store.update("BTC", HOUR, START + 50 * HOUR, START + 249 * HOUR) == 100
+        assert mock_exchange.get_request_count("GET", "products/BTC-USD/candles") == 3
+
+        times = candle_store.read("BTC", HOUR)["time"]
+
+        assert times[0] == START + 50 * HOUR and times[-1] == START + 249 * HOUR
+        assert (np.diff(times) == HOUR).all()
+
+    def test_quiet_periods_are_not_fetched_again(self, candle_store, mock_exchange):
+        """Checks that a range without trades is remembered as fetched."""
+
+        mock_exchange.candle_gaps.update(START + hour * HOUR for hour in range(10, 20))
+
+        assert candle_store.update("BTC", HOUR, START, START + 29 * HOUR) == 20
+        assert candle_store.update("BTC", HOUR, START + 10 * HOUR, START + 19 * HOUR) == 0
+        assert len(candle_store.read("BTC", HOUR, START + 10 * HOUR, START + 19 * HOUR)) == 0
+        assert mock_exchange.get_request_count("GET", "products/BTC-USD/candles") == 1
+
+    def test_read_is_a_zero_copy_slice(self, candle_store):
+        """Checks that a range query is a view of the memory-mapped file, inclusive of both ends."""
+
+        candle_store.update("ETH", HOUR, START, START + 99 * HOUR)
+        candles = candle_store.read("ETH", HOUR, START + 10 * HOUR, START + 19 * HOUR)
+
+        assert len(candles) == 10
+        assert isinstance(candles, np.memmap)
+        assert not candles.flags.writeable
+        assert candles["time"][0] == START + 10 * HOUR
+
+    def test_persisted_between_stores(self, candle_store, mock_exchange, tmp_path):
+        """Checks that a read-only store sees the candles saved by another."""
+
+        candle_store.update("BTC", HOUR, START, START + 9 * HOUR)
+        store = CandleStore(str(tmp_path))
+
+        assert len(store.read("BTC", HOUR)) == 10
+
+        with pytest.raises(RuntimeError, match="No Coinbase Pro handler"):
+            store.update("BTC", HOUR, START, START + 19 * HOUR)
+
+    def test_invalid_granularity(self, candle_store):
+        """Checks that update() raises a ValueError for granularities the endpoint does not support."""
+
+        with pytest.raises(ValueError, match="granularity must be one of"):
+            candle_store.update("BTC", 120, START, START + HOUR)
+
+    def test_get_candles_feeds_a_backtest(self, candle_store):
+        """Checks that stored candles can be backtested."""
+
+        candles = candle_store.get_candles("BTC", 86400, START, START + 364 * 86400)
+        results = Backtest({"BTC": candles}).run({"BTC": 10}, "weekly", datetime(2023, 1, 1))
+
+        assert len(candles) == 365
+        assert results["BTC"].get_summary()["invested"] == 530
@@ -1,6 +1,7 @@
+import unittest.mock as mock
 from datetime import datetime, timedelta
 from threading import Thread
-from time import sleep
+from time import monotonic, sleep
 
 import pytest
 
@@ -283,7 +284,241 @@ class TestCoinbaseBot:
                 t.daemon = True
                 t.start()
 
+            # Re-arm the running scheduler with the new deadlines
+            else:
+                self.coinbase.schedule_next_cycle()
+
             sleep(thread_timeout_seconds)
 
             assert self.coinbase.next_deposit_date == current_deposit_date + self.coinbase.time_delta
             assert self.coinbase.next_purchase_date == current_purchase_date + self.coinbase.time_delta
+
+
+class TestCoinbaseBotOrderPlacement:
+    """Tests CoinbaseBot order placement without contacting Coinbase."""
+
+    def test_max_workers_with_invalid_parameters(self, make_bot):
+        """Checks that CoinbaseBot raises correct errors with an invalid max_workers."""
+
+        with pytest.raises(TypeError, match="max_workers must be of type int"):
+            make_bot(max_workers="4")
+
+        with pytest.raises(ValueError, match="max_workers must be a positive number"):
+            make_bot(max_workers=0)
+
+    def test_place_orders_runs_concurrently(self, make_bot):
+        """Checks that orders are placed in parallel when max_workers > 1."""
+
+        coinbase = make_bot(max_workers=4)
+        coinbase.set_orders(BTC=10, ETH=10, ADA=10, LINK=10)
+
+        def slow_order(product, amount, client_oid=None):
+            sleep(0.2)
+            return "order-id"
+
+        with mock.patch.object(coinbase.coinbase, "place_market_order", side_effect=slow_order), mock.patch.object(
+            coinbase.coinbase,
+            "get_transaction_details",
+            side_effect=lambda product, date, order_id=None: {"product": product},
+        ), mock.patch.object(coinbase.coinbase, "send_email_confirmations", return_value=0) as send_email_confirmations:
+            start = monotonic()
+            results = coinbase.place_orders()
+            elapsed = monotonic() - start
+
+        # Confirmations are sent by run_purchase_cycle() once the whole cycle is placed, never per order
+        send_email_confirmations.assert_not_called()
+        assert elapsed < 0.6
+        assert results == {
+            product: {"order_id": "order-id", "transaction_details": {"product": product}, "error": None}
+            for product in coinbase.orders
+        }
+
+    def test_place_orders_collects_errors_per_product(self, make_bot):
+        """Checks that a failing order does not prevent the other orders from being placed."""
+
+        coinbase = make_bot(max_workers=2)
+        coinbase.set_orders(BTC=10, ETH=10)
+
+        def place_market_order(product, amount, client_oid=None):
+            if product == "ETH":
+                raise RuntimeError("Could not place market order: rejected")
+
+            return "order-id"
+
+        with mock.patch.object(
+            coinbase.coinbase, "place_market_order", side_effect=place_market_order
+        ), mock.patch.object(
+            coinbase.coinbase,
+            "get_transaction_details",
+            side_effect=lambda product, date, order_id=None: {"product": product},
+        ), mock.patch.object(
+            coinbase.coinbase, "send_email_confirmations", return_value=0
+        ) as send_email_confirmations:
+            results = coinbase.place_orders()
+
+        send_email_confirmations.assert_not_called()
+        assert results["BTC"] == {"order_id": "order-id", "transaction_details": {"product": "BTC"}, "error": None}
+        assert results["ETH"]["transaction_details"] is None
+        assert str(results["ETH"]["error"]) == "Could not place market order: rejected"
+
+    def test_failed_details_lookup_keeps_the_order(self, make_bot, capsys):
+        """Checks that an order whose transaction details cannot be retrieved is still reported as placed."""
+
+        coinbase = make_bot(max_workers=2)
+        coinbase.set_orders(BTC=10, ETH=10)
+
+        def get_transaction_details(product, date, order_id=None):
+            if product == "ETH":
+                raise RuntimeError("ERROR: Could not find transaction details")
+
+            return {"product": product}
+
+        with mock.patch.object(coinbase.coinbase, "place_market_order", return_value="order-id"), mock.patch.object(
+            coinbase.coinbase, "get_transaction_details", side_effect=get_transaction_details
+        ), mock.patch.object(coinbase.coinbase, "send_email_confirmations", return_value=1) as send_email_confirmations:
+            coinbase.run_purchase_cycle()
+
+        send_email_confirmations.assert_called_once_with([{"product": "BTC"}], digest=False)
+        assert "Email could not be sent for order order-id of ETH" in capsys.readouterr().out
+
+    def test_run_purchase_cycle_emails_once_per_cycle(self, make_bot):
+        """Checks that a cycle's confirmations are handed to the notifier together after all orders are placed."""
+
+        coinbase = make_bot(max_workers=2)
+        coinbase.email_digest = True
+        coinbase.set_orders(BTC=10, ETH=10)
+
+        with mock.patch.object(coinbase.coinbase, "place_market_order", return_value="order-id"), mock.patch.object(
+            coinbase.coinbase,
+            "get_transaction_details",
+            side_effect=lambda product, date, order_id=None: {"product": product},
+        ), mock.patch.object(coinbase.coinbase, "send_email_confirmations", return_value=1) as send_email_confirmations:
+            coinbase.run_purchase_cycle()
+
+        send_email_confirmations.assert_called_once_with([{"product": "BTC"}, {"product": "ETH"}], digest=True)
+
+
+class TestCoinbaseBotOffline:
+    """Tests CoinbaseBot cycles against the local mock exchange, with no network."""
+
+    def test_deposit_cycle(self, make_bot, mock_exchange):
+        """Checks that a deposit is made only when the cash balance does not cover the orders."""
+
+        coinbase = make_bot(mock_exchange)
+        coinbase.set_orders(BTC=600, ETH=600)
+
+        coinbase.run_deposit_cycle()
+        assert mock_exchange.balances["USD"] == 2200.0
+
+        coinbase.run_deposit_cycle()
+        assert len(mock_exchange.deposits) == 1
+        assert coinbase.next_deposit_date == datetime(2039, 1, 15, 9, 59)
+
+    def test_purchase_cycle(self, make_bot, mock_exchange):
+        """Checks that a purchase cycle buys every product and returns their transaction details."""
+
+        coinbase = make_bot(mock_exchange, max_workers=3)
+        coinbase.set_orders(BTC=10, ETH=20, ADA=30)
+
+        results = coinbase.place_orders()
+
+        assert [result["transaction_details"]["total_amount"] for result in results.values()] == [
+            "10.00",
+            "20.00",
+            "30.00",
+        ]
+        assert mock_exchange.get_request_count("POST", "orders") == 3
+        assert mock_exchange.get_request_count("GET", "coinbase-accounts") == 1
+        assert mock_exchange.balances["USD"] == 940.0
+
+    def test_purchase_cycle_insufficient_funds(self, make_bot, mock_exchange):
+        """Checks that orders beyond the cash balance are not submitted."""
+
+        coinbase = make_bot(mock_exchange)
+        coinbase.set_orders(BTC=600, ETH=600)
+
+        with pytest.raises(RuntimeError, match="Could not place orders for: ETH"):
+            coinbase.run_purchase_cycle()
+
+        assert mock_exchange.get_request_count("POST", "orders") == 1
+        assert coinbase.next_purchase_date == datetime(2039, 1, 8, 10, 0)
+
+
+class TestCoinbaseBotSchedules:
+    """Tests CoinbaseBot with several purchase schedules."""
+
+    schedule = {"frequency": "daily", "start_date": "2039-01-03", "start_time": "07:00 AM"}
+
+    def test_add_schedule_with_invalid_parameters(self, make_bot):
+        """Checks that add_schedule() raises correct errors with invalid parameters."""
+
+        coinbase = make_bot(**self.schedule)
+        coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {"ETH": "50"}, name="eth")
+
+        with pytest.raises(ValueError, match="invalid value for frequency"):
+            coinbase.add_schedule("yearly", "2039-01-03", "09:00 AM", {"ETH": 50})
+
+        with pytest.raises(TypeError, match="orders must be of type dict"):
+            coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", ["ETH"])
+
+        with pytest.raises(ValueError, match="orders cannot be null"):
+            coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {})
+
+        with pytest.raises(ValueError, match="Schedule eth already exists"):
+            coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {"ETH": 50}, name="eth")
+
+        assert coinbase.schedules[1].orders == {"ETH": 50.0}
+
+    def test_schedules_share_one_timeline(self, make_bot):
+        """Checks that every schedule's deadlines are armed on the bot's scheduler under distinct names."""
+
+        coinbase = make_bot(name="family", **self.schedule)
+        coinbase.set_orders(BTC=10)
+        coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {"ETH": 50})
+
+        coinbase.schedule_next_cycle()
+        coinbase.schedule_next_cycle()
+
+        assert len(coinbase.scheduler) == 4
+        assert coinbase.get_event_name("purchase") == "family:purchase"
+        assert coinbase.get_event_name("purchase", coinbase.schedules[1]) == "family:schedule-2:purchase"
+
+    def test_activate_runs_every_schedule(self, make_bot, mock_exchange):
+        """Checks that one activate() loop places each schedule's orders and advances it by its own frequency."""
+
+        coinbase = make_bot(mock_exchange, **self.schedule)
+        coinbase.set_orders(BTC=10)
+        eth = coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {"ETH": 50})
+        coinbase.coinbase.notifier.credentials.email_address = None
+
+        start = datetime.now()
+
+        for schedule in coinbase.schedules:
+            schedule.next_deposit_date = start
+            schedule.next_purchase_date = start + timedelta(milliseconds=100)
+
+        t = Thread(target=coinbase.activate)
+        t.start()
+        sleep(1)
+        coinbase.deactivate()
+        t.join(5)
+
+        assert not t.is_alive()
+        assert sorted(order["product_id"] for order in mock_exchange.orders.values()) == ["BTC-USD", "ETH-USD"]
+        assert coinbase.next_purchase_date == start + timedelta(milliseconds=100) + FREQUENCY_TO_DAYS["daily"]
+        assert eth.next_purchase_date == start + timedelta(milliseconds=100) + FREQUENCY_TO_DAYS["weekly"]
+
+    def test_skip_failed_cycle(self, make_bot):
+        """Checks that a cycle which failed before rescheduling is skipped for its own schedule only."""
+
+        coinbase = make_bot(**self.schedule)
+        coinbase.set_orders(BTC=10)
+        eth = coinbase.add_schedule("weekly", "2039-01-03", "09:00 AM", {"ETH": 50})
+        event = mock.Mock(when=eth.next_purchase_date)
+        event.name = coinbase.get_event_name("purchase", eth)
+
+        assert coinbase.skip_failed_cycle(event)
+        assert not coinbase.skip_failed_cycle(event)
+        assert eth.next_purchase_date == datetime(2039, 1, 10, 9, 0)
+        assert coinbase.next_purchase_date == datetime(2039, 1, 3, 7, 0)
+        assert len(coinbase.scheduler) == 1
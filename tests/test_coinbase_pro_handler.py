@@ -1,8 +1,11 @@
+import unittest.mock as mock
 from datetime import datetime
+from time import monotonic
 
 import pytest
 
 from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.retry import RetryPolicy
 from src.coinbase.utilities import CoinbaseSandboxCredentials, EmailCredentials
 
 SANDBOX_API_URL = "https://api-public.sandbox.pro.coinbase.com/"
@@ -167,3 +170,145 @@ class TestCoinbaseProHandler:
 
         with pytest.raises(KeyError):
             self.invalid_coinbase_pro.send_email_confirmation(self.sample_invalid_transaction_details)
+
+
+class TestCoinbaseProHandlerOrderPolling:
+    """Tests order polling and fill aggregation without contacting Coinbase."""
+
+    coinbase_pro = CoinbaseProHandler(api_url=SANDBOX_API_URL, auth=CoinbaseExchangeAuth("4096", "4096", "4096"))
+
+    @staticmethod
+    def mock_response(status_code, json_body):
+        response = mock.Mock(status_code=status_code, content=b"")
+        response.json.return_value = json_body
+        return response
+
+    def test_place_market_order_returns_as_soon_as_order_is_done(self):
+        """Checks that place_market_order() polls the order instead of sleeping for a fixed time."""
+
+        responses = [
+            self.mock_response(200, {"id": "order-1", "status": "pending"}),
+            self.mock_response(200, {"id": "order-1", "status": "pending"}),
+            self.mock_response(200, {"id": "order-1", "status": "done"}),
+        ]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=responses) as request:
+            start = monotonic()
+            assert self.coinbase_pro.place_market_order("BTC", 50) == "order-1"
+            elapsed = monotonic() - start
+
+        assert elapsed < 1
+        assert request.call_args_list[1] == mock.call("GET", "orders/order-1")
+
+    def test_wait_for_order_gives_up_after_timeout(self):
+        """Checks that wait_for_order() returns the last state once the timeout passes."""
+
+        with mock.patch.object(
+            self.coinbase_pro, "_request", return_value=self.mock_response(200, {"id": "order-1", "status": "open"})
+        ):
+            order = self.coinbase_pro.wait_for_order("order-1", timeout=0.3)
+
+        assert order["status"] == "open"
+
+    def test_get_order_with_invalid_parameters(self):
+        """Checks get_order() raises appropriate errors with invalid parameters."""
+
+        with pytest.raises(TypeError, match="order_id must be of type str"):
+            self.coinbase_pro.get_order(None)
+
+        with pytest.raises(ValueError, match="order_id cannot be null"):
+            self.coinbase_pro.get_order("")
+
+    def test_get_transaction_details_sums_fills_of_order(self):
+        """Checks that get_transaction_details() aggregates every fill of the given order."""
+
+        fills = [
+            {"fee": "0.25", "usd_volume": "40.00", "price": "20000.00", "size": "0.002"},
+            {"fee": "0.10", "usd_volume": "20.00", "price": "10000.00", "size": "0.002"},
+        ]
+
+        with mock.patch.object(self.coinbase_pro, "_request", return_value=self.mock_response(200, fills)) as request:
+            details = self.coinbase_pro.get_transaction_details("BTC", "2022-01-01", order_id="order-1")
+
+        request.assert_called_once_with("GET", "fills", params={"order_id": "order-1"})
+        assert details == {
+            "product": "BTC",
+            "start_date": "2022-01-01",
+            "coinbase_fee": "0.35",
+            "amount_invested": "60.00",
+            "purchase_price": "15000.00",
+            "purchase_amount": "0.00400000",
+            "total_amount": "60.35",
+        }
+
+
+class TestCoinbaseProHandlerOffline:
+    """Tests CoinbaseProHandler against the local mock exchange, with no network."""
+
+    def test_invalid_auth_raises_runtime_error(self, make_handler, mock_exchange):
+        """Checks that requests with a wrong secret are rejected."""
+
+        handler = make_handler(
+            mock_exchange, auth=CoinbaseExchangeAuth(**{**mock_exchange.credentials, "secret_key": "d3Jvbmc="})
+        )
+
+        with pytest.raises(RuntimeError, match="invalid signature"):
+            handler.get_payment_method()
+
+    def test_deposit_from_bank(self, make_handler, mock_exchange):
+        """Checks that deposits reach the user's USD balance."""
+
+        handler = make_handler(mock_exchange)
+
+        assert handler.get_payment_method() == mock_exchange.payment_method_id
+        assert handler.deposit_from_bank(50)
+        assert handler.get_balance_snapshot().get_balance("USD") == 1050.0
+
+    def test_place_market_order_and_get_transaction_details(self, make_handler, mock_exchange):
+        """Checks a purchase end to end, including waiting for the order to be done."""
+
+        mock_exchange.polls_until_done = 2
+        mock_exchange.fills_per_order = 3
+        handler = make_handler(mock_exchange)
+
+        order_id = handler.place_market_order("BTC", 20)
+        transaction_details = handler.get_transaction_details("BTC", "2023-01-01", order_id=order_id)
+
+        assert mock_exchange.get_request_count("GET", "orders/" + order_id) == 3
+        assert transaction_details["total_amount"] == "20.00"
+        assert transaction_details["coinbase_fee"] == "0.10"
+        assert transaction_details["purchase_price"] == "100.00"
+        assert handler.get_balance_snapshot().get_balance("BTC") == pytest.approx(0.199)
+
+    def test_place_market_order_insufficient_funds(self, make_handler, mock_exchange):
+        """Checks that the exchange's error reaches the caller."""
+
+        handler = make_handler(mock_exchange)
+
+        with pytest.raises(RuntimeError, match="Insufficient funds"):
+            handler.place_market_order("BTC", 5000)
+
+    def test_iter_fills_pages(self, make_handler, mock_exchange):
+        """Checks that every fill is yielded across pages, newest first."""
+
+        for _ in range(25):
+            mock_exchange.add_fill("ETH-USD", "order-id", 100.0, 0.1)
+
+        handler = make_handler(mock_exchange)
+        fills = list(handler.iter_fills(product="ETH", limit=10))
+
+        assert [fill.trade_id for fill in fills] == list(range(25, 0, -1))
+        assert mock_exchange.get_request_count("GET", "fills") == 3
+        assert list(handler.iter_fills(product="ETH", before=20, limit=10)) == fills[:5]
+
+    def test_server_errors_raise_runtime_error(self, make_handler, mock_exchange):
+        """Checks that server errors which outlast the retries surface as RuntimeErrors."""
+
+        mock_exchange.fail("GET", "coinbase-accounts", status=503, message="Service unavailable", times=4)
+        handler = make_handler(mock_exchange)
+        handler.retry_policy = RetryPolicy(max_retries=3, initial_delay=0.001, max_delay=0.001)
+
+        with pytest.raises(RuntimeError, match="Service unavailable"):
+            handler.get_balance_snapshot()
+
+        assert handler.get_balance_snapshot().get_balance() == 1000.0
@@ -0,0 +1,40 @@
+import unittest.mock as mock
+
+import dotenv
+
+from src.coinbase.utilities import Config
+
+
+class TestConfig:
+    """Tests Config class."""
+
+    def test_dotenv_is_parsed_once_on_first_read(self, tmp_path, monkeypatch):
+        """Checks that the .env file is only parsed when a variable is first read, and only once."""
+
+        monkeypatch.delenv("CB_API_KEY", raising=False)
+        path = tmp_path / ".env"
+        path.write_text("CB_API_KEY=file-key\nEMAIL_ADDRESS=me@example.com\n")
+
+        with mock.patch("dotenv.dotenv_values", wraps=dotenv.dotenv_values) as dotenv_values:
+            config = Config(str(path))
+
+            assert dotenv_values.call_count == 0
+            assert config.get("CB_API_KEY") == "file-key"
+            assert config.get("CB_API_PASS") is None
+            assert dotenv_values.call_count == 1
+
+    def test_environment_takes_precedence(self, tmp_path, monkeypatch):
+        """Checks that variables set in the environment override the .env file, as with load_dotenv()."""
+
+        monkeypatch.setenv("CB_API_KEY", "environment-key")
+        path = tmp_path / ".env"
+        path.write_text("CB_API_KEY=file-key\n")
+
+        assert Config(str(path)).get("CB_API_KEY") == "environment-key"
+
+    def test_missing_dotenv(self, tmp_path, monkeypatch):
+        """Checks that a missing .env file leaves only the environment."""
+
+        monkeypatch.delenv("CB_API_KEY", raising=False)
+
+        assert Config(str(tmp_path / ".env")).get("CB_API_KEY") is None
@@ -0,0 +1,156 @@
+import json
+import unittest.mock as mock
+from time import monotonic, time
+
+import pytest
+import requests
+
+from src.orders import utilities
+from src.orders.currency_catalog import CurrencyCatalog
+from src.orders.utilities import DataInputVerifier
+
+CURRENCIES = [{"id": "BTC", "status": "online"}, {"id": "ETH", "status": "online"}, {"id": "ADA", "status": "online"}]
+
+
+def mock_response(status_code, json_body):
+    response = mock.Mock(status_code=status_code, content=b"")
+    response.json.return_value = json_body
+    return response
+
+
+@pytest.fixture
+def mock_get():
+    with mock.patch("src.orders.currency_catalog.requests.get", return_value=mock_response(200, CURRENCIES)) as get:
+        yield get
+
+
+class TestCurrencyCatalog:
+    """Tests CurrencyCatalog class."""
+
+    def test_fetches_once(self, mock_get, tmp_path):
+        """Checks that the catalog is downloaded once and symbols are matched case-insensitively."""
+
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"))
+
+        assert catalog.is_supported("BTC")
+        assert "eth" in catalog
+        assert not catalog.is_supported("NOTACOIN")
+        assert mock_get.call_count == 1
+
+    def test_saved_catalog_is_reused(self, mock_get, tmp_path):
+        """Checks that a fresh catalog on disk is used without a request."""
+
+        path = str(tmp_path / "currencies.json")
+        CurrencyCatalog(path=path).get_symbols()
+
+        assert CurrencyCatalog(path=path).is_supported("ADA")
+        assert mock_get.call_count == 1
+
+        with open(path) as catalog_file:
+            assert json.load(catalog_file)["currencies"] == ["ADA", "BTC", "ETH"]
+
+    def test_stale_catalog_is_refreshed(self, mock_get, tmp_path):
+        """Checks that a catalog older than its TTL is downloaded again."""
+
+        path = str(tmp_path / "currencies.json")
+
+        with open(path, "w") as catalog_file:
+            json.dump({"fetched_at": time() - 120, "currencies": ["BTC"]}, catalog_file)
+
+        catalog = CurrencyCatalog(path=path, ttl=60)
+
+        assert catalog.is_supported("ETH")
+        assert mock_get.call_count == 1
+
+    def test_stale_catalog_is_used_when_refresh_fails(self, tmp_path):
+        """Checks that a stale catalog is kept if Coinbase cannot be reached."""
+
+        path = str(tmp_path / "currencies.json")
+
+        with open(path, "w") as catalog_file:
+            json.dump({"fetched_at": 0, "currencies": ["BTC"]}, catalog_file)
+
+        with mock.patch(
+            "src.orders.currency_catalog.requests.get", side_effect=requests.ConnectionError("unreachable")
+        ):
+            assert CurrencyCatalog(path=path).is_supported("BTC")
+
+    def test_offline(self, mock_get, tmp_path):
+        """Checks that offline mode trusts the saved catalog and never makes a request."""
+
+        path = str(tmp_path / "currencies.json")
+
+        with pytest.raises(RuntimeError, match="No saved currency catalog"):
+            CurrencyCatalog(path=path, offline=True).get_symbols()
+
+        with open(path, "w") as catalog_file:
+            json.dump({"fetched_at": 0, "currencies": ["BTC"]}, catalog_file)
+
+        assert CurrencyCatalog(path=path, offline=True).is_supported("BTC")
+        mock_get.assert_not_called()
+
+    def test_request_failure_raises_runtime_error(self, tmp_path):
+        """Checks that a failed download without a saved catalog raises a RuntimeError."""
+
+        with mock.patch("src.orders.currency_catalog.requests.get", return_value=mock_response(500, {})):
+            with pytest.raises(RuntimeError, match="Could not retrieve the currency catalog"):
+                CurrencyCatalog(path=str(tmp_path / "currencies.json")).get_symbols()
+
+
+class TestIsValidCryptoWithCatalog:
+    """Tests that DataInputVerifier.is_valid_crypto() answers from the currency catalog."""
+
+    def test_many_symbols_one_request(self, mock_get, tmp_path):
+        """Checks that validating hundreds of symbols makes one request and takes milliseconds."""
+
+        with mock.patch.object(utilities, "currency_catalog", CurrencyCatalog(path=str(tmp_path / "currencies.json"))):
+            start = monotonic()
+            results = [DataInputVerifier.is_valid_crypto(crypto) for crypto in ["btc", "ETH", "ADA", "XYZ"] * 250]
+            elapsed = monotonic() - start
+
+        assert results == [True, True, True, False] * 250
+        assert mock_get.call_count == 1
+        assert elapsed < 0.5
+
+    def test_unavailable_catalog(self, tmp_path):
+        """Checks that is_valid_crypto() returns False rather than raising if there is no catalog."""
+
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), offline=True)
+
+        with mock.patch.object(utilities, "currency_catalog", catalog):
+            assert not DataInputVerifier.is_valid_crypto("BTC")
+
+
+class TestValidateOrders:
+    """Tests DataInputVerifier.validate_orders()."""
+
+    def test_reports(self, mock_get, tmp_path):
+        """Checks that every order gets a report of its own, in the order given."""
+
+        orders = [("BTC", "10"), ("XYZ", "5"), ("ETH", "-1"), ("BTC", "abc")]
+
+        with mock.patch.object(utilities, "currency_catalog", CurrencyCatalog(path=str(tmp_path / "currencies.json"))):
+            reports = DataInputVerifier.validate_orders(orders)
+
+        assert [(report.valid_crypto, report.valid_dollar_amount) for report in reports] == [
+            (True, True),
+            (False, True),
+            (True, False),
+            (True, False),
+        ]
+        assert reports[1].errors == ["Cryptocurrency symbol 'XYZ' is not valid!"]
+        assert reports[3].errors == ["Dollar amount 'abc' is not valid!"]
+        assert mock_get.call_count == 1
+
+    def test_unavailable_catalog(self, tmp_path):
+        """Checks that every symbol is reported invalid, without raising, if there is no catalog."""
+
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), offline=True)
+
+        with mock.patch.object(utilities, "currency_catalog", catalog):
+            reports = DataInputVerifier.validate_orders([("BTC", "10"), ("ETH", "5")])
+
+        assert [report.errors for report in reports] == [
+            ["Cryptocurrency symbol 'BTC' is not valid!"],
+            ["Cryptocurrency symbol 'ETH' is not valid!"],
+        ]
@@ -0,0 +1,108 @@
+import unittest.mock as mock
+from datetime import datetime, timezone
+
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.fills import Fill, parse_fill
+
+SANDBOX_API_URL = "https://api-public.sandbox.pro.coinbase.com/"
+
+
+def make_fill(trade_id):
+    return {
+        "trade_id": trade_id,
+        "product_id": "BTC-USD",
+        "order_id": f"order-{trade_id}",
+        "created_at": "2022-01-01T10:00:00.123Z",
+        "side": "buy",
+        "price": "20000.00",
+        "size": "0.0005",
+        "fee": "0.05",
+        "usd_volume": "10.00",
+        "settled": True,
+    }
+
+
+def mock_page(trade_ids, headers):
+    response = mock.Mock(status_code=200, content=b"", headers=headers)
+    response.json.return_value = [make_fill(trade_id) for trade_id in trade_ids]
+    return response
+
+
+class TestFills:
+    """Tests fill parsing and CoinbaseProHandler.iter_fills()."""
+
+    coinbase_pro = CoinbaseProHandler(api_url=SANDBOX_API_URL, auth=CoinbaseExchangeAuth("4096", "4096", "4096"))
+
+    def test_parse_fill(self):
+        """Checks that fills are converted to typed records."""
+
+        fill = parse_fill(make_fill(7))
+
+        assert isinstance(fill, Fill)
+        assert fill.trade_id == 7
+        assert fill.created_at == datetime(2022, 1, 1, 10, 0, 0, 123000, tzinfo=timezone.utc)
+        assert fill.price == 20000.0
+        assert fill.usd_volume == 10.0
+
+    def test_iter_fills_follows_after_cursor(self):
+        """Checks that every page is requested by following the CB-AFTER header."""
+
+        pages = [
+            mock_page([6, 5], {"CB-AFTER": "5"}),
+            mock_page([4, 3], {"CB-AFTER": "3"}),
+            mock_page([2], {"CB-AFTER": "2"}),
+        ]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=pages) as request:
+            trade_ids = [fill.trade_id for fill in self.coinbase_pro.iter_fills(product="BTC", limit=2)]
+
+        assert trade_ids == [6, 5, 4, 3, 2]
+        assert [call.kwargs["params"].get("after") for call in request.call_args_list] == [None, "5", "3"]
+
+    def test_iter_fills_follows_before_cursor(self):
+        """Checks that passing a cursor walks towards newer fills with CB-BEFORE."""
+
+        pages = [mock_page([12, 11], {"CB-BEFORE": "12"}), mock_page([], {})]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=pages) as request:
+            trade_ids = [fill.trade_id for fill in self.coinbase_pro.iter_fills(product="BTC", before=10, limit=2)]
+
+        assert trade_ids == [12, 11]
+        assert [call.kwargs["params"]["before"] for call in request.call_args_list] == [10, "12"]
+
+    def test_iter_fills_is_lazy(self):
+        """Checks that the next page is only requested once the current one is consumed."""
+
+        pages = [mock_page([4, 3], {"CB-AFTER": "3"}), mock_page([2, 1], {"CB-AFTER": "1"})]
+
+        with mock.patch.object(self.coinbase_pro, "_request", side_effect=pages) as request:
+            fills = self.coinbase_pro.iter_fills(product="BTC", limit=2)
+            assert request.call_count == 0
+
+            next(fills)
+            next(fills)
+            assert request.call_count == 1
+
+            next(fills)
+            assert request.call_count == 2
+
+    def test_iter_fills_with_invalid_parameters(self):
+        """Checks that iter_fills() raises appropriate errors with invalid parameters."""
+
+        with pytest.raises(ValueError, match="product or order_id must be provided"):
+            next(self.coinbase_pro.iter_fills())
+
+        with pytest.raises(TypeError, match="limit must be of type int"):
+            next(self.coinbase_pro.iter_fills(product="BTC", limit="100"))
+
+        with pytest.raises(ValueError, match="limit must be between 1 and 100"):
+            next(self.coinbase_pro.iter_fills(product="BTC", limit=1000))
+
+    def test_iter_fills_raises_on_error(self):
+        """Checks that a failed page raises a RuntimeError."""
+
+        with mock.patch.object(self.coinbase_pro, "_request", return_value=mock.Mock(status_code=401, content=b"")):
+            with pytest.raises(RuntimeError, match="Could not retrieve fills"):
+                list(self.coinbase_pro.iter_fills(product="BTC"))
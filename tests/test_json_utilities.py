@@ -0,0 +1,27 @@
+from src.coinbase.utilities import atomic_write_json, read_json
+
+
+class TestJSONUtilities:
+    """Tests atomic_write_json() and read_json()."""
+
+    def test_round_trip(self, tmp_path):
+        """Checks that written data is read back and that no temporary file is left behind."""
+
+        path = str(tmp_path / "data.json")
+        atomic_write_json(path, {"currencies": ["BTC"]})
+
+        assert read_json(path) == {"currencies": ["BTC"]}
+        assert [file.name for file in tmp_path.iterdir()] == ["data.json"]
+
+    def test_missing_or_corrupt_file(self, tmp_path, capsys):
+        """Checks that read_json() returns the default for a missing file, and warns about a corrupt one."""
+
+        path = tmp_path / "data.json"
+
+        assert read_json(str(path), default=[]) == []
+        assert capsys.readouterr().out == ""
+
+        path.write_text("{not json")
+
+        assert read_json(str(path), default=[]) == []
+        assert "WARNING: Could not read" in capsys.readouterr().out
@@ -0,0 +1,127 @@
+import unittest.mock as mock
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.fills import Fill
+from src.coinbase.ledger import FillsLedger
+
+SANDBOX_API_URL = "https://api-public.sandbox.pro.coinbase.com/"
+FIRST_FILL_TIME = datetime(2022, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def make_fill(trade_id, product_id="BTC-USD"):
+    return Fill(
+        trade_id=trade_id,
+        product_id=product_id,
+        order_id=f"order-{trade_id}",
+        created_at=FIRST_FILL_TIME + timedelta(days=trade_id),
+        side="buy",
+        price=20000.0,
+        size=0.0005,
+        fee=0.05,
+        usd_volume=10.0,
+        settled=True,
+    )
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = FillsLedger(str(tmp_path / "ledger.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+class TestFillsLedger:
+    """Tests FillsLedger class."""
+
+    def test_record_fills_ignores_duplicates(self, ledger):
+        """Checks that re-recording a fill does not duplicate it."""
+
+        assert ledger.record_fills([make_fill(1), make_fill(2)]) == 2
+        assert ledger.record_fills([make_fill(2), make_fill(3)]) == 1
+        assert [row["trade_id"] for row in ledger.get_fills("BTC-USD")] == [1, 2, 3]
+
+    def test_get_fills_by_time_range(self, ledger):
+        """Checks that fills can be queried by product and time range."""
+
+        ledger.record_fills([make_fill(trade_id) for trade_id in range(1, 6)])
+        ledger.record_fills([make_fill(3, product_id="ETH-USD")])
+
+        fills = ledger.get_fills(
+            "BTC-USD", start=FIRST_FILL_TIME + timedelta(days=2), end=FIRST_FILL_TIME + timedelta(days=4)
+        )
+
+        assert [row["trade_id"] for row in fills] == [2, 3]
+        assert len(ledger.get_fills()) == 6
+        assert ledger.get_totals("BTC-USD") == {"size": 0.0025, "usd_volume": 50.0, "fee": 0.25}
+
+    def test_sync_fills_is_incremental(self, ledger):
+        """Checks that a second sync only asks for fills newer than the stored cursor."""
+
+        handler = mock.Mock()
+        handler.iter_fills.side_effect = [iter([make_fill(3), make_fill(2), make_fill(1)]), iter([make_fill(4)])]
+
+        assert ledger.sync_fills(handler, "BTC") == 3
+        assert ledger.get_cursor("BTC-USD") == 3
+
+        assert ledger.sync_fills(handler, "BTC") == 1
+        assert ledger.get_cursor("BTC-USD") == 4
+
+        assert handler.iter_fills.call_args_list == [
+            mock.call(product="BTC", before=None),
+            mock.call(product="BTC", before=3),
+        ]
+
+    def test_record_order_and_deposit(self, ledger):
+        """Checks that orders are updated in place and deposits are stored once."""
+
+        ledger.record_order({"id": "order-1", "product_id": "BTC-USD", "status": "pending", "funds": "10"})
+        ledger.record_order({"id": "order-1", "product_id": "BTC-USD", "status": "done", "funds": "10"})
+        ledger.record_deposit("deposit-1", 50)
+        ledger.record_deposit("deposit-1", 50)
+
+        orders = ledger._connection.execute("SELECT order_id, status FROM orders").fetchall()
+        deposits = ledger._connection.execute("SELECT deposit_id, amount FROM deposits").fetchall()
+
+        assert [tuple(row) for row in orders] == [("order-1", "done")]
+        assert [tuple(row) for row in deposits] == [("deposit-1", 50.0)]
+
+
+class TestCoinbaseProHandlerLedger:
+    """Tests that CoinbaseProHandler writes to its ledger."""
+
+    @staticmethod
+    def mock_response(status_code, json_body):
+        response = mock.Mock(status_code=status_code, content=b"")
+        response.json.return_value = json_body
+        return response
+
+    def test_orders_and_deposits_are_recorded(self, ledger):
+        """Checks that placed orders and deposits are written to the ledger."""
+
+        coinbase_pro = CoinbaseProHandler(
+            api_url=SANDBOX_API_URL, auth=CoinbaseExchangeAuth("4096", "4096", "4096"), ledger=ledger
+        )
+        responses = [
+            self.mock_response(200, {"id": "order-1", "product_id": "BTC-USD", "status": "pending"}),
+            self.mock_response(200, {"id": "order-1", "product_id": "BTC-USD", "status": "done", "funds": "10"}),
+            self.mock_response(200, [{"id": "bank-id"}]),
+            self.mock_response(200, {"id": "deposit-1"}),
+        ]
+
+        with mock.patch.object(coinbase_pro, "_request", side_effect=responses):
+            coinbase_pro.place_market_order("BTC", 10)
+            coinbase_pro.deposit_from_bank(10)
+
+        assert ledger._connection.execute("SELECT status FROM orders").fetchone()["status"] == "done"
+        assert ledger._connection.execute("SELECT deposit_id FROM deposits").fetchone()["deposit_id"] == "deposit-1"
+
+    def test_sync_fills_requires_ledger(self):
+        """Checks that sync_fills() raises a RuntimeError without a ledger."""
+
+        coinbase_pro = CoinbaseProHandler(api_url=SANDBOX_API_URL, auth=CoinbaseExchangeAuth("4096", "4096", "4096"))
+
+        with pytest.raises(RuntimeError, match="No ledger configured"):
+            coinbase_pro.sync_fills("BTC")
@@ -0,0 +1,178 @@
+import asyncio
+import smtplib
+import threading
+import unittest.mock as mock
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+import pytest
+import requests
+
+from src.coinbase.coinbase_bot import CoinbaseBot, CoinbaseExchangeAuth
+from src.coinbase.metrics import (
+    ERRORS,
+    HANDLER_CALLS,
+    HANDLER_LATENCY,
+    SCHEDULER_LAG,
+    SMTP_MESSAGES,
+    USD_DEPLOYED,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    MetricsServer,
+    observe,
+)
+from src.coinbase.notifier import EmailNotifier
+
+
+class TestMetrics:
+    """Tests Counter, Histogram and MetricsRegistry."""
+
+    def test_counter(self):
+        """Checks that counters add up per label set and cannot go down."""
+
+        counter = Counter("orders_total", "Orders.", ("product",))
+        counter.inc(product="BTC")
+        counter.labels(product="BTC").inc(2)
+        counter.inc(0.5, product="ETH")
+
+        assert counter.get(product="BTC") == 3
+        assert counter.get(product="ETH") == 0.5
+
+        with pytest.raises(ValueError, match="non-negative"):
+            counter.inc(-1, product="BTC")
+
+        with pytest.raises(ValueError, match="takes the labels product"):
+            counter.inc(side="buy")
+
+    def test_render(self):
+        """Checks the Prometheus text format of counters and histograms."""
+
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls.", ("method",))
+        histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        counter.inc(method='say "hi"')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        assert registry.render() == (
+            "# HELP calls_total Calls.\n"
+            "# TYPE calls_total counter\n"
+            'calls_total{method="say \\"hi\\""} 1.0\n'
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{le="0.1"} 1\n'
+            'latency_seconds_bucket{le="1.0"} 2\n'
+            'latency_seconds_bucket{le="+Inf"} 3\n'
+            "latency_seconds_sum 5.55\n"
+            "latency_seconds_count 3\n"
+        )
+
+        with pytest.raises(ValueError, match="already registered"):
+            registry.histogram("latency_seconds", "Latency.")
+
+    def test_render_while_labels_are_added(self):
+        """Checks that a metric can be rendered while other threads add label sets to it."""
+
+        counter = Counter("orders_total", "Orders.", ("product",))
+        adder = threading.Thread(target=lambda: [counter.inc(product=str(i)) for i in range(20000)])
+        adder.start()
+
+        while adder.is_alive():
+            counter.collect()
+
+        adder.join()
+        assert len(counter.collect()) == 20002
+
+    def test_observe(self):
+        """Checks that observed functions and coroutines are counted by outcome and timed."""
+
+        @observe("test_sync")
+        def sync_call(fail):
+            if fail:
+                raise RuntimeError("failed")
+
+            return "done"
+
+        @observe("test_async")
+        async def async_call():
+            return "done"
+
+        assert sync_call(False) == "done"
+
+        with pytest.raises(RuntimeError):
+            sync_call(True)
+
+        assert asyncio.run(async_call()) == "done"
+
+        assert HANDLER_CALLS.get(method="test_sync", outcome="success") == 1
+        assert HANDLER_CALLS.get(method="test_sync", outcome="error") == 1
+        assert HANDLER_LATENCY.get(method="test_sync")["count"] == 2
+        assert HANDLER_CALLS.get(method="test_async", outcome="success") == 1
+
+    def test_metrics_server(self):
+        """Checks that the registry is served at /metrics."""
+
+        registry = MetricsRegistry()
+        registry.counter("up_total", "Up.").inc()
+
+        with MetricsServer(registry=registry) as server:
+            response = requests.get(server.url)
+            missing = requests.get(server.url.replace("/metrics", "/other"))
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert "up_total 1.0" in response.text
+        assert missing.status_code == 404
+
+
+class TestBotMetrics:
+    """Tests the metrics recorded by CoinbaseBot and EmailNotifier."""
+
+    def test_purchase_cycle_metrics(self, mock_exchange):
+        """Checks that a purchase cycle records handler calls, lag, USD deployed and failed orders."""
+
+        coinbase = CoinbaseBot(
+            api_url=mock_exchange.url,
+            auth=CoinbaseExchangeAuth(**mock_exchange.credentials),
+            frequency="weekly",
+            start_date="2039-01-01",
+            start_time="10:00 AM",
+        )
+        coinbase.set_orders(BTC=600, ETH=600)
+        coinbase.coinbase.notifier.credentials.email_address = None
+        coinbase.next_purchase_date = datetime.now() - timedelta(seconds=2)
+
+        calls = HANDLER_CALLS.get(method="place_market_order", outcome="success")
+        deployed = USD_DEPLOYED.get(product="BTC")
+        lag = SCHEDULER_LAG.get(cycle="purchase")
+        order_errors = ERRORS.get(kind="order")
+
+        with pytest.raises(RuntimeError, match="Could not place orders for: ETH"):
+            coinbase.run_purchase_cycle()
+
+        assert HANDLER_CALLS.get(method="place_market_order", outcome="success") == calls + 1
+        assert USD_DEPLOYED.get(product="BTC") == deployed + 600
+        assert SCHEDULER_LAG.get(cycle="purchase")["count"] == lag["count"] + 1
+        assert SCHEDULER_LAG.get(cycle="purchase")["sum"] - lag["sum"] == pytest.approx(2, abs=1)
+        assert ERRORS.get(kind="order") == order_errors + 1
+
+    def test_smtp_metrics(self):
+        """Checks that sent and failed emails are counted."""
+
+        notifier = EmailNotifier(
+            mock.Mock(email_address="bot@example.com", password="password", empty_credentials=False)
+        )
+        message = EmailMessage()
+        sent = SMTP_MESSAGES.get(outcome="sent")
+        failed = SMTP_MESSAGES.get(outcome="failed")
+
+        with mock.patch("smtplib.SMTP_SSL"):
+            assert notifier.send_messages([message, message]) == 2
+
+        with mock.patch("smtplib.SMTP_SSL", side_effect=smtplib.SMTPAuthenticationError(535, b"bad")):
+            assert notifier.send_messages([message]) == 0
+
+        assert SMTP_MESSAGES.get(outcome="sent") == sent + 2
+        assert SMTP_MESSAGES.get(outcome="failed") == failed + 1
@@ -0,0 +1,57 @@
+from time import monotonic
+
+import requests
+
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth
+from testing.mock_exchange import MockCoinbaseExchange
+
+
+class TestMockCoinbaseExchange:
+    """Tests the configurable behaviour of MockCoinbaseExchange."""
+
+    def test_signature_is_verified(self, mock_exchange):
+        """Checks that unsigned and wrongly signed requests are rejected and public endpoints are open."""
+
+        assert requests.get(mock_exchange.url + "payment-methods").status_code == 401
+
+        auth = CoinbaseExchangeAuth(**{**mock_exchange.credentials, "passphrase": "wrong"})
+        response = requests.get(mock_exchange.url + "payment-methods", auth=auth)
+        assert response.json() == {"message": "Invalid Passphrase"}
+
+        response = requests.get(mock_exchange.url + "currencies")
+        assert response.status_code == 200
+        assert "BTC" in [currency["id"] for currency in response.json()]
+        assert requests.get(mock_exchange.url + "currencies/NOTACOIN").status_code == 404
+
+    def test_latency(self):
+        """Checks that configured latency is added to every response."""
+
+        with MockCoinbaseExchange(latency=0.2) as exchange:
+            start = monotonic()
+            requests.get(exchange.url + "currencies")
+
+            assert monotonic() - start >= 0.2
+
+    def test_rate_limit(self):
+        """Checks that requests beyond the rate limit get a 429 with Retry-After."""
+
+        with MockCoinbaseExchange(rate_limit=2) as exchange:
+            auth = CoinbaseExchangeAuth(**exchange.credentials)
+            responses = [requests.get(exchange.url + "profiles", auth=auth) for _ in range(3)]
+
+            assert [response.status_code for response in responses] == [200, 200, 429]
+            assert responses[2].headers["Retry-After"] == "1"
+
+            # Public endpoints are limited separately
+            assert requests.get(exchange.url + "currencies").status_code == 200
+            assert exchange.status_counts == {200: 3, 429: 1}
+
+    def test_injected_failures(self, mock_exchange):
+        """Checks that failures are returned the configured number of times."""
+
+        mock_exchange.fail("GET", "currencies", status=502, times=2)
+
+        statuses = [requests.get(mock_exchange.url + "currencies").status_code for _ in range(3)]
+
+        assert statuses == [502, 502, 200]
+        assert mock_exchange.get_request_count("GET", "currencies") == 3
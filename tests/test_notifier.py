@@ -0,0 +1,118 @@
+import unittest.mock as mock
+
+import pytest
+
+from src.coinbase.notifier import EmailNotifier
+from testing.smtp_server import LocalSMTPServer
+
+EMAIL_ADDRESS = "user@example.com"
+EMAIL_PASSWORD = "app-password"
+
+
+def transaction_details(product):
+    return {
+        "product": product,
+        "start_date": "2023-01-01",
+        "coinbase_fee": "0.30",
+        "amount_invested": "19.70",
+        "purchase_price": "100.00",
+        "purchase_amount": 0.197,
+        "total_amount": "20.00",
+    }
+
+
+def credentials(email_address=EMAIL_ADDRESS, password=EMAIL_PASSWORD):
+    return mock.Mock(email_address=email_address, password=password, empty_credentials=False)
+
+
+@pytest.fixture
+def smtp_server():
+    with LocalSMTPServer(EMAIL_ADDRESS, EMAIL_PASSWORD) as server:
+        yield server
+
+
+def local_notifier(server, **kwargs):
+    return EmailNotifier(credentials(**kwargs), host=server.host, port=server.port, use_ssl=False)
+
+
+class TestEmailNotifier:
+    """Tests EmailNotifier class against a local SMTP server."""
+
+    def test_cycle_uses_one_session(self, smtp_server):
+        """Checks that every confirmation of a cycle is sent over one connection and one login, reporting each one."""
+
+        notifier = local_notifier(smtp_server)
+        details = [transaction_details(product) for product in ("BTC", "ETH", "ADA")]
+
+        sent = []
+
+        assert notifier.send_email_confirmations(details, on_sent=sent.append) == 3
+        assert sent == [0, 1, 2]
+        assert smtp_server.counts == {"connections": 1, "logins": 1}
+        assert [msg["Subject"] for msg in smtp_server.messages] == [
+            f"Your Purchase of $20.00 of {product} Was Successful!" for product in ("BTC", "ETH", "ADA")
+        ]
+
+    def test_digest(self, smtp_server):
+        """Checks that digest mode combines a cycle's transactions into one email."""
+
+        notifier = local_notifier(smtp_server)
+        details = [transaction_details(product) for product in ("BTC", "ETH")]
+
+        assert notifier.send_email_confirmations(details, digest=True) == 1
+        assert smtp_server.counts == {"connections": 1, "logins": 1}
+
+        msg = smtp_server.messages[0]
+        body = msg.get_content()
+
+        assert msg["Subject"] == "Your Purchases of $40.00 of BTC, ETH Were Successful!"
+        assert msg["To"] == EMAIL_ADDRESS
+        assert "BTC:" in body and "ETH:" in body
+        assert "Amount Purchased: 0.197 ETH" in body
+
+    def test_send_email_confirmation(self, smtp_server):
+        """Checks that a single confirmation is still sent on its own."""
+
+        notifier = local_notifier(smtp_server)
+
+        assert notifier.send_email_confirmation(transaction_details("BTC"))
+        assert len(smtp_server.messages) == 1
+
+    def test_invalid_credentials(self, smtp_server):
+        """Checks that invalid credentials send nothing instead of raising."""
+
+        notifier = local_notifier(smtp_server, password="wrong-password")
+
+        assert notifier.send_email_confirmations([transaction_details("BTC")]) == 0
+        assert not notifier.send_email_confirmation(transaction_details("BTC"))
+        assert smtp_server.messages == []
+
+    def test_empty_credentials(self, smtp_server):
+        """Checks that no connection is opened without credentials."""
+
+        notifier = EmailNotifier(
+            mock.Mock(empty_credentials=True), host=smtp_server.host, port=smtp_server.port, use_ssl=False
+        )
+
+        assert notifier.send_email_confirmations([transaction_details("BTC")], digest=True) == 0
+        assert smtp_server.counts["connections"] == 0
+
+    def test_invalid_parameters(self):
+        """Checks that send_email_confirmations() returns correct errors with invalid parameters."""
+
+        notifier = EmailNotifier(mock.Mock(empty_credentials=True))
+
+        with pytest.raises(TypeError):
+            notifier.send_email_confirmations(None)
+
+        with pytest.raises(TypeError):
+            notifier.send_email_confirmations(None, digest=True)
+
+        with pytest.raises(ValueError):
+            notifier.send_email_confirmations([], digest=True)
+
+        with pytest.raises(TypeError):
+            notifier.send_email_confirmations([None])
+
+        with pytest.raises(ValueError):
+            notifier.send_email_confirmations([{}], digest=True)
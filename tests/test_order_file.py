@@ -0,0 +1,198 @@
+import json
+import unittest.mock as mock
+from time import perf_counter
+
+import pytest
+import yaml
+
+from src.orders import utilities
+from src.orders.currency_catalog import CurrencyCatalog
+from src.orders.order_file import OrderSchema, load_order_file
+from src.orders.yaml_input_collector import YAMLInputCollector
+
+SCHEDULE = {
+    "crypto": ["BTC", "ETH"],
+    "amount_usd": ["10", "25.50"],
+    "start_date": "2039-01-03",
+    "start_time": "07:00 AM",
+    "frequency": "daily",
+}
+
+
+@pytest.fixture(autouse=True)
+def currency_catalog(mock_exchange, tmp_path, monkeypatch):
+    """A currency catalog downloaded from the mock exchange."""
+
+    catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), url=mock_exchange.url + "currencies")
+    monkeypatch.setattr(utilities, "currency_catalog", catalog)
+
+    return catalog
+
+
+class TestLoadOrderFile:
+    """Tests load_order_file() with every supported format."""
+
+    def test_formats_load_the_same_document(self, tmp_path):
+        """Checks that YAML, JSON and CSV files of the same schedule load alike, with every value a string."""
+
+        (tmp_path / "orders.yaml").write_text(yaml.safe_dump(SCHEDULE))
+        (tmp_path / "orders.json").write_text(
+            '{"crypto": ["BTC", "ETH"], "amount_usd": [10, 25.50], "start_date": "2039-01-03", '
+            '"start_time": "07:00 AM", "frequency": "daily"}'
+        )
+        (tmp_path / "orders.csv").write_text(
+            "crypto,amount_usd,start_date,start_time,frequency\n"
+            "BTC,10,2039-01-03,07:00 AM,daily\n"
+            "ETH,25.50,2039-01-03,07:00 AM,daily\n"
+        )
+
+        for extension in ("yaml", "json", "csv"):
+            assert load_order_file(str(tmp_path / f"orders.{extension}")) == SCHEDULE
+
+    def test_csv_rows_are_grouped_into_schedules(self, tmp_path):
+        """Checks that CSV rows sharing the schedule columns form one schedule each."""
+
+        path = tmp_path / "orders.csv"
+        path.write_text(
+            "name,crypto,amount_usd,start_date,start_time,frequency\n"
+            "btc-daily,BTC,10,2039-01-03,07:00 AM,daily\n"
+            "eth-weekly,ETH,50,2039-01-03,09:00 AM,weekly\n"
+            "eth-weekly,LINK,25.50,2039-01-03,09:00 AM,weekly\n"
+        )
+
+        input_collector = YAMLInputCollector(yaml_filepath=str(path))
+        input_collector.collect_inputs()
+
+        assert [schedule["name"] for schedule in input_collector.schedules] == ["btc-daily", "eth-weekly"]
+        assert input_collector.schedules[1]["orders"] == {"ETH": "50", "LINK": "25.50"}
+
+    def test_csv_without_order_columns(self, tmp_path):
+        """Checks that a CSV file without the crypto and amount_usd columns raises a RuntimeError."""
+
+        path = tmp_path / "orders.csv"
+        path.write_text("symbol,usd\nBTC,10\n")
+
+        with pytest.raises(RuntimeError, match="has no crypto, amount_usd column!"):
+            load_order_file(str(path))
+
+    def test_unknown_extension(self, tmp_path):
+        """Checks that a file in an unsupported format raises a RuntimeError."""
+
+        with pytest.raises(RuntimeError, match="must end in one of .yaml, .yml, .json, .csv!"):
+            load_order_file(str(tmp_path / "orders.toml"))
+
+    @pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML was built without LibYAML")
+    def test_yaml_uses_libyaml(self, tmp_path):
+        """Checks that YAML files are parsed with the LibYAML loader when it is available."""
+
+        path = tmp_path / "orders.yaml"
+        path.write_text(yaml.safe_dump(SCHEDULE))
+
+        with mock.patch("yaml.load", wraps=yaml.load) as load:
+            load_order_file(str(path))
+
+        assert load.call_args.kwargs["Loader"] is yaml.CBaseLoader
+
+
+class TestOrderSchema:
+    """Tests OrderSchema class."""
+
+    def test_every_error_is_reported(self):
+        """Checks that validation carries on past the first error and reports where each one is."""
+
+        document = {
+            "schedules": [
+                {**SCHEDULE, "name": "a", "crypto": ["BTC", "INVALID"], "amount_usd": ["ten", "5"]},
+                {**SCHEDULE, "name": "a", "frequency": "yearly", "amount_usd": ["5"]},
+                {key: value for key, value in SCHEDULE.items() if key != "start_time"},
+            ]
+        }
+
+        schedules, errors = OrderSchema().validate(document)
+
+        assert errors == [
+            "schedules[0].amount_usd[0]: Dollar amount 'ten' is not valid!",
+            "schedules[0].crypto[1]: Cryptocurrency symbol 'INVALID' is not valid!",
+            "schedules[1].frequency: Frequency 'yearly' is not valid!",
+            "schedules[1]: Number of crypto symbols does not match number of amounts given.",
+            "schedules[1]: Schedule name 'a' is used more than once!",
+            "schedules[2].start_time: 'start_time' is missing!",
+        ]
+
+    def test_nested_lists_are_reported(self):
+        """Checks that nested lists in place of a crypto symbol or a schedule name are reported, not raised."""
+
+        document = {
+            "schedules": [
+                {**SCHEDULE, "name": ["a"], "crypto": [["BTC"], "ETH"]},
+                {**SCHEDULE, "name": ["a"]},
+            ]
+        }
+
+        schedules, errors = OrderSchema().validate(document)
+
+        assert errors == [
+            "schedules[0].name: Schedule name '['a']' is not valid!",
+            "schedules[0].crypto[0]: Cryptocurrency symbol '['BTC']' is not valid!",
+            "schedules[1].name: Schedule name '['a']' is not valid!",
+        ]
+        assert schedules[0]["orders"] == {"ETH": "25.50"}
+
+    def test_nested_list_in_yaml_file(self, tmp_path):
+        """Checks that collect_inputs() lists a nested crypto list among the errors of a YAML file."""
+
+        path = tmp_path / "orders.yaml"
+        path.write_text(yaml.safe_dump({**SCHEDULE, "crypto": [["BTC"], "ETH"], "amount_usd": ["10", "ten"]}))
+
+        with pytest.raises(RuntimeError) as error:
+            YAMLInputCollector(yaml_filepath=str(path)).collect_inputs()
+
+        assert str(error.value).splitlines() == [
+            "crypto[0]: Cryptocurrency symbol '['BTC']' is not valid!",
+            "amount_usd[1]: Dollar amount 'ten' is not valid!",
+        ]
+
+    def test_collect_inputs_raises_every_error(self, tmp_path):
+        """Checks that YAMLInputCollector.collect_inputs() raises one RuntimeError listing every error."""
+
+        path = tmp_path / "orders.json"
+        path.write_text(json.dumps({**SCHEDULE, "start_date": "2039/01/03", "amount_usd": ["10", "-1"]}))
+
+        with pytest.raises(RuntimeError) as error:
+            YAMLInputCollector(yaml_filepath=str(path)).collect_inputs()
+
+        assert str(error.value).splitlines() == [
+            "start_date: Date string '2039/01/03' is not valid!",
+            "amount_usd[1]: Dollar amount '-1' is not valid!",
+        ]
+
+    def test_catalog_is_downloaded_once(self, mock_exchange):
+        """Checks that crypto symbols are checked against a single download of the currency catalog."""
+
+        schedules, errors = OrderSchema().validate({**SCHEDULE, "crypto": ["BTC", "ETH", "SOL"] * 100})
+
+        assert errors == ["Number of crypto symbols does not match number of amounts given."]
+        assert schedules[0]["orders"] == {"BTC": "10", "ETH": "25.50"}
+        assert mock_exchange.get_request_count("GET", "currencies") == 1
+
+    def test_large_file_loads_quickly(self, tmp_path, currency_catalog):
+        """Checks that an order file with tens of thousands of orders is loaded and validated in under a second."""
+
+        symbols = ["BTC", "ETH", "ADA", "SOL", "DOT", "LINK", "LTC", "DOGE", "AVAX", "XLM"]
+        document = {
+            "schedules": [
+                {**SCHEDULE, "name": f"schedule-{index}", "crypto": symbols, "amount_usd": ["10"] * len(symbols)}
+                for index in range(2000)
+            ]
+        }
+        path = tmp_path / "orders.yaml"
+        path.write_text(yaml.dump(document, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper)))
+        currency_catalog.get_symbols()
+
+        start = perf_counter()
+        input_collector = YAMLInputCollector(yaml_filepath=str(path))
+        input_collector.collect_inputs()
+        elapsed = perf_counter() - start
+
+        assert sum(len(schedule["orders"]) for schedule in input_collector.schedules) == 20000
+        assert elapsed < 1
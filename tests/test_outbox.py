@@ -0,0 +1,271 @@
+import json
+import threading
+import unittest.mock as mock
+from time import monotonic, sleep
+
+import pytest
+
+from src.coinbase.metrics import OUTBOX_NOTIFICATIONS, REGISTRY
+from src.coinbase.outbox import NotificationOutbox
+
+
+class TestNotificationOutbox:
+    """Tests NotificationOutbox class."""
+
+    def test_invalid_parameters(self):
+        """Checks that NotificationOutbox raises correct errors with invalid parameters."""
+
+        with pytest.raises(TypeError, match="deliver must be callable"):
+            NotificationOutbox(None)
+
+        with pytest.raises(TypeError, match="maxsize must be of type int"):
+            NotificationOutbox(print, maxsize="10")
+
+        with pytest.raises(ValueError, match="maxsize must be a positive number"):
+            NotificationOutbox(print, maxsize=0)
+
+    def test_delivers_in_background(self):
+        """Checks that enqueue() returns immediately and the worker delivers in order."""
+
+        delivered = []
+
+        def deliver(notification):
+            sleep(0.1)
+            delivered.append(notification)
+
+        outbox = NotificationOutbox(deliver)
+        outbox.start()
+
+        start = monotonic()
+        assert outbox.enqueue({"id": 1})
+        assert outbox.enqueue({"id": 2})
+        assert monotonic() - start < 0.05
+
+        outbox.join()
+        outbox.stop()
+
+        assert delivered == [{"id": 1}, {"id": 2}]
+        assert outbox.get_metrics() == {
+            "depth": 0,
+            "enqueued": 2,
+            "sent": 2,
+            "retried": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    def test_counters_are_exported(self):
+        """Checks that delivery counters are added to the coinbase_outbox_notifications_total metric."""
+
+        enqueued = OUTBOX_NOTIFICATIONS.get(outcome="enqueued")
+        sent = OUTBOX_NOTIFICATIONS.get(outcome="sent")
+        outbox = NotificationOutbox(print)
+        outbox.start()
+        outbox.enqueue({"id": 1})
+        outbox.join()
+        outbox.stop()
+
+        assert OUTBOX_NOTIFICATIONS.get(outcome="enqueued") == enqueued + 1
+        assert OUTBOX_NOTIFICATIONS.get(outcome="sent") == sent + 1
+        assert 'coinbase_outbox_notifications_total{outcome="sent"}' in REGISTRY.render()
+
+    def test_retries_with_backoff(self):
+        """Checks that failed deliveries are retried and given up on after max_attempts."""
+
+        deliver = mock.Mock(side_effect=[OSError("timed out"), OSError("timed out"), None])
+        outbox = NotificationOutbox(deliver, retry_delay=0.01)
+        outbox.start()
+        outbox.enqueue({"id": 1})
+        outbox.join()
+
+        assert deliver.call_count == 3
+        assert outbox.get_metrics()["retried"] == 2
+        assert outbox.get_metrics()["sent"] == 1
+
+        deliver.side_effect = OSError("timed out")
+        outbox.enqueue({"id": 2})
+        outbox.join()
+        outbox.stop()
+
+        assert outbox.get_metrics()["failed"] == 1
+        assert deliver.call_count == 3 + outbox.max_attempts
+
+    def test_queue_is_bounded(self):
+        """Checks that notifications are dropped once the queue is full."""
+
+        outbox = NotificationOutbox(print, maxsize=1)
+
+        assert outbox.enqueue({"id": 1})
+        assert not outbox.enqueue({"id": 2})
+        assert outbox.get_metrics()["depth"] == 1
+        assert outbox.get_metrics()["dropped"] == 1
+
+    def test_persists_unsent_notifications(self, tmp_path):
+        """Checks that queued notifications survive a restart."""
+
+        path = str(tmp_path / "outbox.json")
+
+        outbox = NotificationOutbox(print, path=path)
+        outbox.enqueue({"id": 1})
+        outbox.enqueue({"id": 2})
+        outbox.stop()
+
+        with open(path) as outbox_file:
+            assert [job["notification"] for job in json.load(outbox_file)] == [{"id": 1}, {"id": 2}]
+
+        delivered = []
+        outbox = NotificationOutbox(delivered.append, path=path)
+        outbox.start()
+        outbox.join()
+        outbox.stop()
+
+        assert delivered == [{"id": 1}, {"id": 2}]
+
+        with open(path) as outbox_file:
+            assert json.load(outbox_file) == []
+
+    def test_saved_without_stop(self, tmp_path):
+        """Checks that the file is kept up to date as notifications are queued and sent, without a stop()."""
+
+        path = str(tmp_path / "outbox.json")
+        release = threading.Event()
+        outbox = NotificationOutbox(lambda notification: release.wait(), path=path)
+        outbox.enqueue({"id": 1})
+
+        with open(path) as outbox_file:
+            assert json.load(outbox_file) == [{"notification": {"id": 1}, "attempts": 0}]
+
+        # A killed process leaves the file behind, and the next outbox queues what it holds
+        assert NotificationOutbox(print, path=path).get_metrics()["depth"] == 1
+
+        outbox.start()
+        release.set()
+        outbox.join()
+
+        with open(path) as outbox_file:
+            assert json.load(outbox_file) == []
+
+        outbox.stop()
+
+    def test_stop_during_backoff_persists_notification(self, tmp_path):
+        """Checks that a notification waiting to be retried is saved rather than lost on stop()."""
+
+        path = str(tmp_path / "outbox.json")
+        outbox = NotificationOutbox(mock.Mock(side_effect=OSError("timed out")), path=path, retry_delay=60)
+        outbox.start()
+        outbox.enqueue({"id": 1})
+
+        while outbox.get_metrics()["retried"] == 0:
+            sleep(0.01)
+
+        start = monotonic()
+        outbox.stop()
+
+        assert monotonic() - start < 1
+        with open(path) as outbox_file:
+            assert json.load(outbox_file) == [{"notification": {"id": 1}, "attempts": 1}]
+
+
+class TestCoinbaseBotOutbox:
+    """Tests that CoinbaseBot hands confirmations to the outbox instead of sending them inline."""
+
+    def test_purchase_cycle_only_enqueues(self, make_bot, tmp_path):
+        """Checks that slow email does not delay run_purchase_cycle() and is delivered by the worker."""
+
+        coinbase = make_bot(outbox_path=str(tmp_path / "outbox.json"))
+        coinbase.set_orders(BTC=10, ETH=10)
+
+        def slow_send(transaction_details_list, digest=False, on_sent=None):
+            sleep(0.5)
+
+            for index in range(len(transaction_details_list)):
+                on_sent(index)
+
+            return len(transaction_details_list)
+
+        with mock.patch.object(
+            coinbase.coinbase,
+            "place_market_order",
+            side_effect=lambda product, amount, client_oid=None: product + "-order",
+        ), mock.patch.object(
+            coinbase.coinbase,
+            "get_transaction_details",
+            side_effect=lambda product, date, order_id=None: {"product": product, "order_id": order_id},
+        ) as get_transaction_details, mock.patch.object(
+            coinbase.coinbase, "send_email_confirmations", side_effect=slow_send
+        ) as send_email_confirmations:
+            start = monotonic()
+            coinbase.run_purchase_cycle()
+
+            assert monotonic() - start < 0.2
+            get_transaction_details.assert_not_called()
+            assert coinbase.outbox.get_metrics()["depth"] == 1
+
+            coinbase.outbox.start()
+            coinbase.outbox.join()
+            coinbase.outbox.stop()
+
+        send_email_confirmations.assert_called_once_with(
+            [{"product": "BTC", "order_id": "BTC-order"}, {"product": "ETH", "order_id": "ETH-order"}],
+            digest=False,
+            on_sent=mock.ANY,
+        )
+        assert coinbase.outbox.get_metrics()["sent"] == 1
+        get_transaction_details.assert_any_call("BTC", "2039-01-01", order_id="BTC-order")
+
+    @staticmethod
+    def queue_cycle(coinbase, send_email_confirmations):
+        """Queues a BTC and ETH purchase cycle and delivers it with the given send_email_confirmations()."""
+
+        coinbase.outbox.retry_delay = 0.01
+        coinbase.set_orders(BTC=10, ETH=10)
+
+        with mock.patch.object(
+            coinbase.coinbase,
+            "place_market_order",
+            side_effect=lambda product, amount, client_oid=None: product + "-order",
+        ), mock.patch.object(
+            coinbase.coinbase,
+            "get_transaction_details",
+            side_effect=lambda product, date, order_id=None: {"product": product},
+        ), mock.patch.object(
+            coinbase.coinbase, "send_email_confirmations", side_effect=send_email_confirmations
+        ):
+            coinbase.run_purchase_cycle()
+            coinbase.outbox.start()
+            coinbase.outbox.join()
+            coinbase.outbox.stop()
+
+    def test_retry_only_sends_undelivered_emails(self, make_bot, tmp_path):
+        """Checks that a retry after the SMTP session broke mid-cycle only sends the emails that did not go out."""
+
+        coinbase = make_bot(outbox_path=str(tmp_path / "outbox.json"))
+        batches = []
+
+        def send_email_confirmations(transaction_details_list, digest=False, on_sent=None):
+            batches.append([details["product"] for details in transaction_details_list])
+            on_sent(0)
+
+            if len(batches) == 1:
+                raise OSError("Connection unexpectedly closed")
+
+            return 1
+
+        self.queue_cycle(coinbase, send_email_confirmations)
+
+        assert batches == [["BTC", "ETH"], ["ETH"]]
+        assert coinbase.outbox.get_metrics()["retried"] == 1
+        assert coinbase.outbox.get_metrics()["sent"] == 1
+
+    def test_nothing_sent_is_a_failure(self, make_bot, tmp_path, capsys):
+        """Checks that a delivery which sent no email, e.g. without credentials, is retried rather than counted as sent."""
+
+        coinbase = make_bot(outbox_path=str(tmp_path / "outbox.json"))
+        coinbase.outbox.max_attempts = 2
+
+        self.queue_cycle(coinbase, lambda transaction_details_list, digest=False, on_sent=None: 0)
+
+        assert coinbase.outbox.get_metrics()["sent"] == 0
+        assert coinbase.outbox.get_metrics()["failed"] == 1
+        assert "Only 0 of 2 email confirmations were sent" in capsys.readouterr().out
+        assert json.loads((tmp_path / "outbox.json").read_text()) == []
@@ -0,0 +1,82 @@
+import sys
+
+import pytest
+
+import place_order
+from src.coinbase import coinbase_bot
+from src.coinbase.coinbase_bot import CoinbaseBot, CoinbaseProHandler
+from src.orders import utilities
+from src.orders.currency_catalog import CurrencyCatalog
+
+ORDERS_YAML = """
+schedules:
+  - name: btc-daily
+    crypto:
+      - BTC
+    amount_usd:
+      - 10
+    start_date: 2039-01-03
+    start_time: 07:00 AM
+    frequency: daily
+  - name: eth-weekly
+    crypto:
+      - ETH
+      - LINK
+    amount_usd:
+      - 20.50
+      - 30
+    start_date: 2039-01-03
+    start_time: 09:00 AM
+    frequency: weekly
+"""
+
+
+@pytest.fixture
+def bots(mock_exchange, tmp_path, monkeypatch):
+    """Runs place_order.py against the mock exchange, with activate() running one cycle of every schedule."""
+
+    catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), url=mock_exchange.url + "currencies")
+    monkeypatch.setattr(utilities, "currency_catalog", catalog)
+    monkeypatch.setattr(coinbase_bot, "COINBASE_API_URL", mock_exchange.url)
+    monkeypatch.setattr(CoinbaseProHandler, "send_email_confirmations", lambda *args, **kwargs: 0)
+
+    for name, value in zip(("CB_API_KEY", "CB_API_SECRET", "CB_API_PASS"), mock_exchange.credentials.values()):
+        monkeypatch.setenv(name, value)
+
+    bots = []
+
+    def activate(bot):
+        bots.append(bot)
+
+        for schedule in bot.schedules:
+            bot.run_deposit_cycle(schedule)
+            bot.run_purchase_cycle(schedule)
+
+    monkeypatch.setattr(CoinbaseBot, "activate", activate)
+
+    path = tmp_path / "orders.yaml"
+    path.write_text(ORDERS_YAML)
+    monkeypatch.setattr(sys, "argv", ["place_order.py", "--yaml", "--orders", str(path)])
+
+    yield bots
+
+    # Closes the connections, so the exchange's threads serving them do not outlive the test
+    for bot in bots:
+        bot.coinbase.session.close()
+
+
+class TestPlaceOrder:
+    """Tests the place_order.py entry point."""
+
+    def test_every_schedule_runs_a_cycle(self, bots, mock_exchange):
+        """Checks that every schedule of an orders file is added with float amounts and places its orders."""
+
+        place_order.main()
+
+        (bot,) = bots
+        assert [(schedule.name, schedule.orders) for schedule in bot.schedules] == [
+            ("btc-daily", {"BTC": 10.0}),
+            ("eth-weekly", {"ETH": 20.5, "LINK": 30.0}),
+        ]
+        assert mock_exchange.get_request_count("POST", "orders") == 3
+        assert mock_exchange.balances["USD"] == 939.5
@@ -0,0 +1,211 @@
+import threading
+from datetime import datetime, timedelta
+from time import monotonic, sleep
+
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth
+from src.coinbase.portfolio_runtime import PortfolioRuntime
+from src.orders import utilities
+from src.orders.currency_catalog import CurrencyCatalog
+from src.orders.portfolio_input_collector import PortfoliosYAMLCollector
+
+START_DATE = "2039-01-01"
+START_TIME = "10:00 AM"
+
+PORTFOLIOS_YAML = """
+portfolios:
+  - name: family
+    credentials_prefix: FAMILY
+    crypto:
+      - BTC
+    amount_usd:
+      - 50
+    start_date: 2039-01-01
+    start_time: 07:00 AM
+    frequency: weekly
+  - name: savings
+    credentials_prefix: SAVINGS
+    crypto:
+      - ETH
+    amount_usd:
+      - 100
+    start_date: 2039-01-01
+    start_time: 08:00 AM
+    frequency: monthly
+"""
+
+
+class TestPortfolioRuntime:
+    """Tests PortfolioRuntime class."""
+
+    def test_add_portfolio_with_invalid_parameters(self, mock_exchange):
+        """Checks that portfolio names must be unique, non-null strings."""
+
+        runtime = PortfolioRuntime(api_url=mock_exchange.url)
+        auth = CoinbaseExchangeAuth(**mock_exchange.credentials)
+        runtime.add_portfolio("family", auth, "weekly", START_DATE, START_TIME, {"BTC": "10"})
+
+        with pytest.raises(TypeError, match="name must be of type str"):
+            runtime.add_portfolio(None, auth, "weekly", START_DATE, START_TIME, {"BTC": 10})
+
+        with pytest.raises(ValueError, match="name cannot be null"):
+            runtime.add_portfolio("", auth, "weekly", START_DATE, START_TIME, {"BTC": 10})
+
+        with pytest.raises(ValueError, match="name cannot contain ':'"):
+            runtime.add_portfolio("family:2", auth, "weekly", START_DATE, START_TIME, {"BTC": 10})
+
+        with pytest.raises(ValueError, match="Portfolio family already exists"):
+            runtime.add_portfolio("family", auth, "weekly", START_DATE, START_TIME, {"BTC": 10})
+
+        assert runtime.bots["family"].orders == {"BTC": 10.0}
+
+    def test_portfolios_share_scheduler_and_session(self, mock_exchange):
+        """Checks that adding portfolios adds no threads or connection pools and keeps their events apart."""
+
+        runtime = PortfolioRuntime(api_url=mock_exchange.url)
+        threads = threading.active_count()
+
+        for i in range(200):
+            runtime.add_portfolio(
+                f"portfolio-{i}",
+                CoinbaseExchangeAuth(**mock_exchange.credentials),
+                "weekly",
+                START_DATE,
+                START_TIME,
+                {"BTC": 10},
+            )
+
+        for bot in runtime.bots.values():
+            bot.schedule_next_cycle()
+
+        # Re-arming one portfolio must not cancel another's events
+        runtime.bots["portfolio-0"].schedule_next_cycle()
+
+        assert threading.active_count() == threads
+        assert len(runtime.scheduler) == 400
+        assert {bot.coinbase.session for bot in runtime.bots.values()} == {runtime.session}
+        assert len({id(bot.coinbase.cache) for bot in runtime.bots.values()}) == 200
+
+    def test_failing_portfolio_does_not_stop_others(self, mock_exchange):
+        """Checks that a portfolio with invalid credentials is reported while the others keep running."""
+
+        runtime = PortfolioRuntime(api_url=mock_exchange.url)
+        good = runtime.add_portfolio(
+            "good", CoinbaseExchangeAuth(**mock_exchange.credentials), "daily", START_DATE, START_TIME, {"BTC": 10}
+        )
+        bad = runtime.add_portfolio(
+            "bad",
+            CoinbaseExchangeAuth(**{**mock_exchange.credentials, "api_key": "stolen"}),
+            "daily",
+            START_DATE,
+            START_TIME,
+            {"ETH": 10},
+        )
+
+        for bot in (good, bad):
+            bot.next_deposit_date = datetime.now()
+            bot.next_purchase_date = datetime.now() + timedelta(milliseconds=100)
+
+        t = threading.Thread(target=runtime.activate)
+        t.start()
+        sleep(1)
+        runtime.deactivate()
+        t.join(5)
+
+        assert not t.is_alive()
+        assert mock_exchange.get_request_count("POST", "orders") == 1
+        assert [order["product_id"] for order in mock_exchange.orders.values()] == ["BTC-USD"]
+
+        # Both portfolios moved on to their next cycle
+        for bot in (good, bad):
+            assert bot.next_deposit_date > datetime.now()
+            assert bot.next_purchase_date > datetime.now()
+
+    def test_outboxes_run_while_active(self, mock_exchange, tmp_path):
+        """Checks that the runtime starts the outbox of each portfolio that has one and stops it on deactivate()."""
+
+        runtime = PortfolioRuntime(api_url=mock_exchange.url)
+        bot = runtime.add_portfolio(
+            "family",
+            CoinbaseExchangeAuth(**mock_exchange.credentials),
+            "daily",
+            START_DATE,
+            START_TIME,
+            {"BTC": 10},
+            outbox_path=str(tmp_path / "outbox.json"),
+        )
+        bot.next_deposit_date = datetime.now()
+        bot.next_purchase_date = datetime.now() + timedelta(milliseconds=100)
+        emailed = []
+
+        def send_email_confirmations(transaction_details_list, digest=False, on_sent=None):
+            emailed.extend(details["product"] for details in transaction_details_list)
+            on_sent(0)
+
+            return 1
+
+        bot.coinbase.send_email_confirmations = send_email_confirmations
+
+        t = threading.Thread(target=runtime.activate)
+        t.start()
+
+        deadline = monotonic() + 5
+
+        while bot.outbox.get_metrics()["sent"] == 0 and monotonic() < deadline:
+            sleep(0.05)
+
+        runtime.deactivate()
+        t.join(5)
+
+        assert not t.is_alive()
+        assert emailed == ["BTC"]
+        assert "notification-outbox" not in [thread.name for thread in threading.enumerate()]
+        assert not runtime.active
+
+
+class TestPortfoliosYAMLCollector:
+    """Tests PortfoliosYAMLCollector class."""
+
+    def test_collect_inputs(self, mock_exchange, tmp_path, monkeypatch):
+        """Checks that every portfolio and its credentials are loaded."""
+
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), url=mock_exchange.url + "currencies")
+        monkeypatch.setattr(utilities, "currency_catalog", catalog)
+
+        for prefix in ("FAMILY", "SAVINGS"):
+            monkeypatch.setenv(f"{prefix}_CB_API_KEY", prefix.lower() + "-key")
+            monkeypatch.setenv(f"{prefix}_CB_API_SECRET", "c2VjcmV0")
+            monkeypatch.setenv(f"{prefix}_CB_API_PASS", "pass")
+
+        path = tmp_path / "portfolios.yaml"
+        path.write_text(PORTFOLIOS_YAML)
+
+        portfolios = PortfoliosYAMLCollector(str(path))
+        portfolios.collect_inputs()
+
+        assert [portfolio.name for portfolio in portfolios.portfolios] == ["family", "savings"]
+        assert portfolios.portfolios[0].credentials.api_key == "family-key"
+        assert portfolios.portfolios[1].frequency == "monthly"
+        assert portfolios.portfolios[1].orders == {"ETH": "100"}
+
+    def test_missing_credentials(self, tmp_path, monkeypatch):
+        """Checks that a portfolio without credentials is rejected."""
+
+        for variable in ("FAMILY_CB_API_KEY", "FAMILY_CB_API_SECRET", "FAMILY_CB_API_PASS"):
+            monkeypatch.delenv(variable, raising=False)
+
+        path = tmp_path / "portfolios.yaml"
+        path.write_text(PORTFOLIOS_YAML)
+
+        with pytest.raises(RuntimeError, match="No API credentials found for portfolio 'family'"):
+            PortfoliosYAMLCollector(str(path)).collect_inputs()
+
+    def test_no_portfolios(self, tmp_path):
+        """Checks that a file without portfolios is rejected."""
+
+        path = tmp_path / "portfolios.yaml"
+        path.write_text("portfolios: []\n")
+
+        with pytest.raises(RuntimeError, match="No portfolios defined"):
+            PortfoliosYAMLCollector(str(path)).collect_inputs()
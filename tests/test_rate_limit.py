@@ -0,0 +1,175 @@
+import asyncio
+import threading
+from email.utils import formatdate
+from time import monotonic, time
+
+import pytest
+
+from src.coinbase.async_coinbase_bot import AsyncCoinbaseProHandler
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.rate_limit import RateLimiter, TokenBucket, parse_retry_after
+from testing.mock_exchange import MockCoinbaseExchange
+
+
+class TestTokenBucket:
+    """Tests TokenBucket class."""
+
+    def test_invalid_parameters(self):
+        """Checks that TokenBucket raises correct errors with an invalid rate."""
+
+        with pytest.raises(TypeError, match="rate must be of type int or float"):
+            TokenBucket("10")
+
+        with pytest.raises(ValueError, match="rate must be a positive number"):
+            TokenBucket(0)
+
+    def test_burst_then_refill_rate(self):
+        """Checks that a full bucket allows a burst, after which callers queue at the refill rate."""
+
+        bucket = TokenBucket(10, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(0.1, abs=0.01)
+        assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+    def test_pause(self):
+        """Checks that a paused bucket hands out no tokens until the pause ends, then refills from empty."""
+
+        bucket = TokenBucket(10, burst=5)
+        bucket.pause(0.5)
+
+        assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+        assert bucket.reserve() == pytest.approx(0.6, abs=0.01)
+
+    def test_shared_by_threads(self):
+        """Checks that threads sharing a bucket are spread out at its rate."""
+
+        bucket = TokenBucket(100, burst=1)
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(20)]
+        start = monotonic()
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        assert monotonic() - start >= 0.19
+
+    def test_shared_by_coroutines(self):
+        """Checks that coroutines wait for tokens without blocking the event loop."""
+
+        bucket = TokenBucket(100, burst=1)
+
+        async def run():
+            start = monotonic()
+            waits = await asyncio.gather(*(bucket.acquire_async() for _ in range(20)))
+            return waits, monotonic() - start
+
+        waits, elapsed = asyncio.run(run())
+
+        assert max(waits) == pytest.approx(0.19, abs=0.01)
+        assert elapsed >= 0.19
+
+
+class TestRateLimiter:
+    """Tests RateLimiter class."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [(None, 1.0), ("", 1.0), ("2", 2.0), ("0.5", 0.5), ("-3", 0.0), ("soon", 1.0)],
+    )
+    def test_parse_retry_after(self, value, expected):
+        """Tests parse_retry_after() with seconds and invalid values."""
+
+        assert parse_retry_after(value) == expected
+
+    def test_parse_retry_after_http_date(self):
+        """Tests parse_retry_after() with an HTTP date."""
+
+        assert parse_retry_after(formatdate(time() + 30, usegmt=True)) == pytest.approx(30, abs=1.5)
+
+    @pytest.mark.parametrize(
+        "endpoint,expected",
+        [
+            ("currencies", "public"),
+            ("products/BTC-USD/candles", "public"),
+            ("orders/1", "private"),
+            ("fills", "private"),
+        ],
+    )
+    def test_get_scope(self, endpoint, expected):
+        """Checks that endpoints are assigned to the right bucket."""
+
+        assert RateLimiter.get_scope(endpoint) == expected
+
+    def test_records_waits(self):
+        """Checks that the time spent waiting for tokens is recorded per bucket."""
+
+        limiter = RateLimiter(public=TokenBucket(100, burst=1), private=TokenBucket(100, burst=10))
+
+        for _ in range(3):
+            limiter.acquire("currencies")
+            limiter.acquire("orders")
+
+        stats = limiter.get_stats()
+
+        assert stats["public"]["calls"] == 3
+        assert stats["public"]["waited"] == pytest.approx(0.02, abs=0.005)
+        assert stats["public"]["max_wait"] == pytest.approx(0.01, abs=0.005)
+        assert stats["private"] == {"calls": 3, "throttled": 0, "waited": 0.0, "max_wait": 0.0}
+
+
+class TestHandlerRateLimiting:
+    """Tests that the handlers limit their requests against the mock exchange."""
+
+    def test_limiter_prevents_429s(self):
+        """Checks that a limiter within the exchange's limits never sees a 429."""
+
+        with MockCoinbaseExchange(rate_limit=2) as exchange:
+            limiter = RateLimiter(private=TokenBucket(1.5, burst=1))
+            coinbase = CoinbaseProHandler(
+                exchange.url, CoinbaseExchangeAuth(**exchange.credentials), rate_limiter=limiter
+            )
+
+            responses = [coinbase._request("GET", "coinbase-accounts") for _ in range(4)]
+
+        assert [response.status_code for response in responses] == [200] * 4
+        assert exchange.status_counts == {200: 4}
+        assert limiter.get_stats()["private"]["waited"] >= 1.9
+
+    def test_retry_after_is_honored(self):
+        """Checks that a 429 pauses the limiter for its Retry-After before the request is retried."""
+
+        with MockCoinbaseExchange(rate_limit=2) as exchange:
+            limiter = RateLimiter(private=TokenBucket(100, burst=10))
+            coinbase = CoinbaseProHandler(
+                exchange.url, CoinbaseExchangeAuth(**exchange.credentials), rate_limiter=limiter
+            )
+
+            start = monotonic()
+            responses = [coinbase._request("GET", "coinbase-accounts") for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200] * 3
+        assert monotonic() - start >= 1
+        assert exchange.status_counts == {200: 3, 429: 1}
+        assert limiter.get_stats()["private"]["throttled"] == 1
+
+    def test_async_retry_after_is_honored(self):
+        """Checks that the async handler also retries a 429 after its Retry-After."""
+
+        with MockCoinbaseExchange(rate_limit=1) as exchange:
+            limiter = RateLimiter(private=TokenBucket(100, burst=10))
+
+            async def run():
+                async with AsyncCoinbaseProHandler(
+                    exchange.url, CoinbaseExchangeAuth(**exchange.credentials), rate_limiter=limiter
+                ) as coinbase:
+                    return [await coinbase._request("GET", "coinbase-accounts") for _ in range(2)]
+
+            responses = asyncio.run(run())
+
+        assert [response.status_code for response in responses] == [200, 200]
+        assert exchange.status_counts == {200: 2, 429: 1}
+        assert limiter.get_stats()["private"]["throttled"] == 1
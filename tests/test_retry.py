@@ -0,0 +1,175 @@
+import asyncio
+import unittest.mock as mock
+import uuid
+from datetime import datetime
+
+import pytest
+import requests
+
+from src.coinbase.async_coinbase_bot import AsyncCoinbaseProHandler
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth
+from src.coinbase.retry import RetryPolicy, make_client_oid
+
+# Retries without waiting, so the tests stay fast
+FAST_RETRIES = RetryPolicy(max_retries=3, initial_delay=0.001, max_delay=0.001)
+
+
+class TestRetryPolicy:
+    """Tests RetryPolicy class and make_client_oid()."""
+
+    def test_invalid_parameters(self):
+        """Checks that RetryPolicy raises correct errors with an invalid max_retries."""
+
+        with pytest.raises(TypeError, match="max_retries must be of type int"):
+            RetryPolicy(max_retries="3")
+
+        with pytest.raises(ValueError, match="max_retries cannot be negative"):
+            RetryPolicy(max_retries=-1)
+
+    def test_get_delay_is_jittered_exponential_backoff(self):
+        """Checks that delays are drawn up to a doubling bound that is capped at max_delay."""
+
+        policy = RetryPolicy(initial_delay=0.5, max_delay=4.0)
+
+        with mock.patch("src.coinbase.retry.random.uniform", side_effect=lambda low, high: high) as uniform:
+            assert [policy.get_delay(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+        assert all(call.args[0] == 0 for call in uniform.call_args_list)
+        assert 0 <= policy.get_delay(10) <= 4.0
+
+    def test_make_client_oid(self):
+        """Checks that client_oids are UUIDs that only depend on portfolio, product and scheduled time."""
+
+        scheduled_time = datetime(2039, 1, 1, 10, 0)
+        client_oid = make_client_oid("family", "BTC", scheduled_time)
+
+        assert str(uuid.UUID(client_oid)) == client_oid
+        assert make_client_oid("family", "BTC", scheduled_time) == client_oid
+        assert make_client_oid("savings", "BTC", scheduled_time) != client_oid
+        assert make_client_oid("family", "ETH", scheduled_time) != client_oid
+        assert make_client_oid("family", "BTC", datetime(2039, 1, 2, 10, 0)) != client_oid
+
+
+class TestHandlerRetries:
+    """Tests CoinbaseProHandler retries against the mock exchange."""
+
+    def test_get_requests_are_retried(self, make_handler, mock_exchange):
+        """Checks that server errors on GET requests are retried until they succeed."""
+
+        mock_exchange.fail("GET", "coinbase-accounts", status=503, times=2)
+
+        assert make_handler(mock_exchange, retry_policy=FAST_RETRIES).get_balance_snapshot().covers(100)
+        assert mock_exchange.get_request_count("GET", "coinbase-accounts") == 3
+
+    def test_retries_are_limited(self, make_handler, mock_exchange):
+        """Checks that the last response is returned once the retries run out."""
+
+        mock_exchange.fail("GET", "coinbase-accounts", status=500, times=10)
+
+        with pytest.raises(RuntimeError):
+            make_handler(mock_exchange, retry_policy=FAST_RETRIES).get_balance_snapshot()
+
+        assert mock_exchange.get_request_count("GET", "coinbase-accounts") == 4
+
+    def test_deposits_are_not_retried(self, make_handler, mock_exchange):
+        """Checks that requests which are unsafe to repeat are sent once."""
+
+        mock_exchange.fail("POST", "deposits/payment-method", status=503)
+
+        with pytest.raises(RuntimeError):
+            make_handler(mock_exchange, retry_policy=FAST_RETRIES).deposit_from_bank(100)
+
+        assert mock_exchange.get_request_count("POST", "deposits/payment-method") == 1
+
+    def test_lost_order_response_is_recovered(self, make_handler, mock_exchange):
+        """Checks that an order whose response was lost is found by its client_oid instead of being placed again."""
+
+        client_oid = make_client_oid("family", "BTC", datetime(2039, 1, 1, 10, 0))
+        mock_exchange.drop_responses("POST", "orders")
+
+        order_id = make_handler(mock_exchange, retry_policy=FAST_RETRIES).place_market_order(
+            "BTC", 20, client_oid=client_oid
+        )
+
+        assert list(mock_exchange.orders) == [order_id]
+        assert mock_exchange.orders[order_id]["client_oid"] == client_oid
+        assert mock_exchange.get_request_count("POST", "orders") == 1
+        assert mock_exchange.get_request_count("GET", "orders/client:" + client_oid) == 1
+
+    def test_failed_order_is_placed_again(self, make_handler, mock_exchange):
+        """Checks that an order the exchange never accepted is sent again after its lookup finds nothing."""
+
+        client_oid = make_client_oid("family", "BTC", datetime(2039, 1, 1, 10, 0))
+        mock_exchange.fail("POST", "orders", status=503)
+
+        order_id = make_handler(mock_exchange, retry_policy=FAST_RETRIES).place_market_order(
+            "BTC", 20, client_oid=client_oid
+        )
+
+        assert list(mock_exchange.orders) == [order_id]
+        assert mock_exchange.get_request_count("POST", "orders") == 2
+
+    def test_order_without_client_oid_is_not_retried(self, make_handler, mock_exchange):
+        """Checks that an order that cannot be looked up is never sent twice."""
+
+        mock_exchange.drop_responses("POST", "orders")
+
+        with pytest.raises(requests.ConnectionError):
+            make_handler(mock_exchange, retry_policy=FAST_RETRIES).place_market_order("BTC", 20)
+
+        assert mock_exchange.get_request_count("POST", "orders") == 1
+
+    def test_async_lost_order_response_is_recovered(self, mock_exchange):
+        """Checks that the async handler also recovers an order whose response was lost."""
+
+        client_oid = make_client_oid("family", "ETH", datetime(2039, 1, 1, 10, 0))
+        mock_exchange.drop_responses("POST", "orders")
+
+        async def run():
+            async with AsyncCoinbaseProHandler(
+                mock_exchange.url, CoinbaseExchangeAuth(**mock_exchange.credentials), retry_policy=FAST_RETRIES
+            ) as coinbase:
+                return await coinbase.place_market_order("ETH", 20, client_oid=client_oid)
+
+        order_id = asyncio.run(run())
+
+        assert list(mock_exchange.orders) == [order_id]
+        assert mock_exchange.get_request_count("POST", "orders") == 1
+
+
+class TestCoinbaseBotRetries:
+    """Tests that CoinbaseBot places idempotent orders and survives failed cycles."""
+
+    def test_retried_purchase_is_not_placed_twice(self, make_bot, mock_exchange):
+        """Checks that running the same purchase again after a lost response does not buy twice."""
+
+        coinbase = make_bot(mock_exchange, name="family")
+        coinbase.coinbase.retry_policy = FAST_RETRIES
+        coinbase.set_orders(BTC=10)
+        mock_exchange.drop_responses("POST", "orders")
+
+        results = coinbase.place_orders()
+        client_oid = coinbase.get_client_oid("BTC")
+
+        assert results["BTC"]["error"] is None
+        assert client_oid == make_client_oid("family:purchase", "BTC", datetime(2039, 1, 1, 10, 0))
+        assert [order["client_oid"] for order in mock_exchange.orders.values()] == [client_oid]
+
+    def test_failed_cycle_is_skipped(self, make_bot, mock_exchange):
+        """Checks that a cycle which keeps failing is reported and skipped rather than stopping the bot."""
+
+        coinbase = make_bot(mock_exchange)
+        coinbase.coinbase.retry_policy = FAST_RETRIES
+        coinbase.set_orders(BTC=10)
+        mock_exchange.fail("GET", "coinbase-accounts", status=500, times=10)
+
+        event = mock.Mock(when=coinbase.next_deposit_date)
+        event.name = coinbase.get_event_name("deposit")
+
+        with pytest.raises(RuntimeError) as error:
+            coinbase.run_deposit_cycle()
+
+        coinbase.scheduler.error_handler(event, error.value)
+
+        assert coinbase.next_deposit_date == datetime(2039, 1, 8, 9, 59)
+        assert len(coinbase.scheduler) == 1
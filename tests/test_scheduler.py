@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from threading import Thread
+from time import process_time, sleep
+
+import pytest
+
+from src.coinbase.scheduler import DeadlineScheduler
+
+
+class TestDeadlineScheduler:
+    """Tests DeadlineScheduler class."""
+
+    def test_schedule_with_invalid_parameters(self):
+        """Checks that schedule() raises correct errors with invalid parameters."""
+
+        scheduler = DeadlineScheduler()
+
+        with pytest.raises(TypeError, match="when must be of type datetime"):
+            scheduler.schedule("2022-01-01", lambda: None)
+
+        with pytest.raises(TypeError, match="action must be callable"):
+            scheduler.schedule(datetime.now(), None)
+
+    def test_events_fire_in_deadline_order(self):
+        """Checks that events fire earliest deadline first regardless of insertion order."""
+
+        scheduler = DeadlineScheduler()
+        fired = []
+        now = datetime.now()
+
+        scheduler.schedule(now + timedelta(milliseconds=300), lambda: (fired.append("third"), scheduler.stop()))
+        scheduler.schedule(now + timedelta(milliseconds=100), lambda: fired.append("first"))
+        scheduler.schedule(now + timedelta(milliseconds=200), lambda: fired.append("second"))
+
+        scheduler.run()
+
+        assert fired == ["first", "second", "third"]
+        assert len(scheduler) == 0
+
+    def test_cancel(self):
+        """Checks that cancelled events never fire."""
+
+        scheduler = DeadlineScheduler()
+        fired = []
+        now = datetime.now()
+
+        scheduler.schedule(now + timedelta(milliseconds=50), lambda: fired.append("deposit"), name="deposit")
+        scheduler.schedule(now + timedelta(milliseconds=100), scheduler.stop, name="stop")
+
+        assert scheduler.cancel("deposit") == 1
+        assert scheduler.next_deadline() == now + timedelta(milliseconds=100)
+
+        scheduler.run()
+
+        assert fired == []
+
+    def test_earlier_event_wakes_sleeping_scheduler(self):
+        """Checks that scheduling an earlier deadline from another thread interrupts the current sleep."""
+
+        scheduler = DeadlineScheduler()
+        fired = []
+
+        scheduler.schedule(datetime.now() + timedelta(days=7), lambda: fired.append("next week"))
+
+        t = Thread(target=scheduler.run)
+        t.daemon = True
+        t.start()
+
+        sleep(0.1)
+        scheduler.schedule(datetime.now() + timedelta(milliseconds=50), lambda: fired.append("soon"))
+        sleep(0.3)
+        scheduler.stop()
+        t.join(timeout=1)
+
+        assert fired == ["soon"]
+        assert not t.is_alive()
+
+    def test_idle_scheduler_does_not_busy_wait(self):
+        """Checks that waiting on a far-off deadline uses almost no CPU."""
+
+        scheduler = DeadlineScheduler()
+        scheduler.schedule(datetime.now() + timedelta(days=7), lambda: None)
+
+        t = Thread(target=scheduler.run)
+        t.daemon = True
+
+        cpu_start = process_time()
+        t.start()
+        sleep(0.5)
+        scheduler.stop()
+        t.join(timeout=1)
+
+        assert process_time() - cpu_start < 0.1
+
+    def test_error_handler_keeps_loop_running(self):
+        """Checks that with an error_handler, a failing action does not stop later events."""
+
+        errors = []
+        fired = []
+        scheduler = DeadlineScheduler(error_handler=lambda event, e: errors.append((event.name, str(e))))
+        now = datetime.now()
+
+        def fail():
+            raise RuntimeError("deposit failed")
+
+        scheduler.schedule(now + timedelta(milliseconds=50), fail, name="a:deposit")
+        scheduler.schedule(now + timedelta(milliseconds=100), lambda: (fired.append("b"), scheduler.stop()))
+        scheduler.run()
+
+        assert errors == [("a:deposit", "deposit failed")]
+        assert fired == ["b"]
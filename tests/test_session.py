@@ -0,0 +1,81 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseExchangeAuth, CoinbaseProHandler
+from src.coinbase.session import create_session
+
+
+class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps([{"id": "bank-id"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveRequestHandler)
+    t = Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestSession:
+    """Tests the pooled session used by CoinbaseProHandler."""
+
+    def test_create_session_with_invalid_parameters(self):
+        """Checks that create_session() raises correct errors with invalid parameters."""
+
+        with pytest.raises(TypeError, match="pool_size must be of type int"):
+            create_session(pool_size="10")
+
+        with pytest.raises(ValueError, match="pool_size must be a positive number"):
+            create_session(pool_size=0)
+
+    def test_connections_are_reused(self, local_server_url):
+        """Checks that consecutive handler calls share one keep-alive connection."""
+
+        handler = CoinbaseProHandler(api_url=local_server_url, auth=CoinbaseExchangeAuth("key", "4096", "pass"))
+
+        for _ in range(5):
+            handler.cache.invalidate()
+            assert handler.get_payment_method() == "bank-id"
+
+        stats = handler.get_connection_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["requests_sent"] == 5
+        assert stats["reused_requests"] == 4
+        assert stats["requests_per_connection"] == [5]
+
+    def test_keep_alive_disabled(self, local_server_url):
+        """Checks that every request opens a new connection when keep-alive is disabled."""
+
+        handler = CoinbaseProHandler(
+            api_url=local_server_url,
+            auth=CoinbaseExchangeAuth("key", "4096", "pass"),
+            session=create_session(keep_alive=False),
+        )
+
+        for _ in range(3):
+            handler.cache.invalidate()
+            handler.get_payment_method()
+
+        stats = handler.get_connection_stats()
+        assert stats["connections_opened"] == 3
+        assert stats["reused_requests"] == 0
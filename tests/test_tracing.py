@@ -0,0 +1,177 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+
+import pytest
+
+from src.coinbase.coinbase_bot import CoinbaseBot, CoinbaseExchangeAuth
+from src.coinbase.tracing import NULL_SPAN, trace, tracer
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Enables the global tracer for one test and returns the path of its trace file."""
+
+    path = str(tmp_path / "trace.jsonl")
+    tracer.enable(path)
+
+    yield path
+
+    tracer.disable()
+
+
+def read_spans(path):
+    with open(path) as trace_file:
+        return [json.loads(line) for line in trace_file]
+
+
+class TestTracer:
+    """Tests Tracer class and the trace() decorator."""
+
+    def test_disabled_tracer_is_a_no_op(self, tmp_path):
+        """Checks that spans and traced functions do nothing while tracing is disabled."""
+
+        @trace("add")
+        def add(a, b):
+            return a + b
+
+        assert not tracer.enabled
+        assert tracer.span("cycle", product="BTC") is NULL_SPAN
+
+        with tracer.span("cycle") as span:
+            span.set_attribute("status_code", 200)
+            tracer.set_attribute("product", "BTC")
+
+        assert add(1, 2) == 3
+        assert tracer.exported == 0
+
+    def test_invalid_format(self, tmp_path):
+        """Checks that enable() raises correct errors with an unknown format."""
+
+        with pytest.raises(ValueError, match="format must be one of"):
+            tracer.enable(str(tmp_path / "trace.json"), format="xml")
+
+    def test_nested_spans(self, trace_file):
+        """Checks that nested spans form one trace that is exported when its root span ends."""
+
+        @trace("place_order")
+        def place_order(product, amount):
+            tracer.set_attribute("status_code", 200)
+
+        with tracer.span("purchase_cycle", schedule="weekly"):
+            place_order("BTC", 10)
+
+            with pytest.raises(RuntimeError):
+                with tracer.span("smtp"):
+                    raise RuntimeError("no connection")
+
+            assert not os.path.exists(trace_file)
+
+        order, smtp, cycle = read_spans(trace_file)
+
+        assert cycle["parent_id"] is None
+        assert cycle["attributes"] == {"schedule": "weekly"}
+        assert order["attributes"] == {"product": "BTC", "amount": 10, "status_code": 200}
+        assert smtp["status"] == "error"
+        assert smtp["attributes"]["error"] == "no connection"
+        assert {span["trace_id"] for span in (order, smtp, cycle)} == {cycle["trace_id"]}
+        assert order["parent_id"] == smtp["parent_id"] == cycle["span_id"]
+        assert cycle["duration"] >= order["duration"]
+
+    def test_separate_traces(self, trace_file):
+        """Checks that root spans start traces of their own."""
+
+        for _ in range(2):
+            with tracer.span("purchase_cycle"):
+                pass
+
+        first, second = read_spans(trace_file)
+
+        assert first["trace_id"] != second["trace_id"]
+        assert tracer.exported == 2
+
+    def test_threads_and_coroutines_join_the_trace(self, trace_file):
+        """Checks that spans opened in copied contexts and in tasks are children of the span that started them."""
+
+        @trace("place_order")
+        def place_order(product):
+            pass
+
+        @trace("place_order")
+        async def place_order_async(product):
+            await asyncio.sleep(0)
+
+        async def place_orders():
+            await asyncio.gather(place_order_async("ETH"), place_order_async("LTC"))
+
+        with tracer.span("purchase_cycle"):
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(place_order, "BTC"))
+            thread.start()
+            thread.join()
+
+            asyncio.run(place_orders())
+
+        spans = read_spans(trace_file)
+        cycle = spans[-1]
+
+        assert sorted(span["attributes"]["product"] for span in spans[:-1]) == ["BTC", "ETH", "LTC"]
+        assert all(span["parent_id"] == cycle["span_id"] for span in spans[:-1])
+
+    def test_chrome_format(self, tmp_path):
+        """Checks that traces can be written as complete events of the Chrome trace event format."""
+
+        path = str(tmp_path / "trace.json")
+        tracer.enable(path, format="chrome")
+
+        try:
+            with tracer.span("purchase_cycle"):
+                with tracer.span("http", status_code=200):
+                    pass
+
+        finally:
+            tracer.disable()
+
+        with open(path) as trace_file:
+            events = json.loads(trace_file.read().rstrip(",\n") + "]")
+
+        assert [event["name"] for event in events] == ["http", "purchase_cycle"]
+        assert all(event["ph"] == "X" for event in events)
+        assert events[0]["args"]["status_code"] == 200
+        assert events[1]["dur"] >= events[0]["dur"]
+
+
+class TestCoinbaseBotTracing:
+    """Tests the spans recorded by a purchase cycle against the mock exchange."""
+
+    def test_purchase_cycle_spans(self, mock_exchange, trace_file):
+        """Checks that every step of a purchase cycle is recorded in the cycle's trace."""
+
+        coinbase = CoinbaseBot(
+            api_url=mock_exchange.url,
+            auth=CoinbaseExchangeAuth(**mock_exchange.credentials),
+            frequency="weekly",
+            start_date="2039-01-01",
+            start_time="10:00 AM",
+        )
+        coinbase.set_orders(BTC=10, ETH=20)
+        coinbase.run_purchase_cycle()
+
+        spans = read_spans(trace_file)
+        names = [span["name"] for span in spans]
+        cycle = spans[-1]
+
+        assert cycle["name"] == "purchase_cycle"
+        assert cycle["attributes"]["schedule"] == "purchase"
+        assert {span["trace_id"] for span in spans} == {cycle["trace_id"]}
+
+        for name in ("place_orders", "get_balance_snapshot", "place_market_order", "get_transaction_details", "sign"):
+            assert name in names
+
+        orders = [span for span in spans if span["name"] == "place_order"]
+        posts = [span for span in spans if span["name"] == "http" and span["attributes"]["endpoint"] == "orders"]
+
+        assert sorted(span["attributes"]["product"] for span in orders) == ["BTC", "ETH"]
+        assert [span["attributes"]["status_code"] for span in posts] == [200, 200]
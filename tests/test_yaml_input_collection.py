@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 
 import pytest
 
+from src.orders import utilities
+from src.orders.currency_catalog import CurrencyCatalog
+from src.orders.order_file import OrderSchema
 from src.orders.yaml_input_collector import YAMLInputCollector
 
 YAML_INVALID_ORDERS1 = os.getcwd() + "/tests/files/invalid_orders1.yaml"
@@ -16,6 +19,15 @@ YAML_VALID_ORDERS1 = os.getcwd() + "/tests/files/valid_orders1.yaml"
 YAML_VALID_ORDERS2 = os.getcwd() + "/tests/files/valid_orders2.yaml"
 YAML_VALID_ORDERS3 = os.getcwd() + "/tests/files/valid_orders3.yaml"
 YAML_VALID_ORDERS4 = os.getcwd() + "/tests/files/valid_orders4.yaml"
+YAML_VALID_SCHEDULES1 = os.getcwd() + "/tests/files/valid_schedules1.yaml"
+
+VALID_ORDERS = {
+    "crypto": ["BTC"],
+    "amount_usd": ["1000"],
+    "start_date": "2039-12-31",
+    "start_time": "10:00 AM",
+    "frequency": "daily",
+}
 
 
 class TestYAMLInputCollector:
@@ -25,6 +37,17 @@ class TestYAMLInputCollector:
     one_minute_later = (current_datetime + timedelta(minutes=1)).strftime("%Y-%m-%d|%I:%M %p").split("|")
     one_second_ago = (current_datetime - timedelta(seconds=1)).strftime("%Y-%m-%d|%I:%M %p").split("|")
 
+    @pytest.fixture
+    def currency_catalog(self, mock_exchange, tmp_path, monkeypatch):
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), url=mock_exchange.url + "currencies")
+        monkeypatch.setattr(utilities, "currency_catalog", catalog)
+
+    @staticmethod
+    def validate(**values):
+        """Returns the errors OrderSchema finds in VALID_ORDERS with some values replaced."""
+
+        return OrderSchema().validate({**VALID_ORDERS, **values})[1]
+
     @pytest.mark.parametrize(
         "start_date,raises_error",
         [
@@ -35,18 +58,12 @@ class TestYAMLInputCollector:
             ("2039-12-31", False),
         ],
     )
-    def test_get_start_date(self, start_date, raises_error):
-        """Tests YAMLInputCollector.get_start_date()."""
-
-        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_ORDERS1)
-        input_collector.yaml_file["start_date"] = start_date
+    def test_start_date(self, start_date, raises_error, currency_catalog):
+        """Tests the validation of start_date."""
 
-        if raises_error:
-            with pytest.raises(RuntimeError, match=f"Date string '{start_date}' is not valid!"):
-                input_collector.get_start_date()
+        errors = self.validate(start_date=start_date)
 
-        else:
-            assert input_collector.get_start_date() == start_date
+        assert (f"start_date: Date string '{start_date}' is not valid!" in errors) == raises_error
 
     @pytest.mark.parametrize(
         "start_time,raises_error",
@@ -60,18 +77,12 @@ class TestYAMLInputCollector:
             ("12:00 PM", False),
         ],
     )
-    def test_get_start_time(self, start_time, raises_error):
-        """Tests YAMLInputCollector.get_start_time()."""
+    def test_start_time(self, start_time, raises_error, currency_catalog):
+        """Tests the validation of start_time."""
 
-        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_ORDERS1)
-        input_collector.yaml_file["start_time"] = start_time
+        errors = self.validate(start_time=start_time)
 
-        if raises_error:
-            with pytest.raises(RuntimeError, match=f"Time string '{start_time}' is not valid!"):
-                input_collector.get_start_time()
-
-        else:
-            assert input_collector.get_start_time() == start_time
+        assert (f"start_time: Time string '{start_time}' is not valid!" in errors) == raises_error
 
     @pytest.mark.parametrize(
         "start_date,start_time,raises_error",
@@ -83,19 +94,12 @@ class TestYAMLInputCollector:
             ("2039-12-31", "10:00 AM", False),
         ],
     )
-    def test_get_start_datetime(self, start_date, start_time, raises_error):
-        """Tests YAMLInputCollector.get_start_datetime()."""
+    def test_start_datetime(self, start_date, start_time, raises_error, currency_catalog):
+        """Tests the validation of the start date and time together."""
 
-        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_ORDERS1)
-        input_collector.yaml_file["start_date"] = start_date
-        input_collector.yaml_file["start_time"] = start_time
+        errors = self.validate(start_date=start_date, start_time=start_time)
 
-        if raises_error:
-            with pytest.raises(RuntimeError, match=f"Datetime string '{start_date} {start_time}' is not valid!"):
-                input_collector.get_start_datetime()
-
-        else:
-            assert input_collector.get_start_datetime() == (start_date, start_time)
+        assert errors == ([f"Datetime string '{start_date} {start_time}' is not valid!"] if raises_error else [])
 
     @pytest.mark.parametrize(
         "frequency,raises_error",
@@ -109,43 +113,35 @@ class TestYAMLInputCollector:
             ("monthly", False),
         ],
     )
-    def test_get_frequency(self, frequency, raises_error):
-        """Tests YAMLInputCollector.get_frequency()."""
+    def test_frequency(self, frequency, raises_error, currency_catalog):
+        """Tests the validation of frequency."""
 
-        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_ORDERS1)
-        input_collector.yaml_file["frequency"] = frequency
+        errors = self.validate(frequency=frequency)
 
-        if raises_error:
-            with pytest.raises(RuntimeError, match=f"Frequency '{frequency}' is not valid!"):
-                input_collector.get_frequency()
-
-        else:
-            assert input_collector.get_frequency() == frequency
+        assert errors == ([f"frequency: Frequency '{frequency}' is not valid!"] if raises_error else [])
 
     @pytest.mark.parametrize(
-        "crypto_list,amount_list,expected,raises_error,error_msg",
+        "crypto_list,amount_list,expected,error_msg",
         [
-            (["INVALID"], ["1000"], None, True, "Cryptocurrency symbol 'INVALID' is not valid!"),
-            (["BTC"], ["One Hundred"], None, True, "Dollar amount 'One Hundred' is not valid!"),
-            (["BTC"], ["-100"], None, True, "Dollar amount '-100' is not valid!"),
-            (["BTC", "LINK"], ["1000"], None, True, "Number of crypto symbols does not match number of amounts given."),
-            (["BTC"], ["1000"], {"BTC": "1000"}, False, None),
-            (["BTC", "LINK"], ["500.50", "499.50"], {"BTC": "500.50", "LINK": "499.50"}, False, None),
+            (["INVALID"], ["1000"], None, "crypto[0]: Cryptocurrency symbol 'INVALID' is not valid!"),
+            (["BTC"], ["One Hundred"], None, "amount_usd[0]: Dollar amount 'One Hundred' is not valid!"),
+            (["BTC"], ["-100"], None, "amount_usd[0]: Dollar amount '-100' is not valid!"),
+            (["BTC", "LINK"], ["1000"], None, "Number of crypto symbols does not match number of amounts given."),
+            (["BTC"], ["1000"], {"BTC": "1000"}, None),
+            (["BTC", "LINK"], ["500.50", "499.50"], {"BTC": "500.50", "LINK": "499.50"}, None),
         ],
     )
-    def test_get_orders(self, crypto_list, amount_list, expected, raises_error, error_msg):
-        """Tests YAMLInputCollector.get_orders()."""
+    def test_orders(self, crypto_list, amount_list, expected, error_msg, currency_catalog):
+        """Tests the validation of the crypto and amount_usd lists."""
 
-        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_ORDERS1)
-        input_collector.yaml_file["crypto"] = crypto_list
-        input_collector.yaml_file["amount_usd"] = amount_list
+        schedules, errors = OrderSchema().validate({**VALID_ORDERS, "crypto": crypto_list, "amount_usd": amount_list})
 
-        if raises_error:
-            with pytest.raises(RuntimeError, match=error_msg):
-                input_collector.get_orders()
+        if error_msg is not None:
+            assert errors == [error_msg]
 
         else:
-            assert input_collector.get_orders() == expected
+            assert errors == []
+            assert schedules[0]["orders"] == expected
 
     @pytest.mark.parametrize(
         "yaml_filepath,expected,raises_error,error_msg",
@@ -213,3 +209,69 @@ class TestYAMLInputCollector:
             assert input_collector.start_time == expected["start_time"]
             assert input_collector.frequency == expected["frequency"]
             assert input_collector.orders == expected["orders"]
+
+
+class TestYAMLInputCollectorSchedules:
+    """Tests YAMLInputCollector with a list of schedule blocks."""
+
+    @pytest.fixture(autouse=True)
+    def currency_catalog(self, mock_exchange, tmp_path, monkeypatch):
+        catalog = CurrencyCatalog(path=str(tmp_path / "currencies.json"), url=mock_exchange.url + "currencies")
+        monkeypatch.setattr(utilities, "currency_catalog", catalog)
+
+    def test_collect_inputs(self):
+        """Checks that every schedule is collected and the first one fills the single-schedule attributes."""
+
+        input_collector = YAMLInputCollector(yaml_filepath=YAML_VALID_SCHEDULES1)
+        input_collector.collect_inputs()
+
+        assert input_collector.schedules == [
+            {
+                "name": "btc-daily",
+                "frequency": "daily",
+                "start_date": "2039-01-03",
+                "start_time": "07:00 AM",
+                "orders": {"BTC": "10"},
+            },
+            {
+                "name": "eth-weekly",
+                "frequency": "weekly",
+                "start_date": "2039-01-03",
+                "start_time": "09:00 AM",
+                "orders": {"ETH": "50", "LINK": "25.50"},
+            },
+        ]
+        assert input_collector.frequency == "daily"
+        assert input_collector.orders == {"BTC": "10"}
+
+    @pytest.mark.parametrize(
+        "schedules,error_msg",
+        [
+            ("[]", "Schedules must be a non-empty list!"),
+            ("[daily]", "Every schedule must be a mapping!"),
+            (
+                "[{name: a, crypto: [BTC], amount_usd: [1], start_date: 2039-01-01, start_time: 07:00 AM, "
+                "frequency: daily}, {name: a, crypto: [ETH], amount_usd: [1], start_date: 2039-01-01, "
+                "start_time: 07:00 AM, frequency: weekly}]",
+                "Schedule name 'a' is used more than once!",
+            ),
+            (
+                "[{name: 'a:b', crypto: [BTC], amount_usd: [1], start_date: 2039-01-01, start_time: 07:00 AM, "
+                "frequency: daily}]",
+                "Schedule name 'a:b' is not valid!",
+            ),
+            (
+                "[{crypto: [BTC], amount_usd: [1], start_date: 2039-01-01, start_time: 07:00 AM, "
+                "frequency: yearly}]",
+                "Frequency 'yearly' is not valid!",
+            ),
+        ],
+    )
+    def test_collect_inputs_with_invalid_schedules(self, schedules, error_msg, tmp_path):
+        """Checks that every schedule block is validated."""
+
+        path = tmp_path / "orders.yaml"
+        path.write_text(f"schedules: {schedules}\n")
+
+        with pytest.raises(RuntimeError, match=error_msg):
+            YAMLInputCollector(yaml_filepath=str(path)).collect_inputs()